@@ -0,0 +1,311 @@
+# almanac.py
+#
+# Compact offline almanac for star sights.
+#
+# Resolves ICRS star directions to Earth-fixed apparent places (Greenwich hour
+# angle and declination) for any UTC instant, without astropy and without
+# downloading IERS tables. Only numpy is needed at run time.
+#
+# The almanac file (almanac.npz) holds, over a multi-year window:
+# - Chebyshev coefficients, per fixed-length segment, of the CIP coordinates
+#   X and Y and the CIO locator s (IAU 2006/2000A precession-nutation), of the
+#   equation of the origins (for GHA Aries), of the Earth's barycentric
+#   velocity (annual aberration) and of its heliocentric position (light
+#   deflection by the Sun).
+# - Daily samples of UT1-TAI and polar motion from the IERS tables.
+# - The TAI-UTC leap second table.
+#
+# The chain is ICRS -> (aberration) GCRS -> CIRS -> (Earth rotation angle) TIRS
+# -> (polar motion) ITRS, the same as astropy's ICRS -> ITRS transform. The file
+# is generated with build_almanac, which is the only part of this module that
+# needs erfa/astropy; validate_against_astropy compares the result with the full
+# astropy transform.
+
+import os
+import math
+import threading
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import numpy as np
+
+ALMANAC_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "almanac.npz")
+
+# J2000.0 (2000-01-01T12:00:00 TT) as a POSIX UTC-scale instant, in microseconds.
+# Time arguments below are "days since J2000" on the TT and UT1 scales.
+J2000_UNIX_US = 946728000 * 1000000
+US_PER_DAY = 86400 * 1000000
+TT_MINUS_TAI_S = 32.184
+ARCSEC_TO_RAD = math.pi / (180.0 * 3600.0)
+
+# Series stored as Chebyshev coefficients, in this order.
+SERIES = ("cip_x", "cip_y", "cio_s", "eo", "vx", "vy", "vz", "ex", "ey", "ez")
+
+# Schwarzschild radius of the Sun (AU), as erfa's ERFA_SRS
+SUN_SCHWARZSCHILD_RADIUS_AU = 1.97412574336e-8
+
+# Earth orientation samples: mjd0 is the UTC MJD of the first (daily) sample,
+# polar_motion_arcsec is Nx2 (x, y). Almanac.eop holds one of these and is only ever
+# replaced whole, so a reader that takes it once sees a consistent table.
+EarthOrientation = namedtuple("EarthOrientation", ["mjd0", "ut1_minus_tai_s", "polar_motion_arcsec"])
+
+
+def utc_microseconds(value):
+    """
+    UTC instant as integer microseconds since 1970-01-01 (POSIX, no leap seconds).
+    Accepts an aware datetime, a naive datetime taken as UTC, an ISO-8601 string
+    (optionally ending in 'Z') or a number already in microseconds.
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        delta = value - datetime(1970, 1, 1, tzinfo=timezone.utc)
+        return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+    return int(value)
+
+
+def _rotate_z(angle, x, y, z):
+    """Rotation of the frame (not the vector) about z, as erfa's Rz."""
+    c, s = np.cos(angle), np.sin(angle)
+    return c * x + s * y, c * y - s * x, z
+
+
+class Almanac:
+    """
+    Earth-fixed apparent places from the precomputed almanac file.
+    Use Almanac.default() for the shared instance loaded from ALMANAC_FILE.
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, path=ALMANAC_FILE):
+        with np.load(path) as data:
+            self.t0_days = float(data["t0_days"])
+            self.segment_days = float(data["segment_days"])
+            self.coefficients = data["coefficients"]
+            self.eop = EarthOrientation(int(data["eop_mjd0"]), data["ut1_minus_tai_s"],
+                                        data["polar_motion_arcsec"])
+            self.leap_utc_us = data["leap_utc_us"]
+            self.leap_tai_minus_utc_s = data["leap_tai_minus_utc_s"]
+        self.t1_days = self.t0_days + self.segment_days * len(self.coefficients)
+
+    @classmethod
+    def default(cls):
+        """Shared almanac instance, or None if the almanac file is not available."""
+        with cls._default_lock:
+            if cls._default is None and os.path.exists(ALMANAC_FILE):
+                cls._default = cls(ALMANAC_FILE)
+            return cls._default
+
+    # --- Time scales ---
+
+    def tai_minus_utc_s(self, utc_us):
+        """TAI-UTC (leap seconds) at UTC instants in microseconds."""
+        idx = np.searchsorted(self.leap_utc_us, np.asarray(utc_us, dtype=np.int64), side="right") - 1
+        return self.leap_tai_minus_utc_s[np.maximum(idx, 0)]
+
+    def set_eop(self, mjd0, ut1_minus_utc_s, polar_motion_arcsec):
+        """
+        Replaces the Earth orientation samples, e.g. with a fresher IERS table.
+        mjd0: UTC MJD of the first sample; samples are daily. polar_motion_arcsec: Nx2 (x, y).
+        Safe while other threads compute places: they use either the old or the new table.
+        """
+        ut1_minus_utc_s = np.asarray(ut1_minus_utc_s, dtype=float)
+        mjd = int(mjd0) + np.arange(len(ut1_minus_utc_s))
+        utc_us = J2000_UNIX_US + np.round((mjd - 51544.5) * US_PER_DAY).astype(np.int64)
+        self.eop = EarthOrientation(int(mjd0), ut1_minus_utc_s - self.tai_minus_utc_s(utc_us),
+                                    np.asarray(polar_motion_arcsec, dtype=float).reshape(-1, 2))
+
+    def _days_since_j2000(self, utc_us, eop):
+        """
+        Whole days and TT / UT1 day fractions since J2000 for UTC microseconds, with the
+        EarthOrientation eop. Returns (days_int, tt_days, ut1_fraction, eop_pos) where
+        ut1_fraction keeps full precision for the Earth rotation angle and eop_pos is
+        the fractional index into the eop samples.
+        """
+        utc_us = np.asarray(utc_us, dtype=np.int64)
+        tai_minus_utc = self.tai_minus_utc_s(utc_us)
+        delta_us = utc_us - J2000_UNIX_US
+        days_int = delta_us // US_PER_DAY
+        seconds = (delta_us - days_int * US_PER_DAY) / 1e6
+        # EOP samples are indexed by UTC MJD; J2000 is MJD 51544.5
+        mjd = 51544.5 + days_int + seconds / 86400.0
+        pos = np.clip(mjd - eop.mjd0, 0.0, len(eop.ut1_minus_tai_s) - 1.0)
+        ut1_minus_tai = np.interp(pos, np.arange(len(eop.ut1_minus_tai_s)), eop.ut1_minus_tai_s)
+        tt_days = days_int + (seconds + tai_minus_utc + TT_MINUS_TAI_S) / 86400.0
+        ut1_fraction = (seconds + tai_minus_utc + ut1_minus_tai) / 86400.0
+        return days_int, tt_days, ut1_fraction, pos
+
+    def covers(self, utc_us):
+        """True if every instant lies inside the almanac's precession-nutation window."""
+        _, tt_days, _, _ = self._days_since_j2000(utc_us, self.eop)
+        return bool(np.all((tt_days >= self.t0_days) & (tt_days < self.t1_days)))
+
+    def _series(self, tt_days):
+        """Evaluates all SERIES at tt_days (shape (N,)); returns shape (len(SERIES), N)."""
+        seg = np.floor((tt_days - self.t0_days) / self.segment_days).astype(int)
+        if np.any(seg < 0) or np.any(seg >= len(self.coefficients)):
+            raise ValueError("Instant outside the almanac window")
+        tau = 2.0 * (tt_days - self.t0_days - seg * self.segment_days) / self.segment_days - 1.0
+        c = self.coefficients[seg]  # (N, n_series, degree + 1)
+        # Clenshaw recurrence over the Chebyshev degree
+        b1 = np.zeros(c.shape[:2])
+        b2 = np.zeros(c.shape[:2])
+        x2 = 2.0 * tau[:, None]
+        for k in range(c.shape[2] - 1, 0, -1):
+            b1, b2 = c[:, :, k] + x2 * b1 - b2, b1
+        return (c[:, :, 0] + tau[:, None] * b1 - b2).T
+
+    @staticmethod
+    def _earth_rotation_angle(days_int, ut1_fraction):
+        """Earth rotation angle (radians, IAU 2000) from split UT1 days since J2000."""
+        tu = days_int + ut1_fraction
+        turns = (ut1_fraction % 1.0) + 0.7790572732640 + 0.00273781191135448 * tu
+        return 2.0 * math.pi * (turns % 1.0)
+
+    # --- Apparent places ---
+
+    def earth_fixed(self, ra, dec, utc_us):
+        """
+        Greenwich hour angle (westward) and declination, in degrees, of ICRS
+        directions ra/dec (degrees) at UTC instants utc_us (microseconds).
+        Same conventions as celestial_navigator.precompute_earth_fixed.
+        """
+        eop = self.eop
+        days_int, tt_days, ut1_fraction, eop_pos = self._days_since_j2000(np.atleast_1d(utc_us), eop)
+        cip_x, cip_y, cio_s, _, vx, vy, vz, ex, ey, ez = self._series(tt_days)
+
+        ra_rad, dec_rad = np.deg2rad(ra), np.deg2rad(dec)
+        px = np.cos(dec_rad) * np.cos(ra_rad)
+        py = np.cos(dec_rad) * np.sin(ra_rad)
+        pz = np.sin(dec_rad)
+
+        # Light deflection by the Sun (as erfa's ldsun, star at infinity)
+        em = np.sqrt(ex * ex + ey * ey + ez * ez)
+        ex, ey, ez = ex / em, ey / em, ez / em
+        dlim = 1e-6 / np.maximum(em * em, 1.0)
+        w = SUN_SCHWARZSCHILD_RADIUS_AU / em / np.maximum(1.0 + px * ex + py * ey + pz * ez, dlim)
+        # p x (e x p) = e - p (p . e)
+        pde = px * ex + py * ey + pz * ez
+        px, py, pz = px + w * (ex - px * pde), py + w * (ey - py * pde), pz + w * (ez - pz * pde)
+
+        # Annual aberration (special relativistic, as erfa's ab)
+        pdv = px * vx + py * vy + pz * vz
+        bm1 = np.sqrt(1.0 - (vx * vx + vy * vy + vz * vz))
+        w = 1.0 + pdv / (1.0 + bm1)
+        px, py, pz = bm1 * px + w * vx, bm1 * py + w * vy, bm1 * pz + w * vz
+        norm = np.sqrt(px * px + py * py + pz * pz)
+        px, py, pz = px / norm, py / norm, pz / norm
+
+        # GCRS -> CIRS from X, Y, s (IERS Conventions 2010, eq. 5.10)
+        a = 1.0 / (1.0 + np.sqrt(1.0 - cip_x * cip_x - cip_y * cip_y))
+        qx = (1.0 - a * cip_x * cip_x) * px - a * cip_x * cip_y * py - cip_x * pz
+        qy = -a * cip_x * cip_y * px + (1.0 - a * cip_y * cip_y) * py - cip_y * pz
+        qz = cip_x * px + cip_y * py + (1.0 - a * (cip_x * cip_x + cip_y * cip_y)) * pz
+        qx, qy, qz = _rotate_z(-cio_s, qx, qy, qz)
+
+        # CIRS -> TIRS (Earth rotation), TIRS -> ITRS (polar motion, small angles)
+        qx, qy, qz = _rotate_z(self._earth_rotation_angle(days_int, ut1_fraction), qx, qy, qz)
+        n = len(eop.polar_motion_arcsec)
+        xp = np.interp(eop_pos, np.arange(n), eop.polar_motion_arcsec[:, 0]) * ARCSEC_TO_RAD
+        yp = np.interp(eop_pos, np.arange(n), eop.polar_motion_arcsec[:, 1]) * ARCSEC_TO_RAD
+        qx, qz = qx + xp * qz, qz - xp * qx
+        qy, qz = qy - yp * qz, qz + yp * qy
+
+        gha_deg = np.rad2deg(-np.arctan2(qy, qx)) % 360.0
+        dec_deg = np.rad2deg(np.arcsin(np.clip(qz, -1.0, 1.0)))
+        return gha_deg, dec_deg
+
+    def gha_aries(self, utc_us):
+        """Greenwich hour angle of the true equinox (apparent sidereal time), degrees."""
+        days_int, tt_days, ut1_fraction, _ = self._days_since_j2000(np.atleast_1d(utc_us), self.eop)
+        eo = self._series(tt_days)[SERIES.index("eo")]
+        return np.rad2deg(self._earth_rotation_angle(days_int, ut1_fraction) - eo) % 360.0
+
+
+# --- Generation and validation (desktop side, needs erfa and astropy) ---
+
+def build_almanac(path=ALMANAC_FILE, start="2020-01-01", end="2032-01-01", segment_days=32, degree=13):
+    """
+    Generates the almanac file for [start, end) from erfa's IAU 2006/2000A models
+    and astropy's IERS Earth orientation table. Outside the IERS table, UT1-TAI and
+    polar motion are held at their last values, so the file should be rebuilt with
+    fresh IERS data from time to time.
+    """
+    import erfa
+    from astropy.utils import iers
+
+    t0_days = (utc_microseconds(start) - J2000_UNIX_US) / US_PER_DAY
+    n_segments = int(math.ceil(((utc_microseconds(end) - J2000_UNIX_US) / US_PER_DAY - t0_days) / segment_days))
+    n_nodes = 2 * (degree + 1)
+    nodes = np.cos(np.pi * (np.arange(n_nodes) + 0.5) / n_nodes)
+    au_per_day_to_c = erfa.DAU / 86400.0 / erfa.CMPS
+
+    tt = t0_days + (np.arange(n_segments)[:, None] + (nodes[None, :] + 1.0) / 2.0) * segment_days
+    jd1, jd2 = erfa.DJ00, tt.ravel()
+    cip_x, cip_y = erfa.xy06(jd1, jd2)
+    heliocentric, barycentric = erfa.epv00(jd1, jd2)
+    values = [
+        cip_x, cip_y, erfa.s06(jd1, jd2, cip_x, cip_y), erfa.eo06a(jd1, jd2),
+        *(barycentric["v"].T * au_per_day_to_c), *heliocentric["p"].T,
+    ]
+    values = np.stack(values).reshape(len(SERIES), n_segments, n_nodes)
+    coefficients = np.empty((n_segments, len(SERIES), degree + 1))
+    for i in range(len(SERIES)):
+        coefficients[:, i, :] = np.polynomial.chebyshev.chebfit(nodes, values[i].T, degree).T
+
+    table = iers.IERS_Auto.open()
+    mjd = np.asarray(table["MJD"].value)
+    keep = (mjd >= math.floor(51544.5 + t0_days) - 1)
+    mjd = mjd[keep]
+    dat = erfa.dat(*erfa.jd2cal(2400000.5, mjd)[:3], 0.0)
+    ut1_minus_tai_s = np.asarray(table["UT1_UTC"].to_value("s"))[keep] - dat
+    polar_motion_arcsec = np.stack([np.asarray(table["PM_x"].to_value("arcsec"))[keep],
+                                    np.asarray(table["PM_y"].to_value("arcsec"))[keep]], axis=1)
+
+    leaps = erfa.leap_seconds.get()
+    leap_utc_us = np.array([utc_microseconds(datetime(int(y), int(m), 1)) for y, m in zip(leaps["year"], leaps["month"])],
+                           dtype=np.int64)
+
+    tmp_path = path + ".tmp.npz"
+    np.savez_compressed(
+        tmp_path,
+        t0_days=t0_days, segment_days=float(segment_days), coefficients=coefficients,
+        eop_mjd0=int(mjd[0]), ut1_minus_tai_s=ut1_minus_tai_s, polar_motion_arcsec=polar_motion_arcsec,
+        leap_utc_us=leap_utc_us, leap_tai_minus_utc_s=np.asarray(leaps["tai_utc"], dtype=float))
+    os.replace(tmp_path, path)
+    return path
+
+
+def validate_against_astropy(almanac=None, samples=2000, seed=0):
+    """
+    Compares almanac apparent places with astropy's ICRS -> ITRS transform for
+    random stars and instants inside the almanac window and the IERS table (past
+    its end both sides extrapolate Earth orientation differently). Returns the
+    largest angular difference in arcseconds.
+    """
+    from astropy.time import Time
+    from celestial_navigator import precompute_earth_fixed
+
+    almanac = almanac or Almanac.default()
+    rng = np.random.default_rng(seed)
+    ra = rng.uniform(0.0, 360.0, samples)
+    dec = np.rad2deg(np.arcsin(rng.uniform(-1.0, 1.0, samples)))
+    eop_end_days = almanac.eop.mjd0 + len(almanac.eop.ut1_minus_tai_s) - 1 - 51544.5
+    span_us = (min(almanac.t1_days, eop_end_days) - almanac.t0_days - 1.0) * US_PER_DAY
+    utc_us = J2000_UNIX_US + int(almanac.t0_days * US_PER_DAY) + rng.integers(0, int(span_us), samples)
+
+    gha, dec_app = almanac.earth_fixed(ra, dec, utc_us)
+    ref_gha, ref_dec = precompute_earth_fixed(ra, dec, Time(utc_us / 1e6, format="unix"))
+    d_gha = np.deg2rad((gha - ref_gha + 180.0) % 360.0 - 180.0)
+    d_dec = np.deg2rad(dec_app - ref_dec)
+    separation = np.hypot(d_gha * np.cos(np.deg2rad(ref_dec)), d_dec)
+    return float(np.rad2deg(np.max(separation)) * 3600.0)
+
+
+if __name__ == "__main__":
+    print(f"Wrote {build_almanac()}")
+    print(f"Max difference vs astropy: {validate_against_astropy():.4f} arcsec")
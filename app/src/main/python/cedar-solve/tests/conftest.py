@@ -0,0 +1,70 @@
+"""Fixtures shared by the tetra3 tests: a small database generated from a synthetic
+star catalog, and star fields projected from it."""
+import numpy as np
+import pytest
+
+import tetra3
+from tetra3 import fov_util
+
+IMAGE_SIZE = (750, 1000)
+FOV_DEG = 50.0
+
+
+def _write_catalog(path, num_stars=6000, seed=0):
+    """Writes uniformly spread stars in the Hipparcos hip_main.dat format."""
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(num_stars, 3))
+    vectors /= np.linalg.norm(vectors, axis=1)[:, None]
+    ra = np.rad2deg(np.arctan2(vectors[:, 1], vectors[:, 0])) % 360
+    dec = np.rad2deg(np.arcsin(vectors[:, 2]))
+    mag = np.sort(rng.uniform(-1, 6.5, num_stars))
+    with open(path, 'w') as f:
+        for i in range(num_stars):
+            row = (['H', str(i + 1), ' ', ' ', ' ', '%.2f' % mag[i], ' ', ' ',
+                    '%.8f' % ra[i], '%.8f' % dec[i], ' ', ' ', '0', '0'] + [' '] * 10)
+            f.write('|'.join(row) + '\n')
+
+
+@pytest.fixture(scope='session')
+def t3(tmp_path_factory):
+    """Tetra3 with a 45-60 degree FOV database of a synthetic catalog."""
+    directory = tmp_path_factory.mktemp('database')
+    _write_catalog(directory / 'hip_main.dat')
+    generator = tetra3.Tetra3(load_database=None)
+    generator.generate_database(max_fov=60, min_fov=45, save_as=directory / 'test_db',
+                                star_catalog=directory / 'hip_main.dat',
+                                epoch_proper_motion=None, verification_stars_per_fov=30,
+                                lattice_field_oversampling=30, patterns_per_lattice_field=30)
+    return tetra3.Tetra3(load_database=directory / 'test_db.npz')
+
+
+def star_field(t3, boresight, max_stars=20):
+    """(y, x) centroids of the catalog stars seen by a FOV_DEG camera pointing at the unit
+    vector `boresight`, brightest first."""
+    (height, width) = IMAGE_SIZE
+    vectors = t3.star_table[t3._get_nearby_catalog_stars(boresight, np.deg2rad(70) / 2), 2:5]
+    up = np.array([0, 0, 1.0]) if abs(boresight[2]) < 0.9 else np.array([1.0, 0, 0])
+    left = np.cross(up, boresight)
+    left /= np.linalg.norm(left)
+    up = np.cross(boresight, left)
+    focal = width / 2 / np.tan(np.deg2rad(FOV_DEG) / 2)
+    depth = vectors @ boresight
+    front = depth > 0.1
+    x = width / 2 - focal * (vectors @ left)[front] / depth[front]
+    y = height / 2 - focal * (vectors @ up)[front] / depth[front]
+    inside = (x > 2) & (y > 2) & (x < width - 2) & (y < height - 2)
+    return np.stack([y[inside], x[inside]], axis=1)[:max_stars]
+
+
+@pytest.fixture(scope='session')
+def star_fields(t3):
+    """Centroid lists of a few fields spread over the sky."""
+    return [star_field(t3, boresight) for boresight in fov_util.fibonacci_sphere_lattice(4)]
+
+
+@pytest.fixture(scope='session')
+def hard_field(star_fields):
+    """A solvable field behind a few false stars, so the search takes many steps."""
+    rng = np.random.default_rng(3)
+    false_stars = rng.uniform([0, 0], IMAGE_SIZE, (6, 2))
+    return np.vstack([false_stars, star_fields[0]])
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+import tetra3
+
+SHAPE = (200, 300)
+
+
+@pytest.fixture(scope='module')
+def star_image():
+    """Noisy image with Gaussian stars on a jittered grid over the frame, and their (y, x)
+    positions."""
+    rng = np.random.default_rng(5)
+    grid = np.stack(np.meshgrid(np.arange(20, SHAPE[0], 32), np.arange(20, SHAPE[1], 32),
+                                indexing='ij'), axis=-1).reshape(-1, 2)
+    positions = grid + rng.uniform(-4, 4, grid.shape)
+    y, x = np.mgrid[0:SHAPE[0], 0:SHAPE[1]]
+    image = rng.normal(100.0, 3.0, SHAPE)
+    for (py, px) in positions:
+        image += 400.0 * np.exp(-((y - py)**2 + (x - px)**2) / (2 * 1.5**2))
+    return image, positions
+
+
+def _found(centroids, positions):
+    """Number of positions with a centroid within 1.5 pixels."""
+    centroids = np.asarray(centroids).reshape(-1, 2)
+    if len(centroids) == 0:
+        return 0
+    distances = np.linalg.norm(positions[:, None, :] - centroids[None, :, :], axis=2)
+    return int(np.count_nonzero(distances.min(axis=1) < 1.5))
+
+
+@pytest.mark.parametrize('downsample', [None, 2])
+def test_masked_pixels_give_no_centroids(star_image, downsample):
+    image, positions = star_image
+    horizon = 110
+    mask = np.zeros(SHAPE, dtype=bool)
+    mask[:horizon] = True
+
+    unmasked = np.asarray(tetra3.get_centroids_from_image(image, downsample=downsample))
+    if downsample is None:
+        assert _found(unmasked, positions) == len(positions)
+    assert unmasked[:, 0].max() > horizon
+    sky = unmasked[unmasked[:, 0] < horizon - 4]
+    assert len(sky) > 10
+
+    centroids = np.asarray(tetra3.get_centroids_from_image(image, downsample=downsample, mask=mask))
+    assert centroids[:, 0].max() < horizon
+    assert _found(centroids, sky) >= len(sky) - 1
+
+
+# The global noise estimate over no pixels at all warns (and finds nothing).
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+def test_fully_masked_image_gives_no_centroids(star_image):
+    image, _ = star_image
+    centroids = tetra3.get_centroids_from_image(image, mask=np.zeros(SHAPE, dtype=bool))
+    assert len(centroids) == 0
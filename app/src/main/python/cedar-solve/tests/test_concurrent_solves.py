@@ -0,0 +1,51 @@
+import threading
+
+import tetra3
+
+from conftest import FOV_DEG, IMAGE_SIZE
+
+
+class _Gated(tetra3.SolveContext):
+    """SolveContext whose first stop check signals `started`, then waits for `go`."""
+    def __init__(self, go=None):
+        super().__init__()
+        self.started = threading.Event()
+        self.go = go if go is not None else threading.Event()
+
+    def stop_status(self):
+        if not self.started.is_set():
+            self.started.set()
+            assert self.go.wait(10)
+        return super().stop_status()
+
+
+def test_cancel_one_of_two_threaded_solves(t3, hard_field):
+    reference = t3.solve_from_centroids(hard_field, IMAGE_SIZE, fov_estimate=FOV_DEG,
+                                        fov_max_error=5)
+    assert reference['status'] == tetra3.MATCH_FOUND
+
+    cancelled = _Gated()
+    # The other solve only runs once the first one is in flight, and keeps running.
+    other = _Gated(go=cancelled.started)
+    solutions = {}
+
+    def solve(name, context):
+        solutions[name] = t3.solve_from_centroids(hard_field, IMAGE_SIZE, fov_estimate=FOV_DEG,
+                                                  fov_max_error=5, solve_timeout=None,
+                                                  context=context)
+
+    threads = [threading.Thread(target=solve, args=('cancelled', cancelled)),
+               threading.Thread(target=solve, args=('other', other))]
+    for thread in threads:
+        thread.start()
+    assert cancelled.started.wait(10) and other.started.wait(10)
+    cancelled.cancel()
+    cancelled.go.set()
+    for thread in threads:
+        thread.join(30)
+        assert not thread.is_alive()
+
+    assert solutions['cancelled']['status'] == tetra3.CANCELLED
+    assert solutions['other']['status'] == tetra3.MATCH_FOUND
+    assert (solutions['other']['RA'], solutions['other']['Dec']) == (reference['RA'], reference['Dec'])
+    assert not other.cancelled
@@ -0,0 +1,71 @@
+import pytest
+
+import tetra3
+
+from conftest import FOV_DEG, IMAGE_SIZE
+
+STATISTICS = ('image_patterns_evaluated', 'search_space_explored', 'catalog_lookup_count',
+              'catalog_eval_count')
+
+
+class _StopAt(tetra3.SolveContext):
+    """SolveContext that reports TIMEOUT at the given stop checks (counted from 1)."""
+    def __init__(self, stops=()):
+        super().__init__()
+        self.stops = set(stops)
+        self.checks = 0
+
+    def stop_status(self):
+        self.checks += 1
+        if self.checks in self.stops:
+            return tetra3.TIMEOUT
+        return super().stop_status()
+
+
+def _solve(t3, centroids, context):
+    return t3.solve_from_centroids(centroids, IMAGE_SIZE, fov_estimate=FOV_DEG, fov_max_error=5,
+                                   solve_timeout=None, context=context)
+
+
+def test_resume_matches_uninterrupted_solve(t3, hard_field):
+    full = _StopAt()
+    reference = _solve(t3, hard_field, full)
+    assert reference['status'] == tetra3.MATCH_FOUND
+    assert full.checks > 100
+
+    for stop in (1, 2, full.checks // 3, full.checks // 2, full.checks - 1):
+        context = _StopAt({stop, stop + 1})
+        solution = _solve(t3, hard_field, context)
+        assert solution['status'] == tetra3.TIMEOUT
+        while context.resumable:
+            solution = t3.resume_solve(context, solve_timeout=None)
+        assert solution['status'] == tetra3.MATCH_FOUND
+        assert (solution['RA'], solution['Dec']) == (reference['RA'], reference['Dec'])
+        assert [context.statistics[key] for key in STATISTICS] == \
+            [full.statistics[key] for key in STATISTICS]
+
+
+def test_cancelled_solve_resumes(t3, hard_field):
+    context = tetra3.SolveContext()
+    context.cancel()
+    solution = _solve(t3, hard_field, context)
+    assert solution['status'] == tetra3.CANCELLED
+    assert context.resumable
+    assert t3.resume_solve(context, solve_timeout=None)['status'] == tetra3.MATCH_FOUND
+    assert not context.resumable
+
+
+def test_resume_of_finished_solve_fails(t3, star_fields):
+    context = tetra3.SolveContext()
+    assert _solve(t3, star_fields[1], context)['status'] == tetra3.MATCH_FOUND
+    assert not context.resumable
+    with pytest.raises(AssertionError):
+        t3.resume_solve(context)
+
+
+def test_best_candidate_reported_on_timeout(t3, hard_field):
+    solution = t3.solve_from_centroids(hard_field, IMAGE_SIZE, fov_estimate=FOV_DEG,
+                                       fov_max_error=5, context=_StopAt({1}),
+                                       return_best_candidate=True)
+    assert solution['status'] == tetra3.TIMEOUT
+    assert 'best_candidate' in solution
@@ -0,0 +1,79 @@
+import math
+
+import numpy as np
+
+import tetra3
+from tetra3 import solve_corpus
+
+from conftest import FOV_DEG, IMAGE_SIZE
+
+
+def _record(t3, path, centroid_sets):
+    recorder = tetra3.SolveRecorder(path)
+    try:
+        return [t3.solve_from_centroids(centroids, IMAGE_SIZE, fov_estimate=FOV_DEG,
+                                        fov_max_error=5, recorder=recorder)
+                for centroids in centroid_sets]
+    finally:
+        recorder.close()
+
+
+def test_corpus_round_trip(t3, star_fields, tmp_path):
+    path = tmp_path / 'solves.t3c'
+    junk = np.random.default_rng(1).uniform([0, 0], IMAGE_SIZE, (3, 2))
+    solutions = _record(t3, path, star_fields[:2] + [junk])
+
+    records = list(solve_corpus.read_solve_corpus(path))
+    assert len(records) == 3
+    for (record, centroids, solution) in zip(records, star_fields[:2] + [junk], solutions):
+        np.testing.assert_array_equal(record.centroids, centroids)
+        assert record.size == IMAGE_SIZE
+        assert record.params['fov_estimate'] == FOV_DEG
+        assert record.database == t3.database_fingerprint
+        assert record.solution == {key: solution[key] for key in solve_corpus.SOLUTION_FIELDS}
+    assert records[2].solution['status'] == tetra3.TOO_FEW
+
+
+def test_recorder_appends(t3, star_fields, tmp_path):
+    path = tmp_path / 'solves.t3c'
+    _record(t3, path, star_fields[:1])
+    _record(t3, path, star_fields[1:2])
+    assert len(list(solve_corpus.read_solve_corpus(path))) == 2
+
+
+def test_truncated_record_is_ignored(t3, star_fields, tmp_path):
+    path = tmp_path / 'solves.t3c'
+    _record(t3, path, star_fields[:2])
+    data = path.read_bytes()
+    path.write_bytes(data[:-5])
+    assert len(list(solve_corpus.read_solve_corpus(path))) == 1
+
+
+def test_replay_unchanged(t3, star_fields, tmp_path):
+    path = tmp_path / 'solves.t3c'
+    _record(t3, path, star_fields)
+    result = solve_corpus.replay_solve_corpus(path, database=t3, solve_timeout=math.inf)
+    assert result['num_records'] == len(star_fields)
+    assert result['num_other_database'] == 0
+    assert result['solve_rate'] == result['recorded_solve_rate'] == 1.0
+    assert result['status_changes'] == {}
+    assert result['changed'] == []
+    assert result['max_separation_arcsec'] < 1.0
+    assert result['latency_ms']['max'] is not None
+
+
+def test_replay_reports_changes(t3, star_fields, tmp_path):
+    path = tmp_path / 'solves.t3c'
+    _record(t3, path, star_fields[:2])
+    # Recorded with a FOV estimate far outside the database range: nothing solves.
+    recorder = tetra3.SolveRecorder(path)
+    recorder.record(star_fields[2], IMAGE_SIZE, {'fov_estimate': 10.0, 'fov_max_error': 1.0},
+                    'other', {'status': tetra3.MATCH_FOUND, 'RA': 0.0, 'Dec': 0.0,
+                              'T_solve': 1.0})
+    recorder.close()
+    result = solve_corpus.replay_solve_corpus(path, database=t3, solve_timeout=math.inf)
+    assert result['num_records'] == 3
+    assert result['num_other_database'] == 1
+    assert result['recorded_solve_rate'] == 1.0
+    assert sum(result['status_changes'].values()) == 1
+    assert [entry['index'] for entry in result['changed']] == [2]
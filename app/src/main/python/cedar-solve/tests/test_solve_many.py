@@ -0,0 +1,85 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+import tetra3
+from tetra3 import solve_corpus
+
+from conftest import FOV_DEG, IMAGE_SIZE
+
+
+@pytest.fixture(scope='module')
+def centroid_sets(star_fields):
+    junk = np.random.default_rng(1).uniform([0, 0], IMAGE_SIZE, (3, 2))
+    return star_fields + [junk]
+
+
+@pytest.fixture(scope='module')
+def reference(t3, centroid_sets):
+    return [t3.solve_from_centroids(centroids, IMAGE_SIZE, fov_estimate=FOV_DEG, fov_max_error=5)
+            for centroids in centroid_sets]
+
+
+def _summary(solution):
+    return (solution['status'], solution['RA'], solution['Dec'])
+
+
+def test_in_process_results_in_order(t3, centroid_sets, reference):
+    results = list(t3.solve_many(centroid_sets, IMAGE_SIZE, fov_estimate=FOV_DEG, fov_max_error=5))
+    assert [index for (index, _) in results] == list(range(len(centroid_sets)))
+    assert [_summary(solution) for (_, solution) in results] == \
+        [_summary(solution) for solution in reference]
+    assert results[-1][1]['status'] == tetra3.TOO_FEW
+
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(),
+                    reason="worker processes need the 'fork' start method")
+def test_worker_processes_match_in_process(t3, centroid_sets, reference):
+    results = dict(t3.solve_many(centroid_sets, IMAGE_SIZE, processes=2, fov_estimate=FOV_DEG,
+                                 fov_max_error=5))
+    assert sorted(results) == list(range(len(centroid_sets)))
+    assert [_summary(results[index]) for index in sorted(results)] == \
+        [_summary(solution) for solution in reference]
+
+
+def test_without_fork_solves_in_process(t3, centroid_sets, reference, monkeypatch):
+    monkeypatch.setattr(multiprocessing, 'get_all_start_methods', lambda: ['spawn'])
+    def no_pool(*args, **kwargs):
+        raise AssertionError('no worker processes without fork')
+    monkeypatch.setattr(multiprocessing, 'get_context', no_pool)
+    results = list(t3.solve_many(centroid_sets, IMAGE_SIZE, processes=2, fov_estimate=FOV_DEG,
+                                 fov_max_error=5))
+    assert [index for (index, _) in results] == list(range(len(centroid_sets)))
+    assert [_summary(solution) for (_, solution) in results] == \
+        [_summary(solution) for solution in reference]
+
+
+def test_context_is_rejected(t3, centroid_sets):
+    with pytest.raises(TypeError):
+        next(t3.solve_many(centroid_sets, IMAGE_SIZE, context=tetra3.SolveContext()))
+    with pytest.raises(TypeError):
+        next(t3.solve_many(centroid_sets, IMAGE_SIZE, no_such_argument=1))
+
+
+@pytest.mark.parametrize('processes', [None, 2])
+def test_recorder_records_every_solve(t3, centroid_sets, tmp_path, processes):
+    if processes and 'fork' not in multiprocessing.get_all_start_methods():
+        pytest.skip("worker processes need the 'fork' start method")
+    path = tmp_path / 'solves.t3c'
+    recorder = tetra3.SolveRecorder(path)
+    try:
+        results = dict(t3.solve_many(centroid_sets, IMAGE_SIZE, processes=processes,
+                                     fov_estimate=FOV_DEG, fov_max_error=5, recorder=recorder))
+    finally:
+        recorder.close()
+
+    records = list(solve_corpus.read_solve_corpus(path))
+    assert len(records) == len(centroid_sets)
+    for record in records:
+        # Records arrive in completion order; find each one's centroid list.
+        (index,) = [i for (i, centroids) in enumerate(centroid_sets)
+                    if np.array_equal(record.centroids, centroids)]
+        assert record.params['fov_estimate'] == FOV_DEG
+        assert record.database == t3.database_fingerprint
+        assert record.solution == {key: results[index][key] for key in solve_corpus.SOLUTION_FIELDS}
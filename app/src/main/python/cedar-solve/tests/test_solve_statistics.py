@@ -0,0 +1,49 @@
+import io
+import json
+
+import tetra3
+
+from conftest import FOV_DEG, IMAGE_SIZE
+
+COUNTERS = ('image_patterns_evaluated', 'search_space_explored', 'catalog_lookup_count',
+            'catalog_eval_count')
+
+
+def test_statistics_time_every_phase(t3, hard_field):
+    context = tetra3.SolveContext()
+    solution = t3.solve_from_centroids(hard_field, IMAGE_SIZE, fov_estimate=FOV_DEG,
+                                       fov_max_error=5, context=context, return_statistics=True)
+    assert solution['status'] == tetra3.MATCH_FOUND
+    statistics = solution['statistics']
+    assert statistics == context.statistics
+    assert all(statistics[key] > 0 for key in COUNTERS)
+
+    phase_times = statistics['phase_times']
+    assert set(phase_times) == set(tetra3.SOLVE_PHASES)
+    assert all(phase_times[phase] >= 0 for phase in tetra3.SOLVE_PHASES)
+    assert phase_times['verification'] > 0 and phase_times['refinement'] > 0
+    # The result's T_solve is taken before refinement ends; statistics at the very end.
+    assert sum(phase_times.values()) <= statistics['T_solve']
+    assert solution['T_solve'] <= statistics['T_solve']
+
+    file = io.StringIO()
+    context.write_statistics(file, image='hard', status=solution['status'])
+    line = json.loads(file.getvalue())
+    assert line['image'] == 'hard' and line['phase_times'] == phase_times
+
+
+def test_statistics_of_failed_solve(t3, hard_field):
+    # The FOV estimate is outside the database range, so the search finds no match.
+    solution = t3.solve_from_centroids(hard_field, IMAGE_SIZE, fov_estimate=20, fov_max_error=1,
+                                       return_statistics=True)
+    assert solution['status'] != tetra3.MATCH_FOUND
+    assert set(solution['statistics']['phase_times']) == set(tetra3.SOLVE_PHASES)
+
+
+def test_phases_only_timed_on_request(t3, star_fields):
+    context = tetra3.SolveContext()
+    solution = t3.solve_from_centroids(star_fields[1], IMAGE_SIZE, fov_estimate=FOV_DEG,
+                                       fov_max_error=5, context=context)
+    assert 'statistics' not in solution
+    assert 'phase_times' not in context.statistics
+    assert context.statistics['image_patterns_evaluated'] > 0
@@ -1,5 +1,9 @@
 name = "tetra3"
 
-from .tetra3 import Tetra3, get_centroids_from_image, crop_and_downsample_image
+from .tetra3 import Tetra3, SolveContext, get_centroids_from_image, crop_and_downsample_image
+from .tetra3 import MATCH_FOUND, NO_MATCH, TIMEOUT, CANCELLED, TOO_FEW, SOLVE_PHASES
+from .solve_corpus import SolveRecorder
 
-__all__ = ['Tetra3', 'get_centroids_from_image', 'crop_and_downsample_image']
+__all__ = ['Tetra3', 'SolveContext', 'get_centroids_from_image', 'crop_and_downsample_image',
+           'MATCH_FOUND', 'NO_MATCH', 'TIMEOUT', 'CANCELLED', 'TOO_FEW', 'SOLVE_PHASES',
+           'SolveRecorder']
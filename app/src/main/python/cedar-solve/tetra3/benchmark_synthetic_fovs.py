@@ -1,6 +1,7 @@
 # Copyright (c) 2024 Steven Rosenthal smr@dt3.org
 # See LICENSE file in root directory for license terms.
 
+import json
 import math
 
 import numpy as np
@@ -26,13 +27,17 @@ def _ra_dec_from_vector(vec):
 
 
 def benchmark_synthetic_fovs(width, height, fov_deg, num_fovs,
-                             num_centroids=20, database='default_database'):
+                             num_centroids=20, database='default_database', processes=None,
+                             statistics_path=None):
     """Synthesizes and solves star fields.
     width, height: pixel count of camera
     fov_deg: horizontal FOV, in degrees
     num_fovs: Number of FOVs to generate. 2n + 1 FOVs are actually generated.
         0 generates a single FOV; 1 generates 3 FOVs, etc.
     num_centroids: max number of centroids to pass to solver.
+    processes: worker processes for Tetra3.solve_many (None: solve in this process).
+    statistics_path: if given, the solve statistics (search counters and phase times)
+        of every FOV are written to this file as JSON lines.
 
     Returns: dict with the following fields:
     num_successes
@@ -41,6 +46,7 @@ def benchmark_synthetic_fovs(width, height, fov_deg, num_fovs,
     max_solve_time_ms
     solve_time_histo
     histo_bin_width_ms
+    phase_times: total ms per tetra3.SOLVE_PHASES entry (only with statistics_path)
     """
 
     # TODO: apply noise to x/y centroids; apply noise to brightness ranking.
@@ -62,11 +68,10 @@ def benchmark_synthetic_fovs(width, height, fov_deg, num_fovs,
 
     t3 = tetra3.Tetra3(load_database=database)
 
-    print('Start solving...')
-    iter_count = 0
+    print('Synthesizing FOVs...')
+    targets = []
+    centroid_sets = []
     for center_vec in fov_util.fibonacci_sphere_lattice(num_fovs):
-        iter_count += 1
-
         ra, dec = _ra_dec_from_vector(center_vec)
         if ra < 0:
             ra += 2 * np.pi
@@ -111,9 +116,24 @@ def benchmark_synthetic_fovs(width, height, fov_deg, num_fovs,
             centroids.append((y, x))
             if len(centroids) >= num_centroids:
                 break  # Keep only num_centroids brightest centroids.
+        targets.append((ra, dec))
+        centroid_sets.append(centroids)
 
-        solution = t3.solve_from_centroids(centroids, size=(height, width), distortion=0,
-                                           fov_estimate=fov_deg, fov_max_error=fov_deg/10.0)
+    print('Start solving...')
+    statistics_file = None if statistics_path is None else open(statistics_path, 'w')
+    phase_times = dict.fromkeys(tetra3.SOLVE_PHASES, 0.0)
+    solutions = t3.solve_many(centroid_sets, (height, width), processes=processes, distortion=0,
+                              fov_estimate=fov_deg, fov_max_error=fov_deg/10.0,
+                              return_statistics=statistics_file is not None)
+    for (index, solution) in solutions:
+        (ra, dec) = targets[index]
+        if statistics_file is not None:
+            statistics = solution.pop('statistics')
+            statistics_file.write(json.dumps(dict(fov=index, status=solution['status'],
+                                                  **statistics)) + '\n')
+            for (phase, time_ms) in statistics['phase_times'].items():
+                phase_times[phase] += time_ms
+        iter_count = index + 1
         # Print progress 10 times.
         if iter_count % (num_fovs / 5) == 0:
             print(f'iter {iter_count}; solution for ra/dec {np.rad2deg(ra):.4f}/{np.rad2deg(dec):.4f}: {solution}')
@@ -146,10 +166,14 @@ def benchmark_synthetic_fovs(width, height, fov_deg, num_fovs,
             histo_bin = len(solve_time_histo) - 1
         solve_time_histo[histo_bin] += 1
 
-    return {'num_successes': num_successes,
-            'num_failures': num_failures,
-            'mean_solve_time_ms': total_solve_time_ms / num_successes,
-            'max_solve_time_ms': max_solve_time_ms,
-            'solve_time_histo': solve_time_histo,
-            'histo_bin_width_ms': bin_width
-            }
+    result = {'num_successes': num_successes,
+              'num_failures': num_failures,
+              'mean_solve_time_ms': total_solve_time_ms / num_successes,
+              'max_solve_time_ms': max_solve_time_ms,
+              'solve_time_histo': solve_time_histo,
+              'histo_bin_width_ms': bin_width
+              }
+    if statistics_file is not None:
+        statistics_file.close()
+        result['phase_times'] = phase_times
+    return result
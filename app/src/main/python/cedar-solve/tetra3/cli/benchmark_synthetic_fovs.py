@@ -41,12 +41,16 @@ def main():
                         help="Maximum number of centroids to pass to solver.")
     parser.add_argument("--database", type=Path, default='default_database',
                         help="Pattern database to load.")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Worker processes to solve with (0: one per CPU).")
+    parser.add_argument("--statistics", type=Path, default=None,
+                        help="Write per-solve statistics and phase times to this JSON lines file.")
 
     args = parser.parse_args()
 
     result = benchmark_synthetic_fovs.benchmark_synthetic_fovs(
         args.width, args.height, args.fov_deg, args.num_fovs, args.num_centroids,
-        database=args.database)
+        database=args.database, processes=args.processes, statistics_path=args.statistics)
 
     num_failures = result['num_failures']
     num_successes = result['num_successes']
@@ -59,6 +63,10 @@ def main():
         f'max_solve_time_ms: {max_solve_time_ms}'
     )
     _print_histo_bin(result['solve_time_histo'], result['histo_bin_width_ms'])
+    if 'phase_times' in result:
+        total_ms = sum(result['phase_times'].values())
+        for (phase, time_ms) in result['phase_times'].items():
+            print(f'{phase}: {time_ms:.1f}ms ({100 * time_ms / max(total_ms, 1e-9):.1f}%)')
 
 
 if __name__ == "__main__":
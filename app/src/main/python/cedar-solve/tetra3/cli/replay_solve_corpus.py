@@ -0,0 +1,68 @@
+"""
+Replay a corpus of recorded solves (see tetra3.solve_corpus) against a database and
+this solver build, and report solve rate, latency and changed solutions.
+
+Example:
+    python replay_solve_corpus.py field_solves.t3c --database default_database --solve_timeout inf
+"""
+import argparse
+import json
+
+from tetra3 import solve_corpus
+from pathlib import Path
+
+def _format_latency(latency_ms):
+    if latency_ms['max'] is None:
+        return '-'
+    return ' '.join(f'{key}: {value:.1f}ms' for (key, value) in latency_ms.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded solves with Cedar-solve")
+
+    # required arguments
+    parser.add_argument("corpus", type=Path,
+                        help="Solve corpus file written by tetra3.SolveRecorder.")
+
+    # optional flags
+    parser.add_argument("--database", type=Path, default='default_database',
+                        help="Pattern database to load.")
+    parser.add_argument("--solve_timeout", type=float, default=None,
+                        help="Timeout (ms) for every solve instead of the recorded ones; "
+                             "'inf' for a deterministic replay.")
+    parser.add_argument("--tolerance_arcsec", type=float, default=10.0,
+                        help="Pointing change to report a solution as changed.")
+    parser.add_argument("--json", action="store_true",
+                        help="Print the full result as JSON.")
+
+    args = parser.parse_args()
+
+    result = solve_corpus.replay_solve_corpus(
+        args.corpus, database=args.database, solve_timeout=args.solve_timeout,
+        tolerance_arcsec=args.tolerance_arcsec)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"Results - num_records: {result['num_records']} "
+          f"(other database: {result['num_other_database']}) "
+          f"solve_rate: {result['solve_rate']:.3f} "
+          f"(recorded {result['recorded_solve_rate']:.3f})")
+    print(f"latency: {_format_latency(result['latency_ms'])}")
+    print(f"recorded latency: {_format_latency(result['recorded_latency_ms'])}")
+    for (change, count) in result['status_changes'].items():
+        print(f'status {change}: {count}')
+    print(f"max_separation_arcsec: {result['max_separation_arcsec']:.2f}")
+    for entry in result['changed']:
+        recorded = entry['recorded']
+        replayed = entry['replayed']
+        separation = entry['separation_arcsec']
+        print(f"#{entry['index']} {entry['time']}: status {recorded['status']} -> "
+              f"{replayed['status']}, RA/Dec {recorded['RA']}/{recorded['Dec']} -> "
+              f"{replayed['RA']}/{replayed['Dec']}"
+              + ('' if separation is None else f' ({separation:.1f} arcsec)'))
+
+
+if __name__ == "__main__":
+    main()
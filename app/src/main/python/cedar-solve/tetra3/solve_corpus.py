@@ -0,0 +1,198 @@
+"""
+Recording and replay of real-world solves.
+
+A :class:`SolveRecorder` passed to :meth:`Tetra3.solve_from_centroids` (`recorder=`)
+appends the exact inputs of every solve (centroids, image size, solve parameters and
+the database fingerprint) and the solution obtained to a compact binary corpus file.
+:func:`replay_solve_corpus` re-runs a corpus against any database or solver build and
+reports solve rate, latency percentiles and the solutions that changed; see
+tetra3/cli/replay_solve_corpus.py for the command line version.
+
+Corpus format (little endian): the magic bytes b'T3SOLVE1', then one record per solve:
+uint32 header length, uint32 centroid count, the header as UTF-8 JSON and the (y, x)
+centroids as float64 pairs. The header holds 'size', 'params' (keyword arguments of
+solve_from_centroids), 'database' (Tetra3.database_fingerprint), 'time' (UTC, ISO 8601)
+and 'solution' (the SOLUTION_FIELDS of the recorded result).
+"""
+
+from collections import Counter, namedtuple
+from datetime import datetime, timezone
+import json
+import math
+import struct
+import threading
+
+import numpy as np
+
+from tetra3.tetra3 import Tetra3, MATCH_FOUND
+
+CORPUS_MAGIC = b'T3SOLVE1'
+_RECORD_PREFIX = struct.Struct('<II')
+
+# Result fields kept with each record, to compare replayed solutions against.
+SOLUTION_FIELDS = ('status', 'RA', 'Dec', 'Roll', 'FOV', 'Matches', 'T_solve')
+
+# One recorded solve, as read back by read_solve_corpus().
+SolveRecord = namedtuple('SolveRecord', ['centroids', 'size', 'params', 'database', 'time',
+                                         'solution'])
+
+
+def _json_default(value):
+    """Converts numpy values in solve parameters for JSON."""
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    raise TypeError('Cannot record %r' % (value,))
+
+
+class SolveRecorder():
+    """Appends solves to the corpus file at `path`, creating it if needed.
+
+    Records are written whole and flushed one at a time, so concurrent solves may share a
+    recorder and a crash loses at most the solve being recorded.
+
+    Example:
+        ::
+
+            recorder = SolveRecorder('field_solves.t3c')
+            solution = t3.solve_from_centroids(centroids, size, recorder=recorder)
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(CORPUS_MAGIC)
+            self._file.flush()
+
+    def record(self, star_centroids, size, params, database, solution):
+        """Appends one solve: its inputs, the database fingerprint and its `solution`."""
+        centroids = np.asarray(star_centroids, dtype='<f8').reshape(-1, 2)
+        header = json.dumps({'size': [int(dim) for dim in size[:2]],
+                             'params': params,
+                             'database': database,
+                             'time': datetime.now(timezone.utc).isoformat(),
+                             'solution': {key: solution.get(key) for key in SOLUTION_FIELDS}},
+                            default=_json_default).encode()
+        data = _RECORD_PREFIX.pack(len(header), len(centroids)) + header + centroids.tobytes()
+        with self._lock:
+            self._file.write(data)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def read_solve_corpus(path):
+    """Yields the :data:`SolveRecord` entries of the corpus file at `path`, in recording
+    order. A record cut short at the end of the file (interrupted write) is ignored."""
+    with open(path, 'rb') as f:
+        if f.read(len(CORPUS_MAGIC)) != CORPUS_MAGIC:
+            raise ValueError('%s is not a solve corpus' % path)
+        while True:
+            prefix = f.read(_RECORD_PREFIX.size)
+            if len(prefix) < _RECORD_PREFIX.size:
+                return
+            (header_length, num_centroids) = _RECORD_PREFIX.unpack(prefix)
+            header = f.read(header_length)
+            data = f.read(num_centroids * 16)
+            if len(header) < header_length or len(data) < num_centroids * 16:
+                return
+            header = json.loads(header)
+            yield SolveRecord(centroids=np.frombuffer(data, dtype='<f8').reshape(-1, 2),
+                              size=tuple(header['size']), params=header['params'],
+                              database=header['database'], time=header['time'],
+                              solution=header['solution'])
+
+
+def _separation_arcsec(ra1, dec1, ra2, dec2):
+    """Angle between two (RA, Dec) pointings in degrees, in arcseconds."""
+    (ra1, dec1, ra2, dec2) = np.deg2rad([ra1, dec1, ra2, dec2])
+    cos_angle = (np.sin(dec1) * np.sin(dec2)
+                 + np.cos(dec1) * np.cos(dec2) * np.cos(ra1 - ra2))
+    return float(np.rad2deg(np.arccos(np.clip(cos_angle, -1, 1))) * 3600)
+
+
+def _latency_percentiles(times_ms):
+    """p50/p90/p99/max of solve times in ms, None entries if there are none."""
+    if not times_ms:
+        return {'p50': None, 'p90': None, 'p99': None, 'max': None}
+    (p50, p90, p99) = np.percentile(times_ms, [50, 90, 99])
+    return {'p50': float(p50), 'p90': float(p90), 'p99': float(p99),
+            'max': float(max(times_ms))}
+
+
+def replay_solve_corpus(path, database='default_database', solve_timeout=None,
+                        tolerance_arcsec=10.0):
+    """Re-runs every solve of a corpus and compares the results with the recorded ones.
+
+    Args:
+        path: Corpus file written by :class:`SolveRecorder`.
+        database: Database to load (name or path, as :meth:`Tetra3.load_database`), or a
+            :class:`Tetra3` instance to replay with.
+        solve_timeout (float, optional): Timeout in ms for every replayed solve instead of
+            the recorded ones. Recorded timeouts make results depend on machine speed;
+            `math.inf` gives a deterministic replay. None (the default) keeps them.
+        tolerance_arcsec (float, optional): Pointing change beyond which a solution that
+            is found both times counts as changed.
+
+    Returns:
+        dict with the following fields:
+        num_records
+        num_other_database: records made with a database other than the replayed one
+        recorded_solve_rate, solve_rate: fraction of records with status MATCH_FOUND
+        recorded_latency_ms, latency_ms: p50/p90/p99/max of T_solve over all records
+        status_changes: {'<recorded status>-><replayed status>': count} where they differ
+        max_separation_arcsec: largest pointing change of records solved both times
+        changed: list of dicts (index, time, recorded, replayed, separation_arcsec) for
+            records whose status changed or whose pointing moved beyond tolerance_arcsec
+    """
+    t3 = database if isinstance(database, Tetra3) else Tetra3(load_database=database)
+    fingerprint = t3.database_fingerprint
+
+    num_records = 0
+    num_other_database = 0
+    recorded_solved = 0
+    solved = 0
+    recorded_times = []
+    times = []
+    status_changes = Counter()
+    max_separation = 0.0
+    changed = []
+    for (index, record) in enumerate(read_solve_corpus(path)):
+        params = dict(record.params)
+        if solve_timeout is not None:
+            params['solve_timeout'] = solve_timeout
+        solution = t3.solve_from_centroids(record.centroids, record.size, **params)
+        recorded = record.solution
+
+        num_records += 1
+        num_other_database += record.database != fingerprint
+        recorded_solved += recorded['status'] == MATCH_FOUND
+        solved += solution['status'] == MATCH_FOUND
+        recorded_times.append(recorded['T_solve'])
+        times.append(solution['T_solve'])
+
+        separation = None
+        if recorded['status'] == solution['status'] == MATCH_FOUND:
+            separation = _separation_arcsec(recorded['RA'], recorded['Dec'],
+                                            solution['RA'], solution['Dec'])
+            max_separation = max(max_separation, separation)
+        if recorded['status'] != solution['status']:
+            status_changes['%d->%d' % (recorded['status'], solution['status'])] += 1
+        if recorded['status'] != solution['status'] or \
+                (separation is not None and separation > tolerance_arcsec):
+            changed.append({'index': index, 'time': record.time, 'recorded': recorded,
+                            'replayed': {key: solution.get(key) for key in SOLUTION_FIELDS},
+                            'separation_arcsec': separation})
+
+    return {'num_records': num_records,
+            'num_other_database': num_other_database,
+            'recorded_solve_rate': recorded_solved / num_records if num_records else math.nan,
+            'solve_rate': solved / num_records if num_records else math.nan,
+            'recorded_latency_ms': _latency_percentiles(recorded_times),
+            'latency_ms': _latency_percentiles(times),
+            'status_changes': dict(status_changes),
+            'max_separation_arcsec': max_separation,
+            'changed': changed
+            }
@@ -110,14 +110,21 @@ Original Tetra license notice:
 
 # Standard imports:
 from pathlib import Path
+import asyncio
 import csv
+import hashlib
+import inspect
 import logging
 import math
 import itertools
+import json
+import multiprocessing
+import os
+import threading
 from time import perf_counter as precision_timestamp
 from datetime import datetime
 from numbers import Number
-from collections import OrderedDict
+from collections import OrderedDict, namedtuple
 
 # External imports:
 import numpy as np
@@ -142,6 +149,15 @@ TIMEOUT = 3
 CANCELLED = 4
 TOO_FEW = 5
 
+# Phases of solve_from_centroids() timed with return_statistics=True (see SolveContext):
+# cluster_busting: pattern star thinning and conversion of the centroids to vectors;
+# key_enumeration: edge ratios of an image pattern and the pattern keys to look up;
+# hash_probing: pattern table lookups of a key; candidate_filtering: edge ratio test of
+# the catalog patterns found; verification: rotation and star matching of a candidate;
+# refinement: final attitude, FOV/distortion and result of an accepted match.
+SOLVE_PHASES = ('cluster_busting', 'key_enumeration', 'hash_probing', 'candidate_filtering',
+                'verification', 'refinement')
+
 _MAGIC_RAND = np.uint64(2654435761)
 _supported_databases = ('bsc5', 'hip_main', 'tyc_main')
 _lib_root = Path(__file__).parent
@@ -347,6 +363,167 @@ def _distance_from_angle(angle):
     return 2.0 * np.sin(angle / 2.0)
 
 
+def _candidate_summary(rotation_matrix, fov, num_star_matches, prob):
+    """Pointing of a (rejected) candidate rotation matrix, for SolveContext.best_candidate."""
+    ra = np.rad2deg(np.arctan2(rotation_matrix[0, 1], rotation_matrix[0, 0])) % 360
+    dec = np.rad2deg(np.arctan2(rotation_matrix[0, 2], norm(rotation_matrix[1:3, 2])))
+    roll = np.rad2deg(np.arctan2(rotation_matrix[1, 2], rotation_matrix[2, 2])) % 360
+    return {'RA': float(ra), 'Dec': float(dec), 'Roll': float(roll),
+            'FOV': float(np.rad2deg(fov)), 'Matches': int(num_star_matches),
+            'Prob': float(prob)}
+
+def _no_lap(phase):
+    """Stands in for SolveContext.lap when phases are not timed."""
+
+def _init_solve_many_worker(job):
+    """Pool initializer of :meth:`Tetra3.solve_many`: keeps the job in the worker process."""
+    global _solve_many_job
+    _solve_many_job = job
+
+def _solve_many_worker(indexed_centroids):
+    """Solves one (index, centroids) entry of :meth:`Tetra3.solve_many` in a worker process."""
+    (index, centroids) = indexed_centroids
+    (t3, setup, solve_timeout, return_flags) = _solve_many_job
+    context = SolveContext()
+    context.start(solve_timeout)
+    return (index, t3._solve_from_centroids(context, centroids, setup, *return_flags))
+
+# (Tetra3 instance, setup, solve_timeout, return flags) of the solve_many() pool this worker
+# process belongs to, set by _init_solve_many_worker. Forked workers receive it, and with
+# it the loaded database, without a copy; it is never set in the calling process.
+_solve_many_job = None
+
+# Arguments of solve_from_centroids() kept with each solve by a SolveRecorder.
+_RECORDED_SOLVE_ARGS = ('fov_estimate', 'fov_max_error', 'match_radius', 'match_threshold',
+                        'solve_timeout', 'target_pixel', 'target_sky_coord', 'distortion',
+                        'match_max_error')
+
+# Solve arguments normalized once per solve_from_centroids() or solve_many() call.
+_SolveSetup = namedtuple('_SolveSetup', [
+    'height', 'width', 'fov_estimate', 'fov_initial', 'fov_max_error', 'match_radius',
+    'match_threshold', 'target_pixel', 'target_sky_coord', 'distortion',
+    'verification_stars_per_fov', 'p_size', 'p_bins', 'p_max_err', 'presorted', 'linear_probe',
+    'upper_tri_index', 'pattern_stars_separation_pixels'])
+
+
+class SolveContext():
+    """Per-call state of one :meth:`Tetra3.solve_from_centroids`: deadline, cancellation
+    token and search statistics.
+
+    A :class:`Tetra3` instance only holds the loaded database, which solves read but never
+    modify, so several solves may run concurrently against one instance (e.g. from a
+    thread pool), each with its own context. Pass a context to a solve to cancel that
+    solve alone from another thread with :meth:`cancel`, or to read its statistics
+    afterwards; a context is created internally when none is given. A context is used
+    for one solve call, and its continuations with :meth:`Tetra3.resume_solve`.
+
+    While searching, the context keeps the most likely candidate that was rejected
+    (:attr:`best_candidate`); a solve that ends with TIMEOUT or CANCELLED records where
+    it stopped (:attr:`position`), so it can be resumed. With `return_statistics=True`
+    the solve also times its phases (:data:`SOLVE_PHASES`) in :attr:`phase_times`.
+
+    Example:
+        ::
+
+            context = tetra3.SolveContext()
+            future = executor.submit(t3.solve_from_centroids, centroids, size,
+                                     context=context)
+            ...
+            context.cancel()  # Only this solve returns with status CANCELLED
+    """
+    def __init__(self):
+        self.t0 = None
+        self.deadline = None
+        self.t_solve = None
+        self.image_patterns_evaluated = 0
+        self.search_space_explored = 0
+        self.catalog_lookup_count = 0
+        self.catalog_eval_count = 0
+        self.best_candidate = None
+        self.position = None
+        self.resume_args = None
+        self.phase_times = None
+        self._lap_t = None
+        self._cancel_event = threading.Event()
+
+    def start(self, solve_timeout=None):
+        """Starts the solve clock; `solve_timeout` in milliseconds, None for no deadline."""
+        self.t0 = precision_timestamp()
+        self._lap_t = self.t0
+        self.deadline = None if solve_timeout is None else self.t0 + float(solve_timeout) / 1000
+
+    def cancel(self):
+        """Signal the solve using this context to terminate with status CANCELLED."""
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self):
+        """bool: True once :meth:`cancel` was called."""
+        return self._cancel_event.is_set()
+
+    @property
+    def timed_out(self):
+        """bool: True once the deadline has passed."""
+        return self.deadline is not None and precision_timestamp() > self.deadline
+
+    @property
+    def resumable(self):
+        """bool: True if the solve stopped early and :meth:`Tetra3.resume_solve` can continue
+        it."""
+        return self.position is not None
+
+    def stop_status(self):
+        """TIMEOUT or CANCELLED if the solve must stop now, else None."""
+        if self.timed_out:
+            return TIMEOUT
+        if self._cancel_event.is_set():
+            return CANCELLED
+        return None
+
+    def offer_candidate(self, prob, make_candidate):
+        """Keeps the rejected candidate with mismatch probability `prob` if it is the best
+        so far; `make_candidate` builds its dict only then."""
+        if self.best_candidate is None or prob < self.best_candidate['Prob']:
+            self.best_candidate = make_candidate()
+
+    def lap(self, phase):
+        """Adds the time (ms) since the previous lap, or since :meth:`start`, to `phase`."""
+        now = precision_timestamp()
+        self.phase_times[phase] += (now - self._lap_t) * 1000
+        self._lap_t = now
+
+    def elapsed(self):
+        """Seconds since :meth:`start`."""
+        return precision_timestamp() - self.t0
+
+    def finish(self, image_patterns_evaluated, search_space_explored, catalog_lookup_count,
+               catalog_eval_count):
+        """Records the search statistics and solve time (ms) at the end of the solve."""
+        self.t_solve = self.elapsed() * 1000
+        self.image_patterns_evaluated = image_patterns_evaluated
+        self.search_space_explored = search_space_explored
+        self.catalog_lookup_count = catalog_lookup_count
+        self.catalog_eval_count = catalog_eval_count
+
+    @property
+    def statistics(self):
+        """dict: Search statistics of the finished solve, with 'phase_times' (ms per
+        :data:`SOLVE_PHASES` entry) if the phases were timed."""
+        statistics = {'image_patterns_evaluated': self.image_patterns_evaluated,
+                      'search_space_explored': self.search_space_explored,
+                      'catalog_lookup_count': self.catalog_lookup_count,
+                      'catalog_eval_count': self.catalog_eval_count,
+                      'T_solve': self.t_solve}
+        if self.phase_times is not None:
+            statistics['phase_times'] = dict(self.phase_times)
+        return statistics
+
+    def write_statistics(self, file, **fields):
+        """Appends :attr:`statistics` and the extra `fields` (e.g. an image name and the
+        solve status) as one JSON line to the text `file`."""
+        file.write(json.dumps(dict(fields, **self.statistics)) + '\n')
+
+
 class Tetra3():
     """Solve star patterns and manage databases.
 
@@ -433,7 +610,10 @@ class Tetra3():
         self._pattern_largest_edge = None
         self._pattern_key_hashes = None
         self._verification_catalog = None
-        self._cancelled = False
+        # Contexts of the solves currently running, for cancel_solve().
+        self._active_solves = set()
+        self._active_solves_lock = threading.Lock()
+        self._cancel_next_solve = False
 
         self._db_props = {'pattern_mode': None, 'hash_table_type': None,
                           'pattern_size': None, 'pattern_bins': None, 'pattern_max_error': None,
@@ -561,6 +741,16 @@ class Tetra3():
         """
         return self._db_props
 
+    @property
+    def database_fingerprint(self):
+        """str: Short identity of the loaded database (a hash of its properties and table
+        sizes), e.g. to tell which database a recorded solve or a cached result came from."""
+        props = {key: str(value) for (key, value) in self._db_props.items()}
+        shapes = [getattr(table, 'shape', None)
+                  for table in (self._star_table, self._pattern_catalog)]
+        return hashlib.sha256(
+            json.dumps([props, str(shapes)], sort_keys=True).encode()).hexdigest()[:16]
+
     def load_database(self, path='default_database'):
         """Load database from file.
 
@@ -1445,7 +1635,7 @@ class Tetra3():
                          match_radius=.01, match_threshold=1e-5,
                          solve_timeout=5000, target_pixel=None, target_sky_coord=None, distortion=0,
                          return_matches=False, return_visual=False, match_max_error=.002,
-                         pattern_checking_stars=None, **kwargs):
+                         pattern_checking_stars=None, context=None, **kwargs):
         """Solve for the sky location of an image.
 
         Star locations (centroids) are found using :meth:`tetra3.get_centroids_from_image` and
@@ -1489,6 +1679,8 @@ class Tetra3():
             match_max_error (float, optional): Maximum difference allowed in pattern for a match.
                 If None, uses the 'pattern_max_error' value from the database.
             pattern_checking_stars: No longer meaningful, ignored.
+            context (SolveContext, optional): Per-call solve state; see
+                :meth:`solve_from_centroids`.
             **kwargs (optional): Other keyword arguments passed to
                 :meth:`tetra3.get_centroids_from_image`.
 
@@ -1571,7 +1763,7 @@ class Tetra3():
             solve_timeout=solve_timeout, target_pixel=target_pixel,
             target_sky_coord=target_sky_coord, distortion=distortion,
             return_matches=return_matches, return_visual=return_visual,
-            match_max_error=match_max_error)
+            match_max_error=match_max_error, context=context)
         # Add extraction time to results and return
         solution['T_extract'] = t_extract
         if isinstance(centr_data, tuple):
@@ -1584,7 +1776,9 @@ class Tetra3():
                              solve_timeout=5000, target_pixel=None, target_sky_coord=None, distortion=0,
                              return_matches=False, return_catalog=False,
                              return_visual=False, return_rotation_matrix=False,
-                             match_max_error=.002, pattern_checking_stars=None):
+                             match_max_error=.002, pattern_checking_stars=None, context=None,
+                             return_best_candidate=False, return_statistics=False,
+                             recorder=None):
         """Solve for the sky location using a list of centroids.
 
         Use :meth:`tetra3.get_centroids_from_image` or your own centroiding algorithm to
@@ -1642,6 +1836,21 @@ class Tetra3():
             match_max_error (float, optional): Maximum difference allowed in pattern for a match.
                 If None, uses the 'pattern_max_error' value from the database.
             pattern_checking_stars: No longer meaningful, ignored.
+            context (SolveContext, optional): Deadline, cancellation token and statistics for
+                this call. Give each concurrent solve its own context to cancel it
+                individually (:meth:`SolveContext.cancel`) and to read its
+                :attr:`SolveContext.statistics` afterwards. Created internally if None.
+                A solve that ends with TIMEOUT or CANCELLED can be continued from where it
+                stopped with :meth:`resume_solve` and its context.
+            return_best_candidate (bool, optional): If True and no match is accepted, the
+                result includes 'best_candidate': the rejected candidate with the lowest
+                mismatch probability (see :meth:`resume_solve`), or None.
+            return_statistics (bool, optional): If True, the result includes 'statistics':
+                the search counters and the time spent in each of :data:`SOLVE_PHASES`
+                (see :attr:`SolveContext.statistics`). Phases are only timed if True.
+            recorder (tetra3.solve_corpus.SolveRecorder, optional): If given, the inputs of
+                this solve and its result are appended to the recorder's corpus, to be
+                replayed with :func:`tetra3.solve_corpus.replay_solve_corpus`.
 
         Returns:
             dict: A dictionary with the following keys is returned:
@@ -1691,6 +1900,8 @@ class Tetra3():
                   red for successful/unsuccessful match. Not included if return_visual=False.
                 - 'rotation_matrix' 3x3 rotation matrix. Not included if
                   return_rotation_matrix=False.
+                - 'statistics': Search counters and per-phase times in milliseconds. Not
+                  included if return_statistics=False.
                 - 'status': One of:
                   MATCH_FOUND: solution was obtained
                   NO_MATCH: no match was found after exhausting all possibilities
@@ -1699,16 +1910,177 @@ class Tetra3():
                   TOO_FEW: the 'image' has too few detected stars to attempt a pattern match
 
                 If unsuccessful in finding a match, None is returned for all keys of the
-                dictionary except 'T_solve' and 'status', and the optional return keys are missing.
+                dictionary except 'T_solve' and 'status', and the optional return keys except
+                'best_candidate' and 'statistics' are missing.
 
         """
         assert self.has_database, 'No database loaded'
-        t0_solve = precision_timestamp()
         self._logger.debug('Got solve from centroids with input: '
                            + str((len(star_centroids), size, fov_estimate, fov_max_error,
                                   match_radius, match_threshold,
                                   solve_timeout, target_pixel, target_sky_coord, distortion,
                                   return_matches, return_catalog, return_visual, match_max_error)))
+        setup = self._solve_setup(size, fov_estimate, fov_max_error, match_radius,
+                                  match_threshold, target_pixel, target_sky_coord, distortion,
+                                  match_max_error)
+        solution = self._run_solve(star_centroids, setup, solve_timeout, context,
+                                   (bool(return_matches), bool(return_catalog), return_visual,
+                                    return_rotation_matrix, return_best_candidate,
+                                    bool(return_statistics)))
+        if recorder is not None:
+            recorder.record(star_centroids, size,
+                            {'fov_estimate': fov_estimate, 'fov_max_error': fov_max_error,
+                             'match_radius': match_radius, 'match_threshold': match_threshold,
+                             'solve_timeout': solve_timeout, 'target_pixel': target_pixel,
+                             'target_sky_coord': target_sky_coord, 'distortion': distortion,
+                             'match_max_error': match_max_error},
+                            self.database_fingerprint, solution)
+        return solution
+
+    def resume_solve(self, context, solve_timeout=5000):
+        """Continue a solve that ended with status TIMEOUT or CANCELLED.
+
+        An anytime solve runs :meth:`solve_from_centroids` with a short `solve_timeout`
+        and `return_best_candidate=True`, shows the best candidate as a tentative solution,
+        and only if needed calls this method (e.g. in the background) to continue the search
+        from the exact image pattern, pattern key and catalog candidate where it stopped.
+        The search is checked against the deadline for every candidate, so it stops promptly.
+
+        Args:
+            context (SolveContext): Context of the interrupted solve.
+            solve_timeout (float, optional): Timeout in milliseconds for this continuation.
+
+        Returns:
+            dict: As :meth:`solve_from_centroids` with the arguments of the original call.
+            The search counters in :attr:`SolveContext.statistics` and the best candidate
+            accumulate over the continuations; 'T_solve' is the time of this one.
+        """
+        assert context.resumable, 'Solve did not stop early, nothing to resume'
+        (star_centroids, setup, return_flags) = context.resume_args
+        context._cancel_event.clear()
+        return self._run_solve(star_centroids, setup, solve_timeout, context, return_flags)
+
+    def _run_solve(self, star_centroids, setup, solve_timeout, context, return_flags):
+        """Runs one solve with its context registered for :meth:`cancel_solve`."""
+        if context is None:
+            context = SolveContext()
+        context.resume_args = (star_centroids, setup, return_flags)
+        context.start(solve_timeout)
+        with self._active_solves_lock:
+            self._active_solves.add(context)
+            if self._cancel_next_solve:
+                self._cancel_next_solve = False
+                context.cancel()
+        try:
+            return self._solve_from_centroids(context, star_centroids, setup, *return_flags)
+        finally:
+            with self._active_solves_lock:
+                self._active_solves.discard(context)
+
+    async def solve_from_centroids_async(self, star_centroids, size, executor=None, **kwargs):
+        """Coroutine form of :meth:`solve_from_centroids`, for use from an asyncio event loop.
+
+        The solve runs in `executor` (a concurrent.futures executor; the loop's default
+        executor if None), so the loop stays responsive and several solves can overlap with
+        other work. Cancelling the awaiting task cancels the solve through its
+        :class:`SolveContext`. Keyword arguments are those of :meth:`solve_from_centroids`.
+        """
+        context = kwargs.pop('context', None)
+        if context is None:
+            context = SolveContext()
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                executor, lambda: self.solve_from_centroids(star_centroids, size, context=context,
+                                                            **kwargs))
+        except asyncio.CancelledError:
+            context.cancel()
+            raise
+
+    def solve_many(self, centroid_sets, size, processes=None, chunksize=1, **kwargs):
+        """Solve many centroid lists from one camera, e.g. to reprocess an image archive.
+
+        Equivalent to :meth:`solve_from_centroids` on each entry of `centroid_sets` with the
+        same `size` and keyword arguments, but the arguments are normalized once for all
+        solves. With several `processes` the solves are spread over worker processes forked
+        from this one, which share the loaded database copy-on-write instead of loading or
+        receiving their own copy; results then arrive in completion order. Worker processes
+        need the 'fork' start method (Linux); elsewhere all solves run in this process.
+
+        Example:
+            ::
+
+                for (index, solution) in t3.solve_many(centroid_lists, (height, width),
+                                                       processes=0, fov_estimate=12):
+                    print(index, solution['RA'], solution['Dec'])
+
+        Args:
+            centroid_sets (iterable): Centroid lists, each as `star_centroids` of
+                :meth:`solve_from_centroids`.
+            size (tuple): (height, width) of the images.
+            processes (int, optional): Number of worker processes. None or 1 (the default)
+                solves in this process; 0 uses one per CPU.
+            chunksize (int, optional): Number of centroid lists handed to a worker at a time.
+            **kwargs: Other arguments of :meth:`solve_from_centroids`, except `context`
+                (every solve gets its own :class:`SolveContext`). A `recorder` records
+                each solve from this process as its result arrives.
+
+        Yields:
+            tuple: (index, solution) for every centroid list, index being its position in
+            `centroid_sets`.
+
+        Raises:
+            TypeError: If `context` or an argument :meth:`solve_from_centroids` does not
+                take is given.
+        """
+        assert self.has_database, 'No database loaded'
+        if 'context' in kwargs:
+            raise TypeError("solve_many() does not take 'context'; every solve has its own")
+        arguments = inspect.signature(self.solve_from_centroids).bind(None, size, **kwargs)
+        arguments.apply_defaults()
+        args = arguments.arguments
+        setup = self._solve_setup(size, args['fov_estimate'], args['fov_max_error'],
+                                  args['match_radius'], args['match_threshold'],
+                                  args['target_pixel'], args['target_sky_coord'],
+                                  args['distortion'], args['match_max_error'])
+        return_flags = (bool(args['return_matches']), bool(args['return_catalog']),
+                        args['return_visual'], args['return_rotation_matrix'],
+                        args['return_best_candidate'], bool(args['return_statistics']))
+        recorder = args['recorder']
+        params = {name: args[name] for name in _RECORDED_SOLVE_ARGS}
+        if processes == 0:
+            processes = os.cpu_count()
+        if processes is None or processes <= 1 \
+                or 'fork' not in multiprocessing.get_all_start_methods():
+            for (index, centroids) in enumerate(centroid_sets):
+                solution = self._run_solve(centroids, setup, args['solve_timeout'], None,
+                                           return_flags)
+                if recorder is not None:
+                    recorder.record(centroids, size, params, self.database_fingerprint, solution)
+                yield (index, solution)
+            return
+
+        # Centroids of the solves in flight, for the recorder.
+        pending = {}
+        def entries():
+            for (index, centroids) in enumerate(centroid_sets):
+                if recorder is not None:
+                    pending[index] = centroids
+                yield (index, centroids)
+
+        job = (self, setup, args['solve_timeout'], return_flags)
+        with multiprocessing.get_context('fork').Pool(processes, initializer=_init_solve_many_worker,
+                                                      initargs=(job,)) as pool:
+            for (index, solution) in pool.imap_unordered(_solve_many_worker, entries(), chunksize):
+                if recorder is not None:
+                    recorder.record(pending.pop(index), size, params, self.database_fingerprint,
+                                    solution)
+                yield (index, solution)
+
+    def _solve_setup(self, size, fov_estimate, fov_max_error, match_radius, match_threshold,
+                     target_pixel, target_sky_coord, distortion, match_max_error):
+        """Normalizes the solve arguments that do not depend on the centroids into a
+        :class:`_SolveSetup`, shared by all solves of :meth:`solve_many`."""
         if fov_estimate is None:
             # If no FOV given at all, guess middle of the range for a start
             fov_initial = np.deg2rad((self._db_props['max_fov'] + self._db_props['min_fov'])/2)
@@ -1721,9 +2093,6 @@ class Tetra3():
         match_threshold = float(match_threshold) / self.num_patterns
         self._logger.debug('Set threshold to: ' + str(match_threshold) + ', have '
                            + str(self.num_patterns) + ' patterns.')
-        if solve_timeout is not None:
-            # Convert to seconds to match timestamp
-            solve_timeout = float(solve_timeout) / 1000
         if target_pixel is not None:
             target_pixel = np.array(target_pixel)
             if target_pixel.ndim == 1:
@@ -1734,43 +2103,77 @@ class Tetra3():
             if target_sky_coord.ndim == 1:
                 # Make shape (2,) array to (1,2), to match (N,2) pattern
                 target_sky_coord = target_sky_coord[None, :]
-        return_matches = bool(return_matches)
-        return_catalog = bool(return_catalog)
 
         # extract height (y) and width (x) of image
         (height, width) = size[:2]
         # Extract relevant database properties
         verification_stars_per_fov = self._db_props['verification_stars_per_fov']
         p_size = self._db_props['pattern_size']
-        p_bins = self._db_props['pattern_bins']
         if match_max_error is None or match_max_error < self._db_props['pattern_max_error']:
             match_max_error = self._db_props['pattern_max_error']
-        p_max_err = match_max_error
-        presorted = self._db_props['presort_patterns']
-        linear_probe = self._db_props['hash_table_type'] == 'linear_probe'
 
-        # Indices to extract from dot product matrix (above diagonal)
-        upper_tri_index = np.triu_indices(p_size, 1)
+        if isinstance(distortion, (list, tuple)):
+            self._logger.warning('Tuple distortion %s no longer supported, ignoring' % distortion)
+            distortion = None
+        elif distortion is not None and not isinstance(distortion, Number):
+            self._logger.warning('Non-numeric distortion %s given, ignoring' % distortion)
+            distortion = None
+
+        # Separation of the "cluster buster" thinning strategy used in database construction.
+        pattern_stars_separation_pixels = width * separation_for_density(
+            fov_initial, verification_stars_per_fov) / fov_initial
+
+        return _SolveSetup(
+            height=height, width=width, fov_estimate=fov_estimate, fov_initial=fov_initial,
+            fov_max_error=fov_max_error, match_radius=match_radius,
+            match_threshold=match_threshold, target_pixel=target_pixel,
+            target_sky_coord=target_sky_coord, distortion=distortion,
+            verification_stars_per_fov=verification_stars_per_fov, p_size=p_size,
+            p_bins=self._db_props['pattern_bins'], p_max_err=match_max_error,
+            presorted=self._db_props['presort_patterns'],
+            linear_probe=self._db_props['hash_table_type'] == 'linear_probe',
+            # Indices to extract from dot product matrix (above diagonal)
+            upper_tri_index=np.triu_indices(p_size, 1),
+            pattern_stars_separation_pixels=pattern_stars_separation_pixels)
+
+    def _solve_from_centroids(self, context, star_centroids, setup, return_matches,
+                              return_catalog, return_visual, return_rotation_matrix,
+                              return_best_candidate, return_statistics):
+        """Implements :meth:`solve_from_centroids` with per-call state in `context` and the
+        normalized arguments in `setup`."""
+        (height, width, fov_estimate, fov_initial, fov_max_error, match_radius, match_threshold,
+         target_pixel, target_sky_coord, distortion, verification_stars_per_fov, p_size, p_bins,
+         p_max_err, presorted, linear_probe, upper_tri_index,
+         pattern_stars_separation_pixels) = setup
+
+        # Phase timing: laps go to context.phase_times (accumulated over resumed calls).
+        if return_statistics:
+            if context.position is None or context.phase_times is None:
+                context.phase_times = dict.fromkeys(SOLVE_PHASES, 0.0)
+            lap = context.lap
+        else:
+            lap = _no_lap
 
         num_centroids = len(star_centroids)
         image_centroids = np.asarray(star_centroids)
         if num_centroids < p_size:
-            return {'RA': None, 'Dec': None, 'Roll': None, 'FOV': None, 'distortion': None,
-                    'RMSE': None, 'P90E': None, 'MAXE': None, 'Matches': None, 'Prob': None,
-                    'epoch_equinox': None, 'epoch_proper_motion': None, 'T_solve': 0,
-                    'status': TOO_FEW}
+            context.finish(0, 0, 0, 0)
+            too_few = {'RA': None, 'Dec': None, 'Roll': None, 'FOV': None, 'distortion': None,
+                       'RMSE': None, 'P90E': None, 'MAXE': None, 'Matches': None, 'Prob': None,
+                       'epoch_equinox': None, 'epoch_proper_motion': None, 'T_solve': 0,
+                       'status': TOO_FEW}
+            if return_statistics:
+                too_few['statistics'] = context.statistics
+            return too_few
 
         # Apply the same "cluster buster" thinning strategy as is used in database
-        # construction.
-        pattern_stars_separation_pixels = width * separation_for_density(
-            fov_initial, verification_stars_per_fov) / fov_initial
+        # construction. All neighbourhoods are found in one KD tree query.
         keep_for_patterns = np.full(num_centroids, False)
         centroids_kd_tree = KDTree(image_centroids)
+        neighbourhoods = centroids_kd_tree.query_ball_point(
+            image_centroids, pattern_stars_separation_pixels)
         for ind in range(num_centroids):
-            centroid = image_centroids[ind, :]
-            within_separation = centroids_kd_tree.query_ball_point(
-                centroid, pattern_stars_separation_pixels)
-            occupied = np.any(keep_for_patterns[within_separation])
+            occupied = np.any(keep_for_patterns[neighbourhoods[ind]])
             # If there isn't a pattern star too close, add this to the pattern table.
             if not occupied:
                 keep_for_patterns[ind] = True
@@ -1785,13 +2188,6 @@ class Tetra3():
             self._logger.debug('Trimmed %d match centroids to %d' % (num_centroids, len(image_centroids)))
             num_centroids = len(image_centroids)
 
-        if isinstance(distortion, (list, tuple)):
-            self._logger.warning('Tuple distortion %s no longer supported, ignoring' % distortion)
-            distortion = None
-        elif distortion is not None and not isinstance(distortion, Number):
-            self._logger.warning('Non-numeric distortion %s given, ignoring' % distortion)
-            distortion = None
-
         if distortion is None:
             image_centroids_undist = image_centroids
         else:
@@ -1803,29 +2199,42 @@ class Tetra3():
         # Compute star vectors using an estimate for the field-of-view in the x dimension
         image_centroids_vectors = _compute_vectors(
             image_centroids_undist, (height, width), fov_initial)
-
-        catalog_lookup_count = 0
-        catalog_eval_count = 0
-        image_patterns_evaluated = 0
-        search_space_explored = 0
+        lap('cluster_busting')
+
+        # Where to start: the (image pattern, pattern key, catalog candidate) position at
+        # which an interrupted solve stopped when resuming it, else the beginning.
+        if context.position is None:
+            (start_pattern, start_key, start_candidate) = (0, 0, 0)
+            catalog_lookup_count = 0
+            catalog_eval_count = 0
+            image_patterns_evaluated = 0
+            search_space_explored = 0
+        else:
+            (start_pattern, start_key, start_candidate) = context.position
+            catalog_lookup_count = context.catalog_lookup_count
+            catalog_eval_count = context.catalog_eval_count
+            image_patterns_evaluated = context.image_patterns_evaluated
+            search_space_explored = context.search_space_explored
+            self._logger.debug('Resuming at image pattern %d, pattern key %d, candidate %d' %
+                               context.position)
+        context.position = None
+        stop_position = None
 
         # Try all `p_size` star combinations chosen from the image centroids, brightest first.
         self._logger.debug('Checking up to %d image patterns from %d pattern centroids.' %
                            (math.comb(num_pattern_centroids, p_size), num_pattern_centroids))
         status = NO_MATCH
-        for image_pattern_indices in breadth_first_combinations(pattern_centroids_inds, p_size):
-            # Check if timeout has elapsed, then we must give up
-            if solve_timeout is not None:
-                elapsed_time = precision_timestamp() - t0_solve
-                if elapsed_time > solve_timeout:
-                    self._logger.debug('Timeout reached after: %.2f sec.' % elapsed_time)
-                    status = TIMEOUT
-                    break
-            if self._cancelled:
-                elapsed_time = precision_timestamp() - t0_solve
-                self._logger.debug('Cancelled after: %.3f sec.' % elapsed_time)
-                status = CANCELLED
-                self._cancelled = False
+        image_patterns = itertools.islice(
+            breadth_first_combinations(pattern_centroids_inds, p_size), start_pattern, None)
+        for (pattern_position, image_pattern_indices) in enumerate(image_patterns, start_pattern):
+            # Check if timeout has elapsed or we are cancelled, then we must give up
+            stop = context.stop_status()
+            if stop is not None:
+                # Stopping before any work on the pattern a resume started in keeps the
+                # position it started at, not the start of that pattern.
+                (status, stop_position) = (stop, (pattern_position, 0, 0)
+                                           if pattern_position != start_pattern
+                                           else (start_pattern, start_key, start_candidate))
                 break
 
             # Set largest distance to None, this is cached to avoid recalculating in future FOV estimation.
@@ -1840,7 +2249,8 @@ class Tetra3():
             image_pattern_edge_ratio_max = image_pattern + p_max_err
             image_pattern_key = (image_pattern*p_bins).astype(int)
 
-            image_patterns_evaluated += 1
+            if pattern_position != start_pattern or (start_key, start_candidate) == (0, 0):
+                image_patterns_evaluated += 1
 
             # Possible range of pattern keys we need to look up
             pattern_key_space_min = np.maximum(0, image_pattern_edge_ratio_min*p_bins).astype(int)
@@ -1856,11 +2266,24 @@ class Tetra3():
             # ones closest to what we measured in the image to be solved.
             pattern_key_list = list((dist(code), code) for code in itertools.product(*pattern_key_range))
             pattern_key_list.sort()
+            lap('key_enumeration')
 
             # Iterate over pattern keys, starting from 'image_pattern_key' and working
             # our way outward.
-            for (_, pattern_key) in pattern_key_list:
-                search_space_explored += 1
+            first_key = start_key if pattern_position == start_pattern else 0
+            for (key_position, (_, pattern_key)) in enumerate(pattern_key_list[first_key:],
+                                                              first_key):
+                # (Not for the first key or candidate: the check above was just made. Only a
+                # stop before a pattern thus leaves a position with key and candidate 0.)
+                stop = context.stop_status() if key_position > first_key else None
+                if stop is not None:
+                    (status, stop_position) = (stop, (pattern_position, key_position, 0))
+                    break
+                # Resuming inside this key's candidates: it was counted before the stop.
+                first_candidate = start_candidate \
+                    if (pattern_position, key_position) == (start_pattern, start_key) else 0
+                if first_candidate == 0:
+                    search_space_explored += 1
                 # Calculate corresponding hash index.
                 pattern_key_hash = _compute_pattern_key_hash(pattern_key, p_bins)
                 hash_index = _pattern_key_hash_to_index(
@@ -1871,9 +2294,11 @@ class Tetra3():
                         pattern_key_hash, hash_index, upper_tri_index,
                         image_pattern_largest_edge, fov_estimate,
                         fov_max_error, linear_probe)
+                lap('hash_probing')
                 if catalog_pattern_edges is None:
                     continue
-                catalog_lookup_count += len(catalog_pattern_edges)
+                if first_candidate == 0:
+                    catalog_lookup_count += len(catalog_pattern_edges)
 
                 all_catalog_largest_edges = catalog_pattern_edges[:, -1]
                 all_catalog_edge_ratios = catalog_pattern_edges[:, :-1] / all_catalog_largest_edges[:, None]
@@ -1882,9 +2307,16 @@ class Tetra3():
                 valid_patterns = np.argwhere(np.all(np.logical_and(
                     image_pattern_edge_ratio_min < all_catalog_edge_ratios,
                     image_pattern_edge_ratio_max > all_catalog_edge_ratios), axis=1)).flatten()
+                lap('candidate_filtering')
 
                 # Go through each matching pattern and calculate further
-                for index in valid_patterns:
+                for (candidate_position, index) in enumerate(valid_patterns[first_candidate:],
+                                                             first_candidate):
+                    stop = context.stop_status() if candidate_position > first_candidate else None
+                    if stop is not None:
+                        (status, stop_position) = (
+                            stop, (pattern_position, key_position, candidate_position))
+                        break
                     catalog_eval_count += 1
 
                     # Compute the FOV that our image_pattern would yield if it were to
@@ -1971,7 +2403,12 @@ class Tetra3():
                                                           1 - prob_single_star_mismatch)
                     self._logger.debug("Mismatch probability = %.2e, at FOV = %.5fdeg" \
                                        % (prob_mismatch, np.rad2deg(fov)))
+                    lap('verification')
                     if prob_mismatch >= match_threshold:
+                        context.offer_candidate(
+                            prob_mismatch*self.num_patterns,
+                            lambda: _candidate_summary(rotation_matrix, fov, num_star_matches,
+                                                       prob_mismatch*self.num_patterns))
                         continue
 
                     # display mismatch probability in scientific notation
@@ -2053,7 +2490,7 @@ class Tetra3():
                     rms_err_angle = np.rad2deg(np.sqrt(np.mean(angle**2))) * 3600
 
                     # Solved in this time
-                    t_solve = (precision_timestamp() - t0_solve)*1000
+                    t_solve = context.elapsed()*1000
                     solution_dict = {'RA': ra, 'Dec': dec,
                                      'Roll': roll,
                                      'FOV': np.rad2deg(fov),
@@ -2197,6 +2634,11 @@ class Tetra3():
                     if return_rotation_matrix:
                         solution_dict['rotation_matrix'] = rotation_matrix.tolist()
 
+                    lap('refinement')
+                    context.finish(image_patterns_evaluated, search_space_explored,
+                                   catalog_lookup_count, catalog_eval_count)
+                    if return_statistics:
+                        solution_dict['statistics'] = context.statistics
                     self._logger.debug(solution_dict)
                     self._logger.debug(
                         'For %d centroids, evaluated %s image patterns; searched %s pattern keys' %
@@ -2207,10 +2649,21 @@ class Tetra3():
                         'Looked up/evaluated %s/%s catalog patterns' %
                         (catalog_lookup_count, catalog_eval_count))
                     return solution_dict
+                if stop_position is not None:
+                    break
+            if stop_position is not None:
+                break
         # Close of image_pattern_indices loop
 
         # Failed to solve (or timeout or cancel), get time and return None
-        t_solve = (precision_timestamp() - t0_solve) * 1000
+        context.finish(image_patterns_evaluated, search_space_explored,
+                       catalog_lookup_count, catalog_eval_count)
+        context.position = stop_position
+        t_solve = context.t_solve
+        if status == TIMEOUT:
+            self._logger.debug('Timeout reached after: %.2f sec.' % context.elapsed())
+        elif status == CANCELLED:
+            self._logger.debug('Cancelled after: %.3f sec.' % context.elapsed())
         self._logger.debug('FAIL: Did not find a match to the stars! It took '
                            + str(round(t_solve)) + ' ms.')
         self._logger.debug(
@@ -2221,18 +2674,29 @@ class Tetra3():
         self._logger.debug(
             'FAIL: Looked up/evaluated %s/%s catalog patterns' %
             (catalog_lookup_count, catalog_eval_count))
-        return {'RA': None, 'Dec': None, 'Roll': None, 'FOV': None, 'distortion': None,
-                'RMSE': None, 'P90E': None, 'MAXE': None, 'Matches': None, 'Prob': None,
-                'epoch_equinox': None, 'epoch_proper_motion': None, 'T_solve': t_solve,
-                'status': status}
+        failure = {'RA': None, 'Dec': None, 'Roll': None, 'FOV': None, 'distortion': None,
+                   'RMSE': None, 'P90E': None, 'MAXE': None, 'Matches': None, 'Prob': None,
+                   'epoch_equinox': None, 'epoch_proper_motion': None, 'T_solve': t_solve,
+                   'status': status}
+        if return_best_candidate:
+            failure['best_candidate'] = context.best_candidate
+        if return_statistics:
+            failure['statistics'] = context.statistics
+        return failure
 
     def cancel_solve(self):
-        """Signal that a currently running solve_from_image() or solve_from_centroids() should
-        terminate immediately.
+        """Signal that the currently running solve_from_image() or solve_from_centroids() calls
+        should terminate immediately.
         If no solve_from_{image,centroids} is running, this call affects the next solve attempt.
+        To cancel one of several concurrent solves, use :meth:`SolveContext.cancel`.
         """
         self._logger.debug('cancelling')
-        self._cancelled = True
+        with self._active_solves_lock:
+            if self._active_solves:
+                for context in self._active_solves:
+                    context.cancel()
+            else:
+                self._cancel_next_solve = True
 
     def _get_all_patterns_for_index(self, pattern_key_hash, hash_index, upper_tri_index,
                                     image_pattern_largest_edge, fov_estimate, fov_max_error,
@@ -2385,7 +2849,7 @@ def get_centroids_from_image(image, sigma=2, image_th=None, crop=None, downsampl
                              filtsize=25, bg_sub_mode='local_mean', sigma_mode='global_root_square',
                              binary_open=True, centroid_window=None, max_area=100, min_area=5,
                              max_sum=None, min_sum=None, max_axis_ratio=None, max_returned=None,
-                             return_moments=False, return_images=False):
+                             return_moments=False, return_images=False, mask=None):
     """Extract spot centroids from an image and calculate statistics.
 
     This is a versatile function for finding spots (e.g. stars or satellites) in an image and
@@ -2408,10 +2872,16 @@ def get_centroids_from_image(image, sigma=2, image_th=None, crop=None, downsampl
     background subtraction and image thresholding by your own methods, then pass `bg_sub_mode=None`
     and your threshold as `image_th` to bypass these extraction steps.
 
+    Pass a boolean `mask` (same shape as the image, True for usable sky) to exclude regions such
+    as ground or buildings. The image is reduced to the bounding box of the usable region before
+    background subtraction, and masked pixels never contribute to the noise estimate or the
+    binary mask, so they cannot produce spots.
+
     The algorithm proceeds as follows:
         1. Convert image to 2D numpy.ndarray with type float32.
         2. Call :meth:`tetra3.crop_and_downsample_image` with the image and supplied arguments
-           `crop` and `downsample`.
+           `crop` and `downsample`. If `mask` is given, it is cropped and downsampled in the same
+           way and the image is further reduced to the bounding box of the unmasked pixels.
         3. Subtract the background if `bg_sub_mode` is not None. Four methods are available:
 
            - 'local_median': Create the background image using a median filter of
@@ -2480,6 +2950,9 @@ def get_centroids_from_image(image, sigma=2, image_th=None, crop=None, downsampl
             higher order moments, sum, area) together with the spot positions.
         return_images (bool, optional): If set to True, return a dictionary with partial results
             from the steps in the algorithm.
+        mask (numpy.ndarray, optional): Boolean array with the same height and width as `image`.
+            Pixels where the mask is False are excluded from thresholding and labelling. Defaults
+            to None (use the whole image).
 
     Returns:
         numpy.ndarray or tuple: If `return_moments=False` and `return_images=False` (the defaults)
@@ -2509,13 +2982,29 @@ def get_centroids_from_image(image, sigma=2, image_th=None, crop=None, downsampl
             image = image.squeeze(axis=2)
     else:
         assert image.ndim == 2, 'Image must be 2D or 3D array'
+    raw_shape = image.shape
     if return_images:
         images_dict = {'converted_input': image.copy()}
     # 2 Crop and downsample
     (image, offs) = crop_and_downsample_image(image, crop=crop, downsample=downsample,
                                               return_offsets=True, sum_when_downsample=True)
-    (height, width) = image.shape
     (offs_h, offs_w) = offs
+    # Offset (in cropped and downsampled pixels) of the region kept by the mask
+    (mask_offs_h, mask_offs_w) = (0, 0)
+    if mask is not None:
+        mask = np.asarray(mask, dtype=bool)
+        assert mask.shape == raw_shape, 'Mask must have the same height and width as the image'
+        if crop is not None or downsample is not None:
+            # Keep a downsampled pixel if any of its source pixels is unmasked
+            mask = crop_and_downsample_image(mask.astype(np.float32), crop=crop,
+                                             downsample=downsample, sum_when_downsample=True) > 0
+        rows = np.flatnonzero(np.any(mask, axis=1))
+        cols = np.flatnonzero(np.any(mask, axis=0))
+        if len(rows) > 0:
+            (mask_offs_h, mask_offs_w) = (rows[0], cols[0])
+            image = image[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+            mask = mask[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+    (height, width) = image.shape
     if return_images:
         images_dict['cropped_and_downsampled'] = image.copy()
     # 3. Subtract background:
@@ -2533,9 +3022,9 @@ def get_centroids_from_image(image, sigma=2, image_th=None, crop=None, downsampl
             image = image - scipy.ndimage.filters.uniform_filter(image, size=filtsize,
                                                                  output=image.dtype)
         elif bg_sub_mode.lower() == 'global_median':
-            image = image - np.median(image)
+            image = image - np.median(image if mask is None else image[mask])
         elif bg_sub_mode.lower() == 'global_mean':
-            image = image - np.mean(image)
+            image = image - np.mean(image if mask is None else image[mask])
         else:
             raise AssertionError('bg_sub_mode must be string: local_median, local_mean,'
                                  + ' global_median, or global_mean')
@@ -2558,9 +3047,9 @@ def get_centroids_from_image(image, sigma=2, image_th=None, crop=None, downsampl
             img_std = np.sqrt(scipy.ndimage.filters.uniform_filter(image**2, size=filtsize,
                                                                    output=image.dtype))
         elif sigma_mode.lower() == 'global_median_abs':
-            img_std = np.median(np.abs(image)) * 1.48
+            img_std = np.median(np.abs(image if mask is None else image[mask])) * 1.48
         elif sigma_mode.lower() == 'global_root_square':
-            img_std = np.sqrt(np.mean(image**2))
+            img_std = np.sqrt(np.mean((image if mask is None else image[mask])**2))
         else:
             raise AssertionError('sigma_mode must be string: local_median_abs, local_root_square,'
                                  + ' global_median_abs, or global_root_square')
@@ -2569,6 +3058,8 @@ def get_centroids_from_image(image, sigma=2, image_th=None, crop=None, downsampl
     #    images_dict['image_threshold'] = image_th
     # 5. Threshold to find binary mask
     bin_mask = image > image_th
+    if mask is not None:
+        bin_mask &= mask
     if binary_open:
         bin_mask = scipy.ndimage.binary_opening(bin_mask)
     if return_images:
@@ -2659,7 +3150,7 @@ def get_centroids_from_image(image, sigma=2, image_th=None, crop=None, downsampl
                     centre[0] + radius]
             img_draw.ellipse(bbox, **kwargs)
         for entry in extracted:
-            pos = entry[1:3].copy()
+            pos = entry[1:3].copy() + [mask_offs_h, mask_offs_w]
             size = .01*width
             if downsample is not None:
                 pos *= downsample
@@ -2667,7 +3158,7 @@ def get_centroids_from_image(image, sigma=2, image_th=None, crop=None, downsampl
                 size *= downsample
             draw_circle(pos, size, outline='green')
         for entry in rejected:
-            pos = entry[1:3].copy()
+            pos = entry[1:3].copy() + [mask_offs_h, mask_offs_w]
             size = .01*width
             if downsample is not None:
                 pos *= downsample
@@ -2705,7 +3196,9 @@ def get_centroids_from_image(image, sigma=2, image_th=None, crop=None, downsampl
             xc = np.sum(img_cent * xx) / img_sum
             yc = np.sum(img_cent * yy) / img_sum
             extracted[i, 1:3] = np.array([yc, xc]) + [offs_y, offs_x]
-    # 10. Revert effects of crop and downsample
+    # 10. Revert effects of mask bounding box, crop and downsample
+    if mask_offs_h or mask_offs_w:
+        extracted[:, 1:3] = extracted[:, 1:3] + np.array([mask_offs_h, mask_offs_w])
     if downsample:
         extracted[:, 1:3] = extracted[:, 1:3] * downsample  # Scale centroid
     if crop:
@@ -22,49 +22,165 @@ import os
 import math
 import traceback
 import json
+import hashlib
 from datetime import datetime
+import functools
 import threading
+import asyncio
 
 # --- Third-party library imports ---
 try:
     from PIL import Image
     import numpy as np
+    import scipy.ndimage
     import pytz
     import tetra3
-    import astropy.units as u
-    from astropy.time import Time
-    from astropy.coordinates import SkyCoord, EarthLocation, AltAz
+    from tetra3.tetra3 import _undistort_centroids
+    import erfa
 except ImportError as e:
     # This will help diagnose missing libraries if the script fails to load.
     raise ImportError(f"A required library is missing. Please ensure all dependencies are installed. Error: {e}")
 
+import almanac
+import corrections
+
 
 # =============================================================================
-# SECTION 1: ASTROPY IERS CONFIGURATION
+# SECTION 1: TIME SCALES AND ASTROPY (LAZY, OFFLINE FIRST)
 # =============================================================================
+#
+# Sight reduction runs on the offline almanac (almanac.py), whose Earth orientation
+# samples (UT1-TAI, polar motion) are bundled in almanac.npz. astropy is only needed
+# for validation and for instants outside the almanac window, so it is imported on
+# first use (_astropy) with its bundled IERS tables and no download attempts; cold
+# start never waits on the network. Fresher IERS data is opt-in: refresh_iers_async
+# downloads it in the background, updates the almanac and caches it for later runs.
 
-import urllib.request
-from astropy.utils import iers
 import warnings
+from types import SimpleNamespace
+
+warnings.filterwarnings('ignore', module='erfa') # Suppress ERFA warnings about future years
+
+IERS_FINALS_URL = "https://datacenter.iers.org/data/9/finals2000A.all"
+EOP_SNAPSHOT_FILE = "eop_snapshot.npz"
 
-def _setup_iers():
+_ASTROPY = None
+_EPHEMERIS = None
+_TIME_SCALE_LOCK = threading.Lock()
+
+def _astropy():
     """
-    Configures Astropy's Earth rotation (IERS) data fetching.
-    If online, downloads the latest tables for sub-arcsecond accuracy.
-    If offline, suppresses expiration errors and falls back to bundled tables.
+    (Internal helper) Imports astropy on first use, configured to use its bundled IERS
+    tables without downloads or expiry errors. Returns a namespace with u, Time,
+    SkyCoord, EarthLocation, AltAz and ITRS.
     """
-    warnings.filterwarnings('ignore', module='erfa') # Suppress ERFA warnings about future years
-    try:
-        urllib.request.urlopen("https://datacenter.iers.org", timeout=0.5)
-        iers.conf.auto_download = True
-        print("Python: Internet available. Astropy will auto-download IERS data.")
-    except Exception:
-        iers.conf.auto_download = False
-        iers.conf.auto_max_age = None
-        iers.conf.iers_degraded_accuracy = 'ignore'
-        print("Python: Offline mode. Astropy using bundled IERS data.")
+    global _ASTROPY
+    with _TIME_SCALE_LOCK:
+        if _ASTROPY is None:
+            import astropy.units as u
+            from astropy.time import Time
+            from astropy.coordinates import SkyCoord, EarthLocation, AltAz, ITRS
+            from astropy.utils import iers
+            iers.conf.auto_download = False
+            iers.conf.auto_max_age = None
+            iers.conf.iers_degraded_accuracy = 'ignore'
+            _ASTROPY = SimpleNamespace(u=u, Time=Time, SkyCoord=SkyCoord, EarthLocation=EarthLocation,
+                                       AltAz=AltAz, ITRS=ITRS)
+            print("Python: Astropy loaded (bundled IERS data).")
+        return _ASTROPY
+
+def _ephemeris():
+    """
+    (Internal helper) The shared offline almanac, with the Earth orientation snapshot
+    from the last refresh_iers_async applied; None if the almanac file is missing.
+    """
+    global _EPHEMERIS
+    with _TIME_SCALE_LOCK:
+        if _EPHEMERIS is None:
+            _EPHEMERIS = almanac.Almanac.default()
+            snapshot = os.path.join(_app_files_dir(), EOP_SNAPSHOT_FILE)
+            if _EPHEMERIS is not None and os.path.exists(snapshot):
+                try:
+                    with np.load(snapshot) as data:
+                        _EPHEMERIS.set_eop(int(data["mjd0"]), data["ut1_minus_utc_s"],
+                                           data["polar_motion_arcsec"])
+                    print("Python: Using refreshed Earth orientation snapshot.")
+                except Exception as e:
+                    print(f"Python: WARNING - Ignoring unreadable EOP snapshot: {e}")
+        return _EPHEMERIS
+
+def _fetch_iers_finals():
+    """(Internal helper) Downloads the IERS finals2000A table as text."""
+    import urllib.request
+    with urllib.request.urlopen(IERS_FINALS_URL, timeout=30) as response:
+        return response.read().decode("ascii", errors="replace")
+
+def refresh_iers(fetch=None):
+    """
+    Refreshes Earth orientation data from the IERS finals2000A table: updates the
+    offline almanac (and astropy, if loaded) and caches the samples in the app files
+    directory for later runs. fetch() returns the table text; defaults to downloading
+    IERS_FINALS_URL, and can be replaced by a local stand-in (e.g. reading a file).
+    Returns the number of daily samples applied.
+    """
+    _astropy()
+    from astropy.utils import iers
+    import tempfile
 
-threading.Thread(target=_setup_iers, daemon=True).start()
+    text = (fetch or _fetch_iers_finals)()
+    with tempfile.NamedTemporaryFile("w", suffix=".all", delete=False) as tmp:
+        tmp.write(text)
+    try:
+        table = iers.IERS_A.read(tmp.name)
+    finally:
+        os.remove(tmp.name)
+    mjd = np.asarray(table["MJD"].to_value("d"), dtype=float)
+    ut1_minus_utc = np.asarray(table["UT1_UTC"].to_value("s"), dtype=float)
+    polar_motion = np.column_stack((table["PM_x"].to_value("arcsec"), table["PM_y"].to_value("arcsec")))
+    valid = np.flatnonzero(np.isfinite(ut1_minus_utc) & np.all(np.isfinite(polar_motion), axis=1))
+    if len(valid) < 2:
+        raise ValueError("IERS table contains no usable Earth orientation data")
+    first, last = int(valid[0]), int(valid[-1]) + 1
+    ephemeris = _ephemeris()
+    if ephemeris is not None:
+        # Only the almanac window is worth keeping
+        first = max(first, int(np.searchsorted(mjd, 51544.5 + ephemeris.t0_days - 1.0)))
+    mjd0 = int(mjd[first])
+    ut1_minus_utc, polar_motion = ut1_minus_utc[first:last], polar_motion[first:last]
+    if ephemeris is not None:
+        ephemeris.set_eop(mjd0, ut1_minus_utc, polar_motion)
+    iers.earth_orientation_table.set(table)
+
+    # Written through a unique file and swapped in, so readers never see a partial
+    # snapshot and concurrent refreshes do not share a temporary file.
+    path = os.path.join(_app_files_dir(), EOP_SNAPSHOT_FILE)
+    fd, tmp_path = tempfile.mkstemp(suffix=".npz", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, mjd0=mjd0, ut1_minus_utc_s=ut1_minus_utc, polar_motion_arcsec=polar_motion)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    print(f"Python: IERS data refreshed ({last - first} days from MJD {mjd0}).")
+    return last - first
+
+def refresh_iers_async(fetch=None, callback=None):
+    """
+    Runs refresh_iers in a background thread. callback(result) receives the sample count,
+    or the exception if the refresh failed. Returns the thread.
+    """
+    def run():
+        try:
+            result = refresh_iers(fetch)
+        except Exception as e:
+            print(f"Python: IERS refresh failed: {e}")
+            result = e
+        if callback is not None:
+            callback(result)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
 
 # =============================================================================
 # SECTION 2: IMAGE SOLVING (ASTROMETRY)
@@ -88,56 +204,624 @@ except Exception as e_init:
     INITIALIZATION_ERROR = f"FATAL ERROR initializing Tetra3: {e_init}\n{traceback.format_exc()}"
     print(f"Python: {INITIALIZATION_ERROR}")
 
-def detect_centroids_cli(image_path):
+def _app_files_dir():
+    """(Internal helper) Directory for persistent app data (Android files dir when available)."""
+    try:
+        from com.chaquo.python import Python
+        return Python.getPlatform().getApplication().getFilesDir().getAbsolutePath()
+    except ImportError:
+        return os.path.dirname(os.path.abspath(__file__))
+
+def _app_cache_dir():
+    """(Internal helper) Directory for temporary files (Android cache dir when available)."""
+    try:
+        from com.chaquo.python import Python
+        return Python.getPlatform().getApplication().getCacheDir().getAbsolutePath()
+    except ImportError:
+        import tempfile
+        return tempfile.gettempdir()
+
+# Seconds after which a cedar_cli run is abandoned.
+CEDAR_CLI_TIMEOUT_S = 30
+
+def _cedar_cli_invocation(image_path, sigma, detect_hot_pixels):
     """
-    Runs the cedar_cli binary on the given image path.
+    (Internal helper) (argv, output_path) to run the cedar_cli binary on image_path: the
+    app's bundled libcedar_cli.so on Android, else the binary named by the CEDAR_CLI
+    environment variable. output_path is a new file unique to this run; the caller
+    removes it (_remove_cedar_output).
     """
-    import subprocess
-    import json
-    from com.chaquo.python import Python
-
     try:
+        from com.chaquo.python import Python
         context = Python.getPlatform().getApplication()
         native_lib_dir = context.getApplicationInfo().nativeLibraryDir
         binary_path = os.path.join(native_lib_dir, "libcedar_cli.so")
+    except ImportError:
+        binary_path = os.environ.get("CEDAR_CLI")
+        if not binary_path:
+            raise RuntimeError("cedar_cli is not available (set CEDAR_CLI off-device)")
+
+    print(f"Python: Using binary at: {binary_path}")
+
+    # Native libraries in /data/app are read-only but already executable.
+    if not os.access(binary_path, os.X_OK):
+        raise PermissionError(f"Binary is not executable: {binary_path}")
+
+    # Unique output file, so concurrent runs on the same image (or on files with the same
+    # name) never read each other's output.
+    import tempfile
+    fd, output_path = tempfile.mkstemp(prefix=f"cedar_out_{os.path.basename(image_path)}_",
+                                       suffix=".json", dir=_app_cache_dir())
+    os.close(fd)
+    argv = [binary_path, "--input", image_path, "--output", output_path, "--sigma", str(float(sigma)),
+            "--hot-pixels", "true" if detect_hot_pixels else "false"]
+    return argv, output_path
+
+def _read_cedar_output(output_path):
+    """(Internal helper) Reads the JSON file written by cedar_cli."""
+    with open(output_path, 'r') as f:
+        return json.load(f)
+
+def _remove_cedar_output(output_path):
+    """(Internal helper) Deletes the cedar_cli output file, if it exists."""
+    try:
+        os.remove(output_path)
+    except OSError:
+        pass
 
-        print(f"Python: Using binary at: {binary_path}")
-
-        # Native libraries in /data/app are read-only but already executable.
-        if not os.access(binary_path, os.X_OK):
-            return {"error": f"Binary is not executable: {binary_path}"}
-
-        # Create a temporary file path for the output
-        output_path = os.path.join(
-            context.getCacheDir().getAbsolutePath(),
-            f"cedar_out_{os.path.basename(image_path)}.json"
-        )
-
-        result = subprocess.check_output(
-            [binary_path, "--input", image_path, "--output", output_path, "--sigma", "6.0", "--hot-pixels", "true"],
-            stderr=subprocess.STDOUT,
-            timeout=30
-        )
-
-        # Read the JSON output from the generated file
-        with open(output_path, 'r') as f:
-            data = json.load(f)
-
-        # Clean up the temporary file
-        try:
-            os.remove(output_path)
-        except OSError:
-            pass
+def detect_centroids_cli(image_path, sigma=6.0, detect_hot_pixels=True):
+    """
+    Runs the cedar_cli binary on the given image path.
+    `sigma` is the detection threshold in noise standard deviations (lower finds fainter stars).
+    Per-frame hot pixel detection can be turned off once a SensorDefectMap covers it.
+    """
+    import subprocess
 
-        return data
+    output_path = None
+    try:
+        argv, output_path = _cedar_cli_invocation(image_path, sigma, detect_hot_pixels)
+        subprocess.check_output(argv, stderr=subprocess.STDOUT, timeout=CEDAR_CLI_TIMEOUT_S)
+        return _read_cedar_output(output_path)
     except subprocess.TimeoutExpired as e:
-        return {"error": f"Cedar CLI timed out after 30s: {e}"}
+        return {"error": f"Cedar CLI timed out after {CEDAR_CLI_TIMEOUT_S}s: {e}"}
     except subprocess.CalledProcessError as e:
         return {"error": str(e), "output": e.output.decode("utf-8")}
     except Exception as e:
         return {"error": str(e)}
+    finally:
+        if output_path is not None:
+            _remove_cedar_output(output_path)
+
+# Horizontal field of view of the phone camera, used as the solver's FOV estimate.
+CAMERA_FOV_DEG = 53
+
+# Pixels whose line of sight is lower than this are treated as ground/horizon glow.
+HORIZON_MASK_MIN_ALTITUDE_DEG = 3.0
+
+def _pixel_altitudes_deg(y, x, size, fov_deg, pitch_deg, roll_deg):
+    """
+    (Internal helper) Altitude above the horizon of the line of sight through image
+    pixel coordinates (y, x), for a camera whose optical axis is `pitch_deg` above the
+    horizon and where the zenith lies `roll_deg` clockwise from image "up" (towards y=0).
+    Works on scalars or numpy arrays (broadcast together).
+    """
+    height, width = size[:2]
+    f = (width / 2.0) / math.tan(math.radians(fov_deg) / 2.0)
+    pitch = math.radians(pitch_deg)
+    roll = math.radians(roll_deg)
+    # Zenith direction in camera coordinates (x right, y down, z along optical axis).
+    up_x = math.sin(roll) * math.cos(pitch)
+    up_y = -math.cos(roll) * math.cos(pitch)
+    up_z = math.sin(pitch)
+    ray_x = (np.asarray(x, dtype=np.float32) - width / 2.0) / f
+    ray_y = (np.asarray(y, dtype=np.float32) - height / 2.0) / f
+    sin_alt = (ray_x * up_x + ray_y * up_y + up_z) / np.sqrt(ray_x**2 + ray_y**2 + 1.0)
+    return np.rad2deg(np.arcsin(np.clip(sin_alt, -1.0, 1.0)))
+
+def horizon_mask(size, pitch_deg, roll_deg=0.0, fov_deg=CAMERA_FOV_DEG,
+                 min_altitude_deg=HORIZON_MASK_MIN_ALTITUDE_DEG):
+    """
+    Builds a region-of-interest mask from the device orientation at capture time.
+
+    Returns a boolean (height, width) array which is True where the pixel looks at
+    least `min_altitude_deg` above the horizon, i.e. where stars can be found.
+    """
+    height, width = size[:2]
+    y = (np.arange(height, dtype=np.float32) + 0.5)[:, None]
+    x = (np.arange(width, dtype=np.float32) + 0.5)[None, :]
+    return _pixel_altitudes_deg(y, x, size, fov_deg, pitch_deg, roll_deg) >= min_altitude_deg
+
+# --- Device Gravity to Camera Frame ---
+#
+# The accelerometer vector (SensorPipeline.processGravity) is in the Android device
+# frame: x right, y up along the screen, z out of the screen. At rest it points up.
+# The back camera looks along -z. The camera frame used below is that of the image
+# as stored (x right, y down, z along the optical axis); the EXIF orientation tells
+# how the stored image is rotated relative to the upright (portrait) device.
+
+# EXIF orientation -> (x, y) components in the stored image from the upright ones
+_EXIF_ROTATIONS = {
+    1: lambda x, y: (x, y),
+    3: lambda x, y: (-x, -y),    # stored upside down
+    6: lambda x, y: (y, -x),     # stored rotated 90 degrees counter-clockwise
+    8: lambda x, y: (-y, x),     # stored rotated 90 degrees clockwise
+}
+
+def _image_orientation(image_path):
+    """(Internal helper) EXIF orientation tag of the image file (1 when absent)."""
+    try:
+        with Image.open(image_path) as img:
+            return int(img.getexif().get(0x0112, 1))
+    except Exception:
+        return 1
+
+def _capture_time_iso(image_path):
+    """
+    (Internal helper) Capture time of the image file as an ISO-8601 string, from the EXIF
+    DateTimeOriginal, SubSecTimeOriginal and OffsetTimeOriginal tags; None when the time
+    or its UTC offset is absent.
+    """
+    try:
+        with Image.open(image_path) as img:
+            exif = img.getexif().get_ifd(0x8769)
+        taken, subsec, offset = exif.get(0x9003), exif.get(0x9291), exif.get(0x9011)
+        if not taken or not offset:
+            return None
+        capture_time = datetime.strptime(str(taken).strip(), "%Y:%m:%d %H:%M:%S")
+        if subsec and str(subsec).strip().isdigit():
+            capture_time = capture_time.replace(microsecond=int(str(subsec).strip()[:6].ljust(6, "0")))
+        return capture_time.isoformat() + str(offset).strip()
+    except Exception:
+        return None
+
+def camera_up_vector(gravity, orientation=1):
+    """
+    Zenith direction as a unit vector in the camera frame (x right, y down, z along the
+    optical axis) of an image stored with the given EXIF orientation, from the device
+    accelerometer vector [x, y, z].
+    """
+    ax, ay, az = (float(v) for v in gravity)
+    x, y = _EXIF_ROTATIONS.get(orientation, _EXIF_ROTATIONS[1])(ax, -ay)
+    up = np.array([x, y, -az])
+    return up / np.linalg.norm(up)
+
+def up_vector_pitch_roll(up):
+    """Camera pitch and roll (degrees, as used by horizon_mask) from camera_up_vector."""
+    pitch = math.degrees(math.asin(float(np.clip(up[2], -1.0, 1.0))))
+    roll = math.degrees(math.atan2(up[0], -up[1]))
+    return pitch, roll
+
+def star_altitudes_deg(yx, size, fov_deg, distortion, up):
+    """
+    Observed altitudes (degrees) of stars at image coordinates yx (Nx2, (y, x) pixels)
+    from the solved field of view and distortion and the camera_up_vector.
+    """
+    height, width = size[:2]
+    yx = np.asarray(yx, dtype=np.float64).reshape(-1, 2)
+    if distortion:
+        yx = _undistort_centroids(yx, size, distortion)
+    f = (width / 2.0) / math.tan(math.radians(fov_deg) / 2.0)
+    rays = np.column_stack(((yx[:, 1] - width / 2.0) / f, (yx[:, 0] - height / 2.0) / f,
+                            np.ones(len(yx))))
+    sin_alt = rays @ up / np.linalg.norm(rays, axis=1)
+    return np.rad2deg(np.arcsin(np.clip(sin_alt, -1.0, 1.0)))
+
+# 16-bit grayscale images (e.g. burst stacks) hold 8-bit DN values times this scale.
+DN_SCALE_16BIT = 256
+
+def _load_grayscale_image(image_path):
+    """
+    (Internal helper) Loads an image file as a uint8 grayscale numpy array; 16-bit
+    grayscale images give float32 in the same DN units (value / DN_SCALE_16BIT), keeping
+    their extra precision. Returns (np_image, (orig_height, orig_width), ratio) where
+    ratio is the downscaling applied to fit within MAX_DIM.
+    """
+    with Image.open(image_path) as img:
+        high_depth = img.mode.startswith("I;16") or img.mode == "I"
+        if high_depth:
+            img = img.convert("I")
+        orig_width, orig_height = img.width, img.height
+        # H-12: Cap image resolution to avoid excessive memory usage
+        MAX_DIM = 4000
+        ratio = 1.0
+        if img.width > MAX_DIM or img.height > MAX_DIM:
+            ratio = min(MAX_DIM / img.width, MAX_DIM / img.height)
+            new_size = (int(img.width * ratio), int(img.height * ratio))
+            print(f"Python: Downscaling image from {img.width}x{img.height} to {new_size[0]}x{new_size[1]}")
+            img = img.resize(new_size, Image.LANCZOS)
+        if high_depth:
+            np_image = np.asarray(img, dtype=np.float32) / DN_SCALE_16BIT
+        else:
+            img_gray = img.convert(mode='L')
+            np_image = np.asarray(img_gray, dtype=np.uint8)
+    return np_image, (orig_height, orig_width), ratio
 
-def image_processor(image_name, image_path):
+# --- Sensor Defect Map ---
+
+class SensorDefectMap:
+    """
+    Persistent map of hot pixels and other fixed-pattern defects of one camera sensor.
+
+    The map is built incrementally from the detections of solved captures that the solver
+    did not match to a catalogue star. A real star only lands on the same sensor cell
+    again if the camera points at the same sky, so a cell that holds such a detection in
+    most of the differently-pointed solved images since it was first seen is a defect;
+    a chance coincidence of unmatched stars fades as further pointings miss that cell.
+    Detections are binned into CELL_SIZE x CELL_SIZE pixel cells of the full-resolution
+    sensor image.
+    """
+    CELL_SIZE = 4
+    # A cell is a defect once detections there came from this many distinct pointings...
+    MIN_HITS = 3
+    # ...and from at least this fraction of the distinct pointings since its first hit.
+    MIN_HIT_FRACTION = 0.5
+    # Pointings closer than this are considered the same sky (not independent evidence).
+    MIN_POINTING_SEPARATION_DEG = 2.0
+    # After this many solved images the map replaces per-frame hot pixel detection.
+    MATURE_IMAGE_COUNT = 10
+
+    # Serializes update_for_sensor (load, record, save) between concurrent solves.
+    _update_lock = threading.Lock()
+
+    def __init__(self, size, path=None):
+        self.size = (int(size[0]), int(size[1]))
+        self.path = path
+        self.num_images = 0
+        self._cells = np.empty(0, dtype=np.int64)  # Sorted cell ids
+        self._counts = np.empty(0, dtype=np.int32)  # Distinct pointings with a hit
+        self._chances = np.empty(0, dtype=np.int32)  # Distinct pointings since the first hit
+        self._vectors = np.empty((0, 3), dtype=np.float32)  # Pointing of the latest chance
+        if path is not None and os.path.exists(path):
+            try:
+                with np.load(path) as data:
+                    if tuple(data['size']) == self.size:
+                        self.num_images = int(data['num_images'])
+                        self._cells = data['cells'].astype(np.int64)
+                        self._counts = data['counts'].astype(np.int32)
+                        self._chances = (data['chances'] if 'chances' in data
+                                         else data['counts']).astype(np.int32)
+                        self._vectors = data['vectors'].astype(np.float32)
+            except Exception as e:
+                print(f"Python: WARNING - Could not load sensor defect map {path}: {e}")
+
+    @classmethod
+    def for_sensor(cls, size):
+        """Loads (or starts) the map stored in the app files directory for this sensor size."""
+        filename = f"sensor_defects_{int(size[0])}x{int(size[1])}.npz"
+        return cls(size, os.path.join(_app_files_dir(), filename))
+
+    @classmethod
+    def update_for_sensor(cls, size, centroids, ra_deg, dec_deg):
+        """
+        Records an image into the stored map of this sensor size and saves it. The map is
+        re-read under a lock, so concurrent solves add to it instead of overwriting each
+        other. Returns the updated map.
+        """
+        with cls._update_lock:
+            defect_map = cls.for_sensor(size)
+            defect_map.record(centroids, ra_deg, dec_deg)
+            defect_map.save()
+        return defect_map
+
+    @property
+    def grid_shape(self):
+        return (-(-self.size[0] // self.CELL_SIZE), -(-self.size[1] // self.CELL_SIZE))
+
+    @property
+    def is_mature(self):
+        """True once enough solved images were seen to trust the map over per-frame detection."""
+        return self.num_images >= self.MATURE_IMAGE_COUNT
+
+    @property
+    def defect_cells(self):
+        defect = (self._counts >= self.MIN_HITS) & \
+            (self._counts >= self.MIN_HIT_FRACTION * self._chances)
+        return self._cells[defect]
+
+    def _cell_ids(self, centroids):
+        yx = np.asarray(centroids, dtype=np.float64).reshape(-1, 2)
+        rows = np.clip((yx[:, 0] // self.CELL_SIZE).astype(np.int64), 0, self.grid_shape[0] - 1)
+        cols = np.clip((yx[:, 1] // self.CELL_SIZE).astype(np.int64), 0, self.grid_shape[1] - 1)
+        return rows * self.grid_shape[1] + cols
+
+    def record(self, centroids, ra_deg, dec_deg):
+        """
+        Adds the (y, x) full-resolution centroids of an image solved at (ra_deg, dec_deg);
+        pass only the detections that the solver did not match to catalogue stars.
+        """
+        ra, dec = math.radians(ra_deg), math.radians(dec_deg)
+        pointing = np.array([math.cos(ra) * math.cos(dec), math.sin(ra) * math.cos(dec),
+                             math.sin(dec)], dtype=np.float32)
+        cells = np.unique(self._cell_ids(centroids))
+        self.num_images += 1
+        # Every known cell gets a new chance if the sky moved since its last one.
+        moved = self._vectors @ pointing < math.cos(math.radians(self.MIN_POINTING_SEPARATION_DEG))
+        self._chances[moved] += 1
+        self._vectors[moved] = pointing
+        if len(cells) == 0:
+            return
+        idx = np.searchsorted(self._cells, cells)
+        found = idx < len(self._cells)
+        found[found] = self._cells[idx[found]] == cells[found]
+        existing = idx[found]
+        self._counts[existing[moved[existing]]] += 1
+        new_cells = cells[~found]
+        if len(new_cells) > 0:
+            all_cells = np.concatenate((self._cells, new_cells))
+            order = np.argsort(all_cells, kind='stable')
+            ones = np.ones(len(new_cells), dtype=np.int32)
+            self._cells = all_cells[order]
+            self._counts = np.concatenate((self._counts, ones))[order]
+            self._chances = np.concatenate((self._chances, ones))[order]
+            self._vectors = np.concatenate(
+                (self._vectors, np.tile(pointing, (len(new_cells), 1))))[order]
+
+    def save(self):
+        """Writes the map to its path through a uniquely named file in the same directory."""
+        if self.path is None:
+            return
+        import tempfile
+        fd, tmp_path = tempfile.mkstemp(suffix=".npz", dir=os.path.dirname(self.path) or None)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, size=np.array(self.size), num_images=self.num_images,
+                         cells=self._cells, counts=self._counts, chances=self._chances,
+                         vectors=self._vectors)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def is_defect(self, centroids):
+        """Boolean array, True for (y, x) full-resolution centroids that fall on known defects."""
+        defects = self.defect_cells
+        if len(defects) == 0 or len(centroids) == 0:
+            return np.zeros(len(centroids), dtype=bool)
+        return np.isin(self._cell_ids(centroids), defects)
+
+    def mask(self, size):
+        """
+        Boolean mask (True = usable) for an image of `size` = (height, width), which may be a
+        downscaled copy of the sensor image. Defect cells and their neighbours are masked.
+        """
+        grid = np.zeros(self.grid_shape, dtype=bool)
+        grid.flat[self.defect_cells] = True
+        grid = ~scipy.ndimage.binary_dilation(grid, structure=np.ones((3, 3), dtype=bool))
+        height, width = size[:2]
+        rows = np.minimum((np.arange(height) + 0.5) * self.size[0] / height // self.CELL_SIZE,
+                          self.grid_shape[0] - 1).astype(np.int64)
+        cols = np.minimum((np.arange(width) + 0.5) * self.size[1] / width // self.CELL_SIZE,
+                          self.grid_shape[1] - 1).astype(np.int64)
+        return grid[np.ix_(rows, cols)]
+
+# --- Solve Result Cache ---
+
+class SolveCache:
+    """
+    Persistent, size-bounded cache of image_processor work, so re-opening an image,
+    retrying after an interruption or re-running a fix does not decode and solve an
+    unchanged file again.
+
+    Entries are addressed by a hash of their inputs (see key): "result" entries by the
+    image content, solve parameters and database identity, "detection" entries (Cedar
+    stars before masking) by the image content and Cedar parameters only, so a solver or
+    mask change still skips centroid detection. Fallback extractions are not stored.
+    Each entry is one JSON file; reads refresh its modification time and writes evict
+    the least recently used files beyond MAX_ENTRIES.
+    """
+    MAX_ENTRIES = 256
+    DIRECTORY = "solve_cache"
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, path, max_entries=None):
+        self.path = path
+        self.max_entries = self.MAX_ENTRIES if max_entries is None else int(max_entries)
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    @classmethod
+    def default(cls):
+        """The shared cache in the app files directory."""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls(os.path.join(_app_files_dir(), cls.DIRECTORY))
+            return cls._default
+
+    @staticmethod
+    def key(*parts):
+        """Hex digest of JSON-serializable key parts."""
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+    def _file(self, kind, key):
+        return os.path.join(self.path, f"{kind}_{key}.json")
+
+    def get(self, kind, key):
+        """The stored value, or None."""
+        path = self._file(kind, key)
+        try:
+            with open(path) as f:
+                value = json.load(f)
+            os.utime(path)
+            return value
+        except (OSError, ValueError):
+            return None
+
+    def put(self, kind, key, value):
+        if self.max_entries <= 0:
+            return
+        path = self._file(kind, key)
+        with self._lock:
+            try:
+                tmp_path = path + ".tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(value, f)
+                os.replace(tmp_path, path)
+                entries = [entry for entry in os.scandir(self.path) if entry.name.endswith(".json")]
+                if len(entries) > self.max_entries:
+                    entries.sort(key=lambda entry: entry.stat().st_mtime)
+                    for entry in entries[:len(entries) - self.max_entries]:
+                        os.remove(entry.path)
+            except OSError as e:
+                print(f"Python: WARNING - Could not update solve cache {self.path}: {e}")
+
+    def clear(self):
+        with self._lock:
+            for entry in os.scandir(self.path):
+                if entry.name.endswith(".json"):
+                    os.remove(entry.path)
+
+def _file_digest(path):
+    """(Internal helper) SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def database_fingerprint(t3=None):
+    """Short identity of a loaded Tetra3 database: its properties and table sizes."""
+    return (T3_INSTANCE if t3 is None else t3).database_fingerprint
+
+# Centroids closer than this (full-resolution pixels) are the same star detected twice.
+CENTROID_DUPLICATE_RADIUS_PX = 2.0
+
+def _rank_centroids(yx, brightness):
+    """
+    (Internal helper) Orders (N,2) centroids brightest first and drops duplicates,
+    keeping the brighter detection of any pair closer than CENTROID_DUPLICATE_RADIUS_PX.
+    Returns (yx, brightness).
+    """
+    order = np.argsort(-brightness, kind='stable')
+    yx, brightness = yx[order], brightness[order]
+    if len(yx) > 1:
+        from scipy.spatial import cKDTree
+        pairs = cKDTree(yx).query_pairs(CENTROID_DUPLICATE_RADIUS_PX, output_type='ndarray')
+        if len(pairs) > 0:
+            keep = np.ones(len(yx), dtype=bool)
+            keep[pairs.max(axis=1)] = False  # Higher index is the fainter one
+            yx, brightness = yx[keep], brightness[keep]
+    return yx, brightness
+
+def _unmatched_centroids(yx, matched_yx):
+    """
+    (Internal helper) The (N,2) centroids `yx` with no matched centroid of the solution
+    within CENTROID_DUPLICATE_RADIUS_PX, i.e. the detections not identified as stars.
+    """
+    yx = np.asarray(yx, dtype=np.float64).reshape(-1, 2)
+    matched_yx = np.asarray(matched_yx, dtype=np.float64).reshape(-1, 2)
+    if len(yx) == 0 or len(matched_yx) == 0:
+        return yx
+    from scipy.spatial import cKDTree
+    distances, _ = cKDTree(matched_yx).query(yx, distance_upper_bound=CENTROID_DUPLICATE_RADIUS_PX)
+    return yx[np.isinf(distances)]
+
+def _select_centroids(yx, size, max_count, balance_grid=None):
+    """
+    (Internal helper) Picks at most `max_count` of the brightest-first centroids `yx`.
+    With `balance_grid` = N the frame is split into N x N cells and selection takes the
+    brightest star of every cell first, then the second brightest of every cell, and so
+    on (brightness order within each round), so a bright cluster cannot crowd out the
+    rest of the frame.
+    """
+    if not balance_grid or len(yx) <= max_count:
+        return yx[:max_count]
+    height, width = size[:2]
+    rows = np.clip((yx[:, 0] * balance_grid // height).astype(np.int64), 0, balance_grid - 1)
+    cols = np.clip((yx[:, 1] * balance_grid // width).astype(np.int64), 0, balance_grid - 1)
+    cells = rows * balance_grid + cols
+    # Rank of each star within its cell, using the existing brightness order.
+    by_cell = np.argsort(cells, kind='stable')
+    sorted_cells = cells[by_cell]
+    first_in_cell = np.searchsorted(sorted_cells, sorted_cells)
+    rank = np.empty(len(yx), dtype=np.int64)
+    rank[by_cell] = np.arange(len(yx)) - first_in_cell
+    order = np.lexsort((np.arange(len(yx)), rank))
+    return yx[order[:max_count]]
+
+# Progressive solve strategy. Stages run in order, starting with a cheap configuration
+# (few bright centroids, short timeout, tight FOV); a stage only runs if the previous one
+# ended with a status in SOLVE_ESCALATE_ON. Detection results are reused by all stages
+# sharing a sigma. The stage timeouts add up to the former single 10 s budget.
+# "balance_grid" optionally spreads the selected centroids over an N x N grid of the frame
+# (see _select_centroids).
+SOLVE_STAGES = [
+    {"name": "quick", "sigma": 6.0, "max_centroids": 12, "solve_timeout": 1000,
+     "fov_max_error": 3.0, "balance_grid": None},
+    {"name": "standard", "sigma": 6.0, "max_centroids": 30, "solve_timeout": 3000,
+     "fov_max_error": 8.0, "balance_grid": None},
+    {"name": "deep", "sigma": 4.0, "max_centroids": 50, "solve_timeout": 6000,
+     "fov_max_error": None, "balance_grid": 3},
+]
+SOLVE_ESCALATE_ON = (tetra3.NO_MATCH, tetra3.TOO_FEW, tetra3.TIMEOUT)
+
+# Running image_processor calls by image name. Each call is represented by its own token
+# (_new_solve_call) holding the SolveContext of its current stage, so concurrent calls
+# share T3_INSTANCE safely, and calls for the same image name stay separate entries.
+_RUNNING_SOLVES = {}
+_RUNNING_SOLVES_LOCK = threading.Lock()
+
+def _new_solve_call():
+    """(Internal helper) Token of one image_processor call, see _cancel_solve_call."""
+    return SimpleNamespace(context=None, cancelled=False)
+
+def _cancel_solve_call(call):
+    """(Internal helper) Cancels one call; a cancel before or between stages also holds."""
+    with _RUNNING_SOLVES_LOCK:
+        call.cancelled = True
+        if call.context is not None:
+            call.context.cancel()
+
+def cancel_image_processor(image_name):
+    """
+    Cancels the running image_processor calls for image_name; they return unsolved with
+    Tetra3 status CANCELLED. Returns True if such a call was running.
+    """
+    with _RUNNING_SOLVES_LOCK:
+        calls = list(_RUNNING_SOLVES.get(image_name, ()))
+    for call in calls:
+        _cancel_solve_call(call)
+    return len(calls) > 0
+
+# When set, every Tetra3 solve of image_processor records its statistics (search counters
+# and per-phase times, see tetra3.SOLVE_PHASES), appended as one JSON line per stage to
+# this file in the app files directory. Off (None) by default.
+SOLVE_STATISTICS_FILE = None
+_SOLVE_STATISTICS_LOCK = threading.Lock()
+
+def _record_solve_statistics(image_name, stage_name, solve_context, status):
+    """(Internal helper) Appends one stage's solve statistics to SOLVE_STATISTICS_FILE."""
+    path = os.path.join(_app_files_dir(), SOLVE_STATISTICS_FILE)
+    try:
+        with _SOLVE_STATISTICS_LOCK, open(path, "a") as f:
+            solve_context.write_statistics(f, image=image_name, stage=stage_name, status=status,
+                                           time=datetime.now(pytz.utc).isoformat())
+    except OSError as e:
+        print(f"Python: WARNING - Could not write solve statistics {path}: {e}")
+
+# When set, the inputs and result of every Tetra3 solve of image_processor are appended to
+# this solve corpus (see tetra3.solve_corpus) in the app files directory, so field failures
+# can be replayed with tetra3/cli/replay_solve_corpus.py. Off (None) by default.
+SOLVE_CORPUS_FILE = None
+_SOLVE_RECORDERS = {}
+_SOLVE_RECORDERS_LOCK = threading.Lock()
+
+def _solve_recorder():
+    """(Internal helper) The shared recorder for SOLVE_CORPUS_FILE, or None if it is not set."""
+    if SOLVE_CORPUS_FILE is None:
+        return None
+    path = os.path.join(_app_files_dir(), SOLVE_CORPUS_FILE)
+    with _SOLVE_RECORDERS_LOCK:
+        if path not in _SOLVE_RECORDERS:
+            try:
+                _SOLVE_RECORDERS[path] = tetra3.SolveRecorder(path)
+            except OSError as e:
+                print(f"Python: WARNING - Could not open solve corpus {path}: {e}")
+                return None
+        return _SOLVE_RECORDERS[path]
+
+def _image_processor(image_name, image_path, pitch_deg=None, roll_deg=0.0, gravity=None, time_iso=None):
     """
     Analyzes an image from a given file path to find celestial coordinates.
     This function replaces the mock function from the test script.
@@ -145,11 +829,59 @@ def image_processor(image_name, image_path):
     Args:
         image_name (str): The name of the image (used for logging).
         image_path (str): The absolute file path to the image.
+        pitch_deg (float, optional): Elevation of the camera axis above the horizon at
+            capture time. When given, ground and horizon glow are masked out before
+            detection (see horizon_mask). Defaults to None (no masking).
+        roll_deg (float, optional): Angle of the zenith direction in the image, measured
+            clockwise from image "up". Only used together with pitch_deg.
+        gravity (optional): Device accelerometer vector [x, y, z] at capture time (a list
+            or its JSON string, see camera_up_vector). When given, the solution includes
+            an altitude for every matched star ("star_observations", each with ra, dec,
+            alt, time_iso and a weight of 1/count so that one image counts as one sight
+            in solve_iterative) and "boresight_altitude_deg"; pitch/roll for the horizon
+            mask are also taken from it unless pitch_deg is given. The entries can be
+            passed to solve_iterative as they are; pressure and temperature for the
+            refraction correction are its pressure_hpa/temperature_c arguments.
+        time_iso (str, optional): Capture time (ISO-8601 with a UTC offset, see
+            almanac.utc_microseconds). Defaults to the EXIF capture time of the file;
+            when neither is known the star_observations entries have no time_iso and
+            the caller must add it before solve_iterative.
 
     Returns:
-        str: A JSON string containing the solution or an error message.
+        dict: The solution or an error message (a JSON string from image_processor).
              Example success: '{"solved": 1, "ra_deg": 216.4, "dec_deg": 15.8, "error_message": null}'
              Example failure: '{"solved": 0, "error_message": "Image file not found"}'
+             "stages" lists each SOLVE_STAGES attempt with its sigma, centroid count,
+             Tetra3 status and solve time in ms.
+             Solutions and detected centroids are kept in the SolveCache; a solution
+             served from it has "cached": true.
+    """
+    steps = _image_processor_steps(image_name, image_path, pitch_deg, roll_deg, gravity, time_iso)
+    request, result = _advance_image_processor(steps)
+    while request is not None:
+        sigma, detect_hot_pixels = request
+        request, result = _advance_image_processor(
+            steps, detect_centroids_cli(image_path, sigma=sigma, detect_hot_pixels=detect_hot_pixels))
+    return result
+
+def _advance_image_processor(steps, cedar_result=None):
+    """
+    (Internal helper) Runs _image_processor_steps up to its next Cedar Detect request,
+    first sending it cedar_result (the answer to the previous one). Returns (request,
+    None), or (None, result dict) once it has finished.
+    """
+    try:
+        return steps.send(cedar_result), None
+    except StopIteration as stop:
+        return None, stop.value
+
+def _image_processor_steps(image_name, image_path, pitch_deg, roll_deg, gravity, time_iso, call=None):
+    """
+    (Internal helper) _image_processor as a generator that leaves running cedar_cli to
+    its driver: it yields (sigma, detect_hot_pixels) whenever it needs a detection that
+    is not in the solve cache, expects the detect_centroids_cli result dict back, and
+    returns the result dict. _image_processor drives it synchronously, solve_async with
+    detect_async. call is the token (_new_solve_call) the driver cancels this call with.
     """
     print(f"Python: image_processor received image name: {image_name}")
     print(f"Python: image_processor received image path: {image_path}")
@@ -158,89 +890,205 @@ def image_processor(image_name, image_path):
     if T3_INSTANCE is None:
         error_msg = INITIALIZATION_ERROR or "Tetra3 Solver is not initialized."
         print(f"Python: Error - {error_msg}")
-        return json.dumps({"solved": 0, "error_message": error_msg})
+        return {"solved": 0, "error_message": error_msg}
 
     if not os.path.exists(image_path):
         error_msg = f"Image file does not exist at path: {image_path}"
         print(f"Python: Error - {error_msg}")
-        return json.dumps({"solved": 0, "error_message": error_msg})
+        return {"solved": 0, "error_message": error_msg}
 
     # --- Main Processing Logic ---
+    call = call or _new_solve_call()
+    with _RUNNING_SOLVES_LOCK:
+        _RUNNING_SOLVES.setdefault(image_name, []).append(call)
+    solve_context = None
     try:
+        if isinstance(gravity, str):
+            gravity = json.loads(gravity)
+        capture_time = time_iso or _capture_time_iso(image_path)
+        cache = SolveCache.default() if SolveCache.MAX_ENTRIES > 0 else None
+        if cache is not None:
+            image_digest = _file_digest(image_path)
+            result_key = SolveCache.key(image_digest, pitch_deg, roll_deg, gravity, capture_time,
+                                        HORIZON_MASK_MIN_ALTITUDE_DEG, CAMERA_FOV_DEG, SOLVE_STAGES,
+                                        database_fingerprint())
+            cached = cache.get("result", result_key)
+            if cached is not None:
+                print("Python: Solution taken from the solve cache.")
+                cached["cached"] = True
+                return cached
+
         print(f"Python: Opening image: {image_path}...")
         with Image.open(image_path) as img:
             orig_width, orig_height = img.width, img.height
-            # H-12: Cap image resolution to avoid excessive memory usage
-            MAX_DIM = 4000
-            ratio = 1.0
-            if img.width > MAX_DIM or img.height > MAX_DIM:
-                ratio = min(MAX_DIM / img.width, MAX_DIM / img.height)
-                new_size = (int(img.width * ratio), int(img.height * ratio))
-                print(f"Python: Downscaling image from {img.width}x{img.height} to {new_size[0]}x{new_size[1]}")
-                img = img.resize(new_size, Image.LANCZOS)
-            img_gray = img.convert(mode='L')
-            np_image = np.asarray(img_gray, dtype=np.uint8)
-            height, width = np_image.shape
-        print(f"Python: Image loaded successfully ({width}x{height}).")
 
-        centroids = []
+        up = None
+        if gravity is not None:
+            up = camera_up_vector(gravity, _image_orientation(image_path))
+            if pitch_deg is None:
+                pitch_deg, roll_deg = up_vector_pitch_roll(up)
 
-        print("Python: Extracting centroids using Cedar Detect CLI...")
-        cedar_result = detect_centroids_cli(image_path)
+        defect_map = SensorDefectMap.for_sensor((orig_height, orig_width))
 
-        if "error" in cedar_result:
-            print(f"Python: Cedar Detect CLI error: {cedar_result['error']}")
-            if "output" in cedar_result:
-                print(f"Python: CLI output: {cedar_result['output']}")
-            print("Python: Falling back to default Tetra3 extraction...")
-            centroids = tetra3.get_centroids_from_image(np_image)
-            if ratio != 1.0:
-                centroids = [(c[0] / ratio, c[1] / ratio) for c in centroids]
-        else:
-            # Cedar Detect CLI returns a dict with "stars" list of points
-            # Each point has x, y, brightness
-            if "stars" in cedar_result:
-                # Convert to list of (y, x) tuples as expected by Tetra3 solver (or check what it expects)
-                # Tetra3's solve_from_centroids expects a list of (y, x) tuples or [y, x] lists.
-                # Note: Cedar returns x, y. Tetra3 usually works with (y, x) (row, col).
-                # Let's verify: tetra3.get_centroids_from_image returns (y, x).
-                # So we need to swap x and y from Cedar result.
-                cedar_stars = cedar_result["stars"]
-                centroids = [(star["y"], star["x"]) for star in cedar_stars]
-                print(f"Python: Cedar Detect found {len(centroids)} centroids.")
+        def load_masked_image():
+            """
+            Decodes the image for the Tetra3 fallback extraction (Cedar reads the file
+            itself). Returns (np_image, sky_mask, ratio).
+            """
+            np_image, _, ratio = _load_grayscale_image(image_path)
+            height, width = np_image.shape
+            print(f"Python: Image loaded successfully ({width}x{height}).")
+            sky_mask = None
+            if pitch_deg is not None:
+                sky_mask = horizon_mask((height, width), float(pitch_deg), float(roll_deg))
+                print(f"Python: Horizon mask keeps {100.0 * sky_mask.mean():.1f}% of the image.")
+            if len(defect_map.defect_cells) > 0:
+                defect_mask = defect_map.mask((height, width))
+                sky_mask = defect_mask if sky_mask is None else sky_mask & defect_mask
+            return np_image, sky_mask, ratio
+
+        def cached_stars(request):
+            """
+            Stars of an earlier Cedar Detect run on this image with the same (sigma,
+            detect_hot_pixels) request, from the solve cache; None if there is none.
+            """
+            if cache is None:
+                return None
+            stored = cache.get("detection", SolveCache.key(image_digest, *request))
+            if stored is None:
+                return None
+            print(f"Python: Cedar stars (sigma {request[0]}) taken from the solve cache.")
+            return (np.asarray(stored["yx"], dtype=np.float64).reshape(-1, 2),
+                    np.asarray(stored["brightness"], dtype=np.float64))
+
+        def cedar_stars(request, cedar_result):
+            """
+            Stars found by Cedar Detect, before any masking, as (yx, brightness) numpy
+            arrays from its result dict; None if Cedar failed. Only successful detections
+            are kept in the solve cache, so a transient Cedar failure is retried.
+            """
+            if "error" in cedar_result or "stars" not in cedar_result:
+                if "error" in cedar_result:
+                    print(f"Python: Cedar Detect CLI error: {cedar_result['error']}")
+                    if "output" in cedar_result:
+                        print(f"Python: CLI output: {cedar_result['output']}")
+                else:
+                    print("Python: Cedar Detect returned no stars data.")
+                return None
+            # Cedar Detect CLI returns a dict with "stars" list of points, each with x, y and
+            # brightness. Tetra3 works in (y, x) (row, col), so swap x and y.
+            stars = np.array([(star["y"], star["x"], star.get("brightness", 0.0))
+                              for star in cedar_result["stars"]], dtype=np.float64).reshape(-1, 3)
+            if cache is not None:
+                cache.put("detection", SolveCache.key(image_digest, *request),
+                          {"yx": stars[:, :2].tolist(), "brightness": stars[:, 2].tolist()})
+            return stars[:, :2], stars[:, 2]
+
+        def detect(sigma, stars):
+            """
+            Masks and ranks the Cedar stars found at the given sigma, or falls back to
+            Tetra3's extraction when stars is None; results are kept per sigma for this
+            call. Returns (yx, brightness) numpy arrays, brightest first, with duplicates
+            removed.
+            """
+            if stars is None:
+                if "tetra3" not in detections:
+                    print("Python: Falling back to default Tetra3 extraction...")
+                    np_image, sky_mask, ratio = load_masked_image()
+                    yx, moments = tetra3.get_centroids_from_image(
+                        np_image, mask=sky_mask, return_moments=True)
+                    yx = np.asarray(yx, dtype=np.float64).reshape(-1, 2) / ratio
+                    brightness = np.asarray(moments[0], dtype=np.float64).reshape(-1)
+                    detections["tetra3"] = _rank_centroids(yx, brightness)
+                # The fallback extraction has no sigma to escalate; reuse it for every stage.
+                detections[sigma] = detections["tetra3"]
+                return detections[sigma]
+
+            yx, brightness = stars
+            print(f"Python: Cedar Detect found {len(yx)} centroids.")
+            keep = np.ones(len(yx), dtype=bool)
+            if pitch_deg is not None and len(yx) > 0:
+                # Cedar ran on the full-resolution file, so test each star directly.
+                alts = _pixel_altitudes_deg(yx[:, 0], yx[:, 1], (orig_height, orig_width),
+                                            CAMERA_FOV_DEG, float(pitch_deg), float(roll_deg))
+                keep &= alts >= HORIZON_MASK_MIN_ALTITUDE_DEG
+            # Sky detections including known defects, so the defect map keeps seeing them.
+            sky_detections[sigma] = yx[keep]
+            keep &= ~defect_map.is_defect(yx)
+            detections[sigma] = _rank_centroids(yx[keep], brightness[keep])
+            print(f"Python: Kept {len(detections[sigma][0])} Cedar centroids after masking.")
+            return detections[sigma]
+
+        detections = {}
+        sky_detections = {}
+        stage_reports = []
+        solution = None
+        centroids_list = []
+        trimmed_centroids = []
+        for stage in SOLVE_STAGES:
+            if stage_reports:
+                prev = stage_reports[-1]
+                if prev["status"] not in SOLVE_ESCALATE_ON:
+                    break
+            solve_context = tetra3.SolveContext()
+            with _RUNNING_SOLVES_LOCK:
+                # A cancel that reached this call before or between stages still applies.
+                if call.cancelled:
+                    solve_context.cancel()
+                call.context = solve_context
+            sigma = stage["sigma"]
+            if sigma in detections:
+                yx, brightness = detections[sigma]
             else:
-                print("Python: Cedar Detect returned no stars data.")
-                centroids = tetra3.get_centroids_from_image(np_image)
-                if ratio != 1.0:
-                    centroids = [(c[0] / ratio, c[1] / ratio) for c in centroids]
-
-        if len(centroids) == 0:
+                request = (sigma, not defect_map.is_mature)
+                stars = cached_stars(request)
+                if stars is None:
+                    print(f"Python: Extracting centroids using Cedar Detect CLI (sigma {sigma})...")
+                    stars = cedar_stars(request, (yield request))
+                yx, brightness = detect(sigma, stars)
+            # tolist() gives native Python floats for JSON serialization
+            centroids_list = yx.tolist()
+            trimmed_centroids = _select_centroids(
+                yx, (orig_height, orig_width), stage["max_centroids"],
+                stage["balance_grid"]).tolist()
+            if stage_reports and prev["status"] == tetra3.TOO_FEW \
+                    and prev["centroids"] == len(trimmed_centroids):
+                # Same too-small star set again; only a more sensitive detection can help.
+                continue
+            print(f"Python: Stage '{stage['name']}': found {len(yx)} centroids, "
+                  f"using {len(trimmed_centroids)} for solving.")
+
+            solution = T3_INSTANCE.solve_from_centroids(
+                trimmed_centroids,
+                (orig_height, orig_width),
+                fov_estimate=CAMERA_FOV_DEG,
+                fov_max_error=stage["fov_max_error"],
+                solve_timeout=stage["solve_timeout"],
+                return_matches=True,
+                context=solve_context,
+                return_statistics=SOLVE_STATISTICS_FILE is not None,
+                recorder=_solve_recorder()
+            )
+            if SOLVE_STATISTICS_FILE is not None:
+                _record_solve_statistics(image_name, stage["name"], solve_context,
+                                         solution.get('status'))
+            stage_reports.append({
+                "stage": stage["name"],
+                "sigma": stage["sigma"],
+                "centroids": len(trimmed_centroids),
+                "status": solution.get('status'),
+                "t_solve_ms": solution.get('T_solve')
+            })
+            print(f"Python: Stage '{stage['name']}' status {solution.get('status')} "
+                  f"after {solution.get('T_solve', 0):.0f} ms.")
+
+        if not centroids_list:
             print("Python: No centroids found in the image.")
-            return json.dumps({"solved": 0, "error_message": "No stars (centroids) found in image."})
-
-        # Use the 30 brightest centroids for solving
-        # If we used Cedar, they might not be sorted by brightness.
-        # If we used Tetra3, they are sorted.
-        # We can sort by brightness if we had it, but for now just taking first 30 is usually okay if Cedar returns them in order.
-        # Cedar CLI usually returns them sorted by brightness descending.
-
-        # Convert to list of lists if it's not already compatible
-        # Ensure elements are native Python floats, not np.float32, for JSON serialization
-        centroids_list = [[float(c[0]), float(c[1])] for c in centroids]
-
-        trimmed_centroids = centroids_list[:30]
-        print(f"Python: Found {len(centroids)} centroids, using {len(trimmed_centroids)} for solving.")
-
-        # Solve for astrometry
-        solution = T3_INSTANCE.solve_from_centroids(
-            trimmed_centroids,
-            (orig_height, orig_width),
-            fov_estimate=53,
-            solve_timeout=10000  # 10-second timeout
-        )
+            return {"solved": 0, "stages": stage_reports,
+                    "error_message": "No stars (centroids) found in image."}
 
         print("Python: Tetra3 solving complete.")
-        if solution.get('RA') is not None:
+        if solution is not None and solution.get('RA') is not None:
             final_result = {
                 "solved": 1,
                 "ra_deg": solution.get('RA'),
@@ -248,17 +1096,198 @@ def image_processor(image_name, image_path):
                 "roll_deg": solution.get('Roll'),
                 "fov_deg": solution.get('FOV'),
                 "centroids": trimmed_centroids,
+                "stages": stage_reports,
                 "error_message": None
             }
             print(f"Python: Solution FOUND: RA={final_result['ra_deg']:.4f}, Dec={final_result['dec_deg']:.4f}")
-            return json.dumps(final_result)
+            if up is not None:
+                matched_stars = np.asarray(solution['matched_stars'], dtype=np.float64).reshape(-1, 3)
+                alts = star_altitudes_deg(solution['matched_centroids'], (orig_height, orig_width),
+                                          solution['FOV'], solution.get('distortion'), up)
+                final_result["boresight_altitude_deg"] = float(np.rad2deg(np.arcsin(np.clip(up[2], -1.0, 1.0))))
+                final_result["star_observations"] = [
+                    {"ra": float(ra), "dec": float(dec), "alt": float(alt), "weight": 1.0 / len(alts)}
+                    for (ra, dec, _), alt in zip(matched_stars, alts)]
+                if capture_time is not None:
+                    final_result["capture_utc_ms"] = almanac.utc_microseconds(capture_time) / 1000.0
+                    for obs in final_result["star_observations"]:
+                        obs["time_iso"] = capture_time
+                else:
+                    print("Python: WARNING - No capture time; star_observations have no time_iso.")
+                print(f"Python: Derived altitudes for {len(alts)} matched stars.")
+            # Only Cedar detections teach the defect map: the Tetra3 fallback extracts from
+            # an image with the known defects masked out, so they would seem to have gone.
+            solved_sigma = stage_reports[-1]["sigma"]
+            if solved_sigma in sky_detections:
+                try:
+                    SensorDefectMap.update_for_sensor(
+                        (orig_height, orig_width),
+                        _unmatched_centroids(sky_detections[solved_sigma], solution['matched_centroids']),
+                        final_result['ra_deg'], final_result['dec_deg'])
+                except Exception as e:
+                    print(f"Python: WARNING - Could not update sensor defect map: {e}")
+            if cache is not None:
+                cache.put("result", result_key, final_result)
+            return final_result
         else:
-            print(f"Python: Solution NOT found. Status: {solution.get('status', 'Unknown')}")
-            return json.dumps({"solved": 0, "centroids": trimmed_centroids, "error_message": f"No match found. Tetra3 status: {solution.get('status')}"})
+            status = solution.get('status') if solution is not None else tetra3.TOO_FEW
+            print(f"Python: Solution NOT found. Status: {status}")
+            return {"solved": 0, "centroids": trimmed_centroids, "stages": stage_reports,
+                    "error_message": f"No match found. Tetra3 status: {status}"}
 
     except Exception as e:
         error_msg = f"An exception occurred in image_processor: {e}"
         print(f"Python: {error_msg}\n{traceback.format_exc()}")
+        return {"solved": 0, "error_message": error_msg}
+    finally:
+        with _RUNNING_SOLVES_LOCK:
+            calls = _RUNNING_SOLVES[image_name]
+            calls.remove(call)
+            if not calls:
+                del _RUNNING_SOLVES[image_name]
+
+def image_processor(image_name, image_path, pitch_deg=None, roll_deg=0.0, gravity=None, time_iso=None):
+    """_image_processor's result as a JSON string (see image_processor_binary for arrays)."""
+    return json.dumps(_image_processor(image_name, image_path, pitch_deg, roll_deg, gravity, time_iso))
+
+
+
+# --- Burst Capture Stacking ---
+
+# Brightest centroids of each frame used to register it against the first frame.
+BURST_ALIGN_STARS = 25
+# Initial matching radius as a fraction of image width; generous enough for a small
+# handheld roll between frames, tightened after the first rigid fit.
+BURST_ALIGN_RADIUS = 0.03
+
+def _fit_rigid_transform(src, dst):
+    """(Internal helper) Least-squares 2D rotation R and translation t with dst ~ R @ src + t."""
+    src_mean = src.mean(axis=0)
+    dst_mean = dst.mean(axis=0)
+    H = (src - src_mean).T @ (dst - dst_mean)
+    U, _, Vt = np.linalg.svd(H)
+    R = Vt.T @ U.T
+    if np.linalg.det(R) < 0:
+        Vt[-1, :] *= -1
+        R = Vt.T @ U.T
+    return R, dst_mean - R @ src_mean
+
+def _estimate_frame_transform(ref_centroids, centroids, width):
+    """
+    (Internal helper) Registers a frame against the reference frame by cross-matching
+    centroids. Returns (R, t, num_matches) mapping frame (y, x) onto reference (y, x),
+    or None if too few stars match.
+    """
+    from scipy.spatial import cKDTree
+    ref = np.asarray(ref_centroids, dtype=np.float64)[:BURST_ALIGN_STARS]
+    cur = np.asarray(centroids, dtype=np.float64)[:BURST_ALIGN_STARS]
+    if len(ref) < 3 or len(cur) < 3:
+        return None
+    ref_tree = cKDTree(ref)
+    radius = BURST_ALIGN_RADIUS * width
+
+    # Vote over every candidate translation (reference star minus frame star) at once.
+    shifts = (ref[:, None, :] - cur[None, :, :]).reshape(-1, 2)
+    shifted = (cur[None, :, :] + shifts[:, None, :]).reshape(-1, 2)
+    dist, _ = ref_tree.query(shifted, distance_upper_bound=radius)
+    votes = np.isfinite(dist).reshape(len(shifts), len(cur)).sum(axis=1)
+    R, t = np.eye(2), shifts[np.argmax(votes)]
+
+    # Refine to a rigid transform, tightening the radius once the roll is accounted for.
+    for match_radius in (radius, radius / 4):
+        dist, ref_idx = ref_tree.query(cur @ R.T + t, distance_upper_bound=match_radius)
+        matched = np.isfinite(dist)
+        if np.count_nonzero(matched) < 3:
+            return None
+        R, t = _fit_rigid_transform(cur[matched], ref[ref_idx[matched]])
+    return R, t, int(np.count_nonzero(matched))
+
+def burst_processor(image_name, image_paths_json, pitch_deg=None, roll_deg=0.0, gravity=None,
+                    time_iso=None):
+    """
+    Stacks a burst of short exposures and solves the stacked image.
+
+    The first frame is the reference. Every following frame is loaded on its own,
+    registered against the reference by cross-matching its brightest centroids
+    (rotation + translation), resampled into the reference frame and added to a
+    running sum, so only one frame is held in memory at a time. The mean image (the sum
+    divided by the number of frames covering each pixel) is written to the cache
+    directory as a 16-bit PNG, so the precision gained by stacking is kept, and passed
+    to image_processor.
+
+    Args:
+        image_name (str): The name of the burst (used for logging).
+        image_paths_json (str): JSON list of absolute image paths, first frame first.
+        pitch_deg, roll_deg, gravity: Device orientation, passed on to image_processor.
+            The stacked image keeps the EXIF orientation of the first frame, which
+            gravity is interpreted against.
+        time_iso (str, optional): Capture time, passed on to image_processor. Defaults
+            to the EXIF capture time of the first frame, the one the stack is aligned to.
+
+    Returns:
+        str: The image_processor JSON result for the stacked image, with an extra
+             "burst" entry: {"frames", "stacked", "skipped"}.
+    """
+    print(f"Python: burst_processor received burst: {image_name}")
+    try:
+        image_paths = json.loads(image_paths_json)
+        if len(image_paths) == 0:
+            return json.dumps({"solved": 0, "error_message": "Burst contains no frames."})
+
+        ref_image, _, _ = _load_grayscale_image(image_paths[0])
+        height, width = ref_image.shape
+        ref_centroids = tetra3.get_centroids_from_image(ref_image, max_returned=BURST_ALIGN_STARS)
+        stack_sum = ref_image.astype(np.float32)
+        coverage = np.ones((height, width), dtype=np.float32)
+        del ref_image
+        stacked = 1
+        skipped = []
+
+        for path in image_paths[1:]:
+            frame, _, _ = _load_grayscale_image(path)
+            if frame.shape != (height, width):
+                print(f"Python: Skipping burst frame {path}: size mismatch")
+                skipped.append(path)
+                continue
+            frame_centroids = tetra3.get_centroids_from_image(frame, max_returned=BURST_ALIGN_STARS)
+            fit = _estimate_frame_transform(ref_centroids, frame_centroids, width)
+            if fit is None:
+                print(f"Python: Skipping burst frame {path}: could not register against reference")
+                skipped.append(path)
+                continue
+            R, t, num_matches = fit
+            # affine_transform maps output (reference) pixel indices to input indices:
+            # p = R^T (q - t'), with t' correcting for centroids being pixel-centre based.
+            t_index = t + R @ np.array([0.5, 0.5]) - 0.5
+            warped = scipy.ndimage.affine_transform(
+                frame.astype(np.float32), R.T, offset=-R.T @ t_index,
+                output_shape=(height, width), order=1, cval=np.nan)
+            del frame
+            valid = ~np.isnan(warped)
+            stack_sum += np.where(valid, warped, 0.0)
+            coverage += valid
+            stacked += 1
+            print(f"Python: Stacked burst frame {path} ({num_matches} stars matched, "
+                  f"shift {np.hypot(*t):.1f} px, rotation {math.degrees(math.atan2(R[1, 0], R[0, 0])):.3f} deg)")
+
+        stacked_image = np.rint(np.clip(stack_sum / coverage, 0, 255) * DN_SCALE_16BIT).astype(np.uint16)
+        del stack_sum, coverage
+        burst_id = os.path.splitext(os.path.basename(image_paths[0]))[0]
+        stacked_path = os.path.join(_app_cache_dir(), f"burst_{burst_id}.png")
+        exif = Image.Exif()
+        exif[0x0112] = _image_orientation(image_paths[0])
+        Image.fromarray(stacked_image).save(stacked_path, exif=exif)
+        print(f"Python: Stacked {stacked}/{len(image_paths)} burst frames into {stacked_path}")
+
+        if time_iso is None:
+            time_iso = _capture_time_iso(image_paths[0])
+        result = _image_processor(image_name, stacked_path, pitch_deg, roll_deg, gravity, time_iso)
+        result["burst"] = {"frames": len(image_paths), "stacked": stacked, "skipped": skipped}
+        return json.dumps(result)
+
+    except Exception as e:
+        error_msg = f"An exception occurred in burst_processor: {e}"
+        print(f"Python: {error_msg}\n{traceback.format_exc()}")
         return json.dumps({"solved": 0, "error_message": error_msg})
 
 
@@ -269,11 +1298,7 @@ def image_processor(image_name, image_path):
 def _calculate_dip_correction_deg(height_of_eye_m):
     """(Internal helper) Calculates the dip correction in degrees."""
     # If height of eye is 0 (e.g. artificial horizon or calibrated sensor), dip is 0.
-    if height_of_eye_m <= 0:
-        return 0.0
-    # Formula: dip in arcminutes = 1.758 * sqrt(height in meters)
-    dip_arcmin = 1.758 * math.sqrt(float(height_of_eye_m))
-    return dip_arcmin / 60.0
+    return float(corrections.dip_deg(height_of_eye_m))
 
 def _calculate_gp(ra, dec, observation_time):
     """
@@ -293,7 +1318,12 @@ def _calculate_gp(ra, dec, observation_time):
     return gp_lat, gp_lon
 
 
-def lop_compute(
+@functools.lru_cache(maxsize=16)
+def _timezone(timezone_str):
+    """(Internal helper) Cached pytz timezone lookup."""
+    return pytz.timezone(timezone_str)
+
+def _lop_compute(
     ra_from_image,
     dec_from_image,
     estimated_latitude,
@@ -304,12 +1334,14 @@ def lop_compute(
     sextant_altitude_deg,
     local_date_str,
     local_time_str,
-    timezone_str
+    timezone_str,
+    refraction_model=None
 ):
     """
     Calculates the intercept from a celestial observation.
-    This function replaces the mock function from the test script and uses
-    the real astropy-based calculation logic.
+    The star's Earth-fixed apparent place comes from the offline almanac (astropy
+    when outside its window, see earth_fixed_places); altitude and azimuth at the
+    assumed position from fast_altaz.
 
     Args:
         ra_from_image (float): Right Ascension from the image solver.
@@ -323,9 +1355,10 @@ def lop_compute(
         local_date_str (str): Local date of observation ("YYYY-MM-DD").
         local_time_str (str): Local time of observation ("HH:MM:SS.fff").
         timezone_str (str): Observer's IANA timezone (e.g., 'Europe/Paris').
+        refraction_model (str, optional): See refraction_for; defaults to REFRACTION_MODEL.
 
     Returns:
-        str: A JSON string with the calculation results or an error.
+        dict: The calculation results or an error (a JSON string from lop_compute).
              Example success: '{"intercept_nm": -2.5, "azimuth_deg": 245.1, "error": null}'
              Example failure: '{"error": "Invalid timezone specified"}'
     """
@@ -342,32 +1375,18 @@ def lop_compute(
         except ValueError:
             naive_dt = datetime.strptime(local_datetime_str, "%Y-%m-%d %H:%M:%S")
 
-        local_tz = pytz.timezone(timezone_str)
+        local_tz = _timezone(timezone_str)
         utc_dt = local_tz.localize(naive_dt).astimezone(pytz.utc)
 
-        # 3. Set up Astropy objects for calculation.
-        observation_time = Time(utc_dt)
-        observer_location = EarthLocation(
-            lat=estimated_latitude * u.deg,
-            lon=estimated_longitude * u.deg,
-            height=height_of_eye_m * u.m
-        )
-        celestial_body = SkyCoord(
-            ra=ra_from_image * u.deg,
-            dec=dec_from_image * u.deg,
-            frame='icrs'
-        )
-        altaz_frame = AltAz(
-            obstime=observation_time,
-            location=observer_location,
-            pressure=pressure_hpa * u.hPa,
-            temperature=temperature_celsius * u.deg_C
-        )
+        # 3. Resolve the star to its Earth-fixed apparent place.
+        gha_deg, dec_deg, ephemeris = earth_fixed_places(
+            [float(ra_from_image)], [float(dec_from_image)], [almanac.utc_microseconds(utc_dt)])
 
         # 4. Calculate Computed Altitude (Hc) and Azimuth (Zn).
-        body_in_local_sky = celestial_body.transform_to(altaz_frame)
-        hc_deg = body_in_local_sky.alt.degree
-        azimuth_deg = body_in_local_sky.az.degree
+        hc, az = fast_altaz(gha_deg, dec_deg, float(estimated_latitude), float(estimated_longitude),
+                            refraction_for(pressure_hpa, temperature_celsius, refraction_model))
+        hc_deg = float(hc[0])
+        azimuth_deg = float(az[0])
 
         # 5. Calculate intercept (difference between Ho and Hc in nautical miles).
         intercept_nm = (ho_deg - hc_deg) * 60.0
@@ -377,14 +1396,81 @@ def lop_compute(
             'azimuth_deg': azimuth_deg,
             'observed_altitude_deg': ho_deg,
             'computed_altitude_deg': hc_deg,
+            'ephemeris': ephemeris,
             'error': None
         }
         print(f"Python: lop_compute successful. Intercept: {intercept_nm:.2f} NM")
-        return json.dumps(result)
+        return result
 
     except Exception as e:
         error_msg = f"An exception occurred in lop_compute: {e}"
         print(f"Python: {error_msg}\n{traceback.format_exc()}")
+        return {'error': error_msg}
+
+def lop_compute(ra_from_image, dec_from_image, estimated_latitude, estimated_longitude, height_of_eye_m,
+                pressure_hpa, temperature_celsius, sextant_altitude_deg, local_date_str, local_time_str,
+                timezone_str, refraction_model=None):
+    """_lop_compute's result as a JSON string (see lop_compute_binary for arrays)."""
+    return json.dumps(_lop_compute(ra_from_image, dec_from_image, estimated_latitude, estimated_longitude,
+                                   height_of_eye_m, pressure_hpa, temperature_celsius, sextant_altitude_deg,
+                                   local_date_str, local_time_str, timezone_str, refraction_model))
+
+
+def lop_compute_batch(
+    ra_deg,
+    dec_deg,
+    sextant_altitude_deg,
+    epoch_ms,
+    estimated_latitude,
+    estimated_longitude,
+    height_of_eye_m,
+    pressure_hpa,
+    temperature_celsius,
+    refraction_model=None
+):
+    """
+    Vectorized lop_compute for many sights from one assumed position.
+
+    Args:
+        ra_deg, dec_deg (sequence of float): Star coordinates from the image solver.
+        sextant_altitude_deg (sequence of float): Raw measured altitudes.
+        epoch_ms (sequence of int): Observation instants in milliseconds since
+            1970-01-01 UTC (e.g. Kotlin's System.currentTimeMillis()).
+        estimated_latitude, estimated_longitude, height_of_eye_m, pressure_hpa,
+        temperature_celsius, refraction_model: As for lop_compute.
+
+    Any sequence works, including Java primitive arrays passed through Chaquopy.
+
+    Returns:
+        str: A JSON string with arrays intercept_nm, azimuth_deg, observed_altitude_deg
+             and computed_altitude_deg (one entry per sight), ephemeris and error.
+    """
+    try:
+        ra_deg = np.asarray(ra_deg, dtype=float)
+        dec_deg = np.asarray(dec_deg, dtype=float)
+        utc_us = np.asarray(epoch_ms, dtype=np.int64) * 1000
+        ho_deg = np.asarray(sextant_altitude_deg, dtype=float) - _calculate_dip_correction_deg(height_of_eye_m)
+        if not (len(ra_deg) == len(dec_deg) == len(ho_deg) == len(utc_us)):
+            raise ValueError("All sight arrays must have the same length")
+
+        gha_deg, app_dec_deg, ephemeris = earth_fixed_places(ra_deg, dec_deg, utc_us)
+        intercept_nm, azimuth_deg = fast_compute_intercepts(
+            gha_deg, app_dec_deg, float(estimated_latitude), float(estimated_longitude), ho_deg,
+            refraction_for(pressure_hpa, temperature_celsius, refraction_model))
+
+        print(f"Python: lop_compute_batch computed {len(ho_deg)} intercepts.")
+        return json.dumps({
+            'intercept_nm': intercept_nm.tolist(),
+            'azimuth_deg': azimuth_deg.tolist(),
+            'observed_altitude_deg': ho_deg.tolist(),
+            'computed_altitude_deg': (ho_deg - intercept_nm / 60.0).tolist(),
+            'ephemeris': ephemeris,
+            'error': None
+        })
+
+    except Exception as e:
+        error_msg = f"An exception occurred in lop_compute_batch: {e}"
+        print(f"Python: {error_msg}\n{traceback.format_exc()}")
         return json.dumps({'error': error_msg})
 
 
@@ -392,7 +1478,7 @@ def lop_compute(
 # SECTION 3: POSITION FIX CALCULATION
 # =============================================================================
 
-def lop_center_compute(lop_1_json, lop_2_json, lop_3_json, estimated_latitude, estimated_longitude):
+def _lop_center_compute(lop_1_json, lop_2_json, lop_3_json, estimated_latitude, estimated_longitude):
     """
     Calculates the final position fix from three LOPs using the method of least squares.
     This method finds the point that is closest to all three lines of position, which
@@ -406,7 +1492,9 @@ def lop_center_compute(lop_1_json, lop_2_json, lop_3_json, estimated_latitude, e
         estimated_longitude (float): The assumed longitude used for the LOP calculations.
 
     Returns:
-        str: A JSON string with the calculated fix or an error message.
+        dict: The calculated fix or an error message (a JSON string from lop_center_compute).
+             error_estimate_nm is the radial 1-sigma error from the fix covariance
+             (covariance_nm2, north/east in NM^2), also given as an error_ellipse.
     """
     print("Python: lop_center_compute called.")
     try:
@@ -427,14 +1515,14 @@ def lop_center_compute(lop_1_json, lop_2_json, lop_3_json, estimated_latitude, e
         # assumed position. The equation for each LOP is:
         # intercept = d_east * sin(azimuth) + d_north * cos(azimuth)
 
-        # Set up the matrix 'A' and vector 'b' for the system Ax = b
-        A = np.array([
-            [np.sin(az), np.cos(az)] for az in azimuths_rad
-        ])
+        # Set up the matrix 'A' and vector 'b' for the system Ax = b, scaled by the
+        # square root of the optional per-LOP weights
+        A = np.column_stack((np.sin(azimuths_rad), np.cos(azimuths_rad)))
         b = intercepts
+        sqrt_w = np.sqrt(np.array([lop.get('weight', 1.0) for lop in lops], dtype=float))
 
         # Use numpy's least-squares solver to find x = [d_east, d_north]
-        correction, residuals, rank, s = np.linalg.lstsq(A, b, rcond=None)
+        correction, residuals, rank, s = np.linalg.lstsq(A * sqrt_w[:, None], b * sqrt_w, rcond=None)
         d_east_nm, d_north_nm = correction[0], correction[1]
 
         # --- 3. Apply correction to assumed position ---
@@ -448,31 +1536,41 @@ def lop_center_compute(lop_1_json, lop_2_json, lop_3_json, estimated_latitude, e
         fixed_longitude = estimated_longitude + lon_correction_deg
 
         # --- 4. Estimate the error ---
-        # The residual is the sum of squared errors. A good error estimate is the
-        # Root Mean Square Error (RMSE) of the distances from the fix to each LOP.
-        if residuals.size > 0:
-            # The number of degrees of freedom is (number of LOPs - number of variables)
-            degrees_of_freedom = len(lops) - 2
-            if degrees_of_freedom > 0:
-                error_estimate_nm = np.sqrt(residuals[0] / degrees_of_freedom)
-            else:
-                error_estimate_nm = 0.0 # Cannot estimate error with 2 or fewer LOPs
-        else:
-            # If there are no residuals, the solution perfectly fits the LOPs (they intersect at one point).
-            error_estimate_nm = 0.0
+        # Covariance of the correction: residual variance times (A^T W A)^-1. The
+        # number of degrees of freedom is (number of LOPs - number of variables).
+        degrees_of_freedom = len(lops) - 2
+        covariance_nm2 = None
+        error_estimate_nm = 0.0  # Cannot estimate error with 2 or fewer LOPs
+        if degrees_of_freedom > 0:
+            weighted_residuals = (b - A @ correction) * sqrt_w
+            variance = float(weighted_residuals @ weighted_residuals) / degrees_of_freedom
+            Aw = A * sqrt_w[:, None]
+            cov_en = variance * np.linalg.pinv(Aw.T @ Aw)
+            # Reorder (east, north) to the (north, east) convention of error_ellipse
+            covariance_nm2 = cov_en[::-1, ::-1].tolist()
+            # Radial 1-sigma (DRMS) error of the fix
+            error_estimate_nm = float(np.sqrt(np.trace(cov_en)))
 
         result = {
             "fixed_latitude": fixed_latitude,
             "fixed_longitude": fixed_longitude,
-            "error_estimate_nm": error_estimate_nm
+            "error_estimate_nm": error_estimate_nm,
+            "covariance_nm2": covariance_nm2,
+            "error_ellipse": error_ellipse(covariance_nm2)
         }
         print(f"Python: Fix calculated: Lat={fixed_latitude:.4f}, Lon={fixed_longitude:.4f}")
-        return json.dumps(result)
+        return result
 
     except Exception as e:
         error_msg = f"An exception occurred in lop_center_compute: {e}"
         print(f"Python: {error_msg}\n{traceback.format_exc()}")
-        return json.dumps({'error': error_msg})
+        return {'error': error_msg}
+
+def lop_center_compute(lop_1_json, lop_2_json, lop_3_json, estimated_latitude, estimated_longitude):
+    """_lop_center_compute's result as a JSON string (see lop_center_compute_binary for arrays)."""
+    return json.dumps(_lop_center_compute(lop_1_json, lop_2_json, lop_3_json,
+                                          estimated_latitude, estimated_longitude))
+
 
 
 
@@ -481,9 +1579,11 @@ def lop_center_compute(lop_1_json, lop_2_json, lop_3_json, estimated_latitude, e
 
 def core_compute_intercept(ra, dec, time_obj, lat, lon, alt_obs, height_m=0.0, pressure_hpa=1013.25, temperature_c=15.0):
     # Setup
-    loc = EarthLocation(lat=lat*u.deg, lon=lon*u.deg, height=height_m*u.m)
-    body = SkyCoord(ra=ra*u.deg, dec=dec*u.deg, frame='icrs')
-    frame = AltAz(obstime=time_obj, location=loc, pressure=pressure_hpa*u.hPa, temperature=temperature_c*u.deg_C)
+    ap = _astropy()
+    u = ap.u
+    loc = ap.EarthLocation(lat=lat*u.deg, lon=lon*u.deg, height=height_m*u.m)
+    body = ap.SkyCoord(ra=ra*u.deg, dec=dec*u.deg, frame='icrs')
+    frame = ap.AltAz(obstime=time_obj, location=loc, pressure=pressure_hpa*u.hPa, temperature=temperature_c*u.deg_C)
 
     sky = body.transform_to(frame)
     hc = sky.alt.degree
@@ -492,106 +1592,843 @@ def core_compute_intercept(ra, dec, time_obj, lat, lon, alt_obs, height_m=0.0, p
     intercept = (alt_obs - hc) * 60.0
     return intercept, az
 
-def solve_iterative(obs_list_json, estimated_lat, estimated_lon, height_m=0.0, pressure_hpa=1013.25, temperature_c=15.0):
+def core_compute_intercepts(ra, dec, times, lat, lon, alt_obs, height_m=0.0, pressure_hpa=1013.25, temperature_c=15.0):
+    """
+    Vectorized core_compute_intercept: one array-valued ICRS -> AltAz transform for all
+    observations from a single assumed position.
+
+    ra, dec, alt_obs: arrays of N values in degrees.
+    times: astropy Time array of N observation instants (per-observation obstime).
+    Returns (intercepts_nm, azimuths_deg) as numpy arrays of length N.
+    """
+    ap = _astropy()
+    u = ap.u
+    loc = ap.EarthLocation(lat=lat*u.deg, lon=lon*u.deg, height=height_m*u.m)
+    body = ap.SkyCoord(ra=np.asarray(ra)*u.deg, dec=np.asarray(dec)*u.deg, frame='icrs')
+    frame = ap.AltAz(obstime=times, location=loc, pressure=pressure_hpa*u.hPa, temperature=temperature_c*u.deg_C)
+
+    sky = body.transform_to(frame)
+    hc = sky.alt.degree
+    az = sky.az.degree
+
+    intercepts = (np.asarray(alt_obs) - hc) * 60.0
+    return intercepts, az
+
+# --- Precomputed Apparent Places ---
+#
+# Within one fix, an observation's time, RA and Dec never change; only the assumed
+# position does. The expensive part of the ICRS -> AltAz chain (precession, nutation,
+# annual aberration, Earth rotation, polar motion) is independent of the observer, so
+# each observation is resolved once to an Earth-fixed direction (GHA, Dec). Per
+# position we then only need the topocentric rotation, diurnal aberration and
+# refraction, all closed-form numpy. This reproduces astropy's AltAz to well under a
+# milliarcsecond (see check_fast_altaz_against_astropy).
+#
+# The Earth-fixed places themselves come from the offline almanac (almanac.py) when
+# it covers the observation times, and from astropy otherwise.
+
+EARTH_ROTATION_RATE_RAD_S = 7.292115e-5
+EARTH_EQUATORIAL_RADIUS_M = 6378137.0
+SPEED_OF_LIGHT_M_S = 299792458.0
+
+def precompute_earth_fixed(ra, dec, times):
+    """
+    Resolves ICRS star directions to Earth-fixed apparent places at their observation times.
+
+    ra, dec: arrays of N values in degrees. times: astropy Time array of N instants.
+    Returns (gha_deg, dec_deg): Greenwich hour angle (westward) and apparent declination.
+    """
+    ap = _astropy()
+    body = ap.SkyCoord(ra=np.asarray(ra)*ap.u.deg, dec=np.asarray(dec)*ap.u.deg, frame='icrs')
+    x, y, z = body.transform_to(ap.ITRS(obstime=times)).cartesian.xyz.value
+    gha_deg = np.rad2deg(-np.arctan2(y, x)) % 360.0
+    dec_deg = np.rad2deg(np.arcsin(np.clip(z, -1.0, 1.0)))
+    return gha_deg, dec_deg
+
+def unix_us_to_time(utc_us):
+    """astropy Time for UTC instants in microseconds (see almanac.utc_microseconds)."""
+    return _astropy().Time(np.asarray(utc_us) / 1e6, format='unix')
+
+def earth_fixed_places(ra, dec, utc_us):
+    """
+    Earth-fixed apparent places at UTC instants given in microseconds (see
+    almanac.utc_microseconds), from the offline almanac when available and covering
+    all instants, otherwise from astropy.
+    Returns (gha_deg, dec_deg, source) with source "almanac" or "astropy".
+    """
+    table = _ephemeris()
+    if table is not None and table.covers(utc_us):
+        gha_deg, dec_deg = table.earth_fixed(ra, dec, utc_us)
+        return gha_deg, dec_deg, "almanac"
+    gha_deg, dec_deg = precompute_earth_fixed(ra, dec, unix_us_to_time(utc_us))
+    return gha_deg, dec_deg, "astropy"
+
+def refraction_constants(pressure_hpa=1013.25, temperature_c=15.0):
+    """(A, B) refraction constants as used by astropy's AltAz (0% humidity, 1 micron)."""
+    return erfa.refco(float(pressure_hpa), float(temperature_c), 0.0, 1.0)
+
+# Refraction model for computed altitudes: "erfa" (astropy's model, applied exactly in
+# fast_altaz) or any other name from corrections.REFRACTION_MODELS.
+REFRACTION_MODEL = "erfa"
+
+def refraction_for(pressure_hpa=1013.25, temperature_c=15.0, model=None):
+    """Refraction argument for fast_altaz for the given conditions and model name."""
+    model = model or REFRACTION_MODEL
+    if model == "erfa":
+        return refraction_constants(pressure_hpa, temperature_c)
+    return corrections.refraction_model(model, pressure_hpa, temperature_c)
+
+def fast_altaz(gha_deg, dec_deg, lat, lon, refraction_ab=(0.0, 0.0)):
+    """
+    Observed altitude and azimuth (degrees) of Earth-fixed apparent places from an
+    observer at geodetic (lat, lon), including diurnal aberration and refraction:
+    refraction_ab is either the (A, B) constants from refraction_constants (ERFA atioq
+    model) or a function true altitude -> refraction in degrees (see refraction_for).
+    lat/lon may be scalars or arrays broadcasting against gha_deg/dec_deg.
+    """
+    lat_rad = np.deg2rad(lat)
+    lha = np.deg2rad(np.asarray(gha_deg) + lon)
+    dec_rad = np.deg2rad(dec_deg)
+    sin_lat, cos_lat = np.sin(lat_rad), np.cos(lat_rad)
+    sin_dec, cos_dec = np.sin(dec_rad), np.cos(dec_rad)
+    cos_lha = np.cos(lha)
+    # Topocentric East / North / Up direction cosines
+    east = -cos_dec * np.sin(lha)
+    north = cos_lat * sin_dec - sin_lat * cos_dec * cos_lha
+    up = sin_lat * sin_dec + cos_lat * cos_dec * cos_lha
+    # Diurnal aberration: observer moves east at v = omega * R * cos(lat)
+    v = EARTH_ROTATION_RATE_RAD_S * EARTH_EQUATORIAL_RADIUS_M * cos_lat / SPEED_OF_LIGHT_M_S
+    east, north, up = east + v * (1.0 - east * east), north - v * east * north, up - v * east * up
+    norm = np.sqrt(east**2 + north**2 + up**2)
+    east, north, up = east / norm, north / norm, up / norm
+    if callable(refraction_ab):
+        alt = np.rad2deg(np.arctan2(up, np.hypot(east, north)))
+        return alt + refraction_ab(alt), np.rad2deg(np.arctan2(east, north)) % 360.0
+    # Refraction (same formulation and limits as ERFA eraAtioq)
+    a, b = refraction_ab
+    r = np.maximum(np.hypot(east, north), 1e-6)
+    z = np.maximum(up, 0.05)
+    tz = r / z
+    w = b * tz * tz
+    delta = (a + w) * tz / (1.0 + (a + 3.0 * w) / (z * z))
+    cos_delta = 1.0 - delta * delta / 2.0
+    f = cos_delta - delta * z / r
+    east, north, up = east * f, north * f, cos_delta * up + delta * r
+    alt = np.rad2deg(np.arctan2(up, np.hypot(east, north)))
+    az = np.rad2deg(np.arctan2(east, north)) % 360.0
+    return alt, az
+
+def fast_compute_intercepts(gha_deg, dec_deg, lat, lon, alt_obs, refraction_ab=(0.0, 0.0)):
+    """Intercepts (NM) and azimuths (deg) from precomputed Earth-fixed apparent places."""
+    hc, az = fast_altaz(gha_deg, dec_deg, lat, lon, refraction_ab)
+    return (np.asarray(alt_obs) - hc) * 60.0, az
+
+def check_fast_altaz_against_astropy(ra, dec, times, lat, lon, height_m=0.0,
+                                     pressure_hpa=1013.25, temperature_c=15.0, earth_fixed=None):
+    """
+    Compares the precomputed fast path against the full astropy AltAz transform.
+    earth_fixed: optional (gha_deg, dec_deg) to check instead of precompute_earth_fixed,
+    e.g. the almanac's.
+    Returns the largest altitude difference in arcseconds.
+    """
+    gha, dec_app = earth_fixed if earth_fixed is not None else precompute_earth_fixed(ra, dec, times)
+    fast_hc, _ = fast_altaz(gha, dec_app, lat, lon, refraction_constants(pressure_hpa, temperature_c))
+    ref_intercepts, _ = core_compute_intercepts(ra, dec, times, lat, lon, np.zeros(len(fast_hc)),
+                                                height_m, pressure_hpa, temperature_c)
+    return float(np.max(np.abs(fast_hc + ref_intercepts / 60.0)) * 3600.0)
+
+# --- Nonlinear Least-Squares Fix ---
+
+def least_squares_fix(altitude_model, ho_deg, lat, lon, weights=None, max_iterations=20,
+                      tolerance_nm=0.001):
+    """
+    Levenberg-Marquardt position fix over (lat, lon).
+
+    altitude_model(lat, lon) must return (hc_deg, azimuth_deg) arrays for all observations.
+    The Jacobian is analytic: for the spherical altitude, dHc/dlat = cos(Zn) and
+    dHc/dlon = cos(lat) * sin(Zn) (degrees per degree). Steps that do not reduce the
+    weighted sum of squared altitude residuals are rejected and the damping increased.
+
+    Returns a dict with: lat, lon, iterations, converged, last_step_nm, residuals_nm,
+    residual_rms_nm and covariance_nm2 (2x2 [[north, north-east], [north-east, east]] in
+    NM^2, scaled by the residual variance; None with fewer than 3 observations).
+    """
+    ho_deg = np.asarray(ho_deg, dtype=float)
+    w = np.ones(len(ho_deg)) if weights is None else np.asarray(weights, dtype=float)
+    hc, az = altitude_model(lat, lon)
+    r = ho_deg - hc
+    cost = float(np.sum(w * r * r))
+    damping = 1e-3
+    last_step_nm = 0.0
+    converged = False
+    iterations = 0
+    for iterations in range(1, max_iterations + 1):
+        az_rad = np.deg2rad(az)
+        J = np.column_stack((np.cos(az_rad), np.cos(np.deg2rad(lat)) * np.sin(az_rad)))
+        JtW = J.T * w
+        H = JtW @ J
+        g = JtW @ r
+        while True:
+            step = np.linalg.lstsq(H + damping * np.diag(np.diag(H)), g, rcond=None)[0]
+            new_lat = float(np.clip(lat + step[0], -89.999, 89.999))
+            new_lon = float((lon + step[1] + 180.0) % 360.0 - 180.0)
+            new_hc, new_az = altitude_model(new_lat, new_lon)
+            new_r = ho_deg - new_hc
+            new_cost = float(np.sum(w * new_r * new_r))
+            if new_cost <= cost or damping > 1e8:
+                break
+            damping *= 10.0
+        if new_cost > cost:
+            # Damping exhausted without improvement: we are at the minimum.
+            converged = True
+            break
+        last_step_nm = float(np.hypot(step[0] * 60.0, step[1] * 60.0 * np.cos(np.deg2rad(lat))))
+        lat, lon, hc, az, r, cost = new_lat, new_lon, new_hc, new_az, new_r, new_cost
+        damping = max(damping * 0.3, 1e-9)
+        print(f"Python: Iteration {iterations}: Step {last_step_nm:.4f} NM. Pos: {lat:.4f}, {lon:.4f}")
+        if last_step_nm < tolerance_nm:
+            converged = True
+            break
+
+    n = len(ho_deg)
+    covariance_nm2 = None
+    if n > 2:
+        az_rad = np.deg2rad(az)
+        J = np.column_stack((np.cos(az_rad), np.cos(np.deg2rad(lat)) * np.sin(az_rad)))
+        H = (J.T * w) @ J
+        cov_deg2 = cost / (n - 2) * np.linalg.pinv(H)
+        T = np.diag([60.0, 60.0 * np.cos(np.deg2rad(lat))])
+        covariance_nm2 = (T @ cov_deg2 @ T).tolist()
+    residuals_nm = r * 60.0
+    return {"lat": lat, "lon": lon, "iterations": iterations, "converged": converged,
+            "last_step_nm": last_step_nm, "residuals_nm": residuals_nm.tolist(),
+            "residual_rms_nm": float(np.sqrt(np.mean(residuals_nm**2))),
+            "covariance_nm2": covariance_nm2}
+
+def global_seed(ghas, apparent_decs, ho_deg, refraction_ab=(0.0, 0.0), weights=None,
+                grid_step_deg=5.0, refine_cells=5, refine_step_deg=0.5):
+    """
+    Finds a starting position for least_squares_fix without any estimated position.
+
+    Altitude residuals of all observations are evaluated over a global lat/lon grid in
+    one vectorized pass; positions where a star would be below the horizon are
+    penalised. The `refine_cells` best cells (which may include the antipodal
+    ambiguity of two-star fixes) are then re-evaluated on a finer local grid, and the
+    best refined point is returned as (lat, lon).
+    """
+    ho_deg = np.asarray(ho_deg, dtype=float)
+    w = np.ones(len(ho_deg)) if weights is None else np.asarray(weights, dtype=float)
+
+    def costs(lats, lons):
+        # lats/lons: (M,) candidate positions -> (M,) weighted squared residuals
+        hc, _ = fast_altaz(ghas[None, :], apparent_decs[None, :], lats[:, None], lons[:, None],
+                           refraction_ab)
+        r = ho_deg[None, :] - hc
+        # A star that is observed must be above the horizon at the true position.
+        r = np.where(hc < -1.0, r + 90.0, r)
+        return np.sum(w[None, :] * r * r, axis=1)
+
+    half = grid_step_deg / 2.0
+    grid_lat, grid_lon = np.meshgrid(np.arange(-90.0 + half, 90.0, grid_step_deg),
+                                     np.arange(-180.0 + half, 180.0, grid_step_deg), indexing='ij')
+    grid_lat, grid_lon = grid_lat.ravel(), grid_lon.ravel()
+    coarse = costs(grid_lat, grid_lon)
+    best_cells = np.argsort(coarse)[:refine_cells]
+
+    offsets = np.arange(-half, half + 1e-9, refine_step_deg)
+    d_lat, d_lon = np.meshgrid(offsets, offsets, indexing='ij')
+    fine_lat = np.clip(grid_lat[best_cells, None] + d_lat.ravel()[None, :], -89.999, 89.999).ravel()
+    fine_lon = ((grid_lon[best_cells, None] + d_lon.ravel()[None, :] + 180.0) % 360.0 - 180.0).ravel()
+    fine = costs(fine_lat, fine_lon)
+    best = int(np.argmin(fine))
+    return float(fine_lat[best]), float(fine_lon[best])
+
+OUTLIER_THRESHOLD_NM = 5.0
+PAIR_MIN_AZIMUTH_SEPARATION_DEG = 15.0
+
+def consensus_inliers(ghas, apparent_decs, ho_deg, lat, lon, refraction_ab=(0.0, 0.0),
+                      threshold_nm=OUTLIER_THRESHOLD_NM, iterations=6):
+    """
+    Exhaustive RANSAC over all pairs of sights (the minimal subsets for a 2D fix).
+
+    Every pair is solved simultaneously with a vectorized Gauss-Newton from (lat, lon);
+    pairs whose azimuths are within PAIR_MIN_AZIMUTH_SEPARATION_DEG of each other (or of
+    the reciprocal) are too poorly conditioned and skipped. The residuals of all sights
+    are then evaluated at every pair fix, and the pair with the most sights within
+    threshold_nm wins (ties broken by the truncated squared residuals, as in MSAC).
+    Returns (inlier_mask, lat, lon) of the best pair fix, or None if no pair is usable.
+    """
+    ho_deg = np.asarray(ho_deg, dtype=float)
+    first, second = np.triu_indices(len(ho_deg), k=1)
+    pairs = np.arange(len(first))
+    lats = np.full(len(first), float(lat))
+    lons = np.full(len(first), float(lon))
+    min_sin = math.sin(math.radians(PAIR_MIN_AZIMUTH_SEPARATION_DEG))
+    for _ in range(iterations):
+        hc, az = fast_altaz(ghas[None, :], apparent_decs[None, :], lats[:, None], lons[:, None],
+                            refraction_ab)
+        b_i = (ho_deg[first] - hc[pairs, first]) * 60.0
+        b_j = (ho_deg[second] - hc[pairs, second]) * 60.0
+        z_i, z_j = np.deg2rad(az[pairs, first]), np.deg2rad(az[pairs, second])
+        det = np.sin(z_j - z_i)
+        usable = np.abs(det) > min_sin
+        det = np.where(usable, det, 1.0)
+        # intercept_k = cos(Zk) * d_north + sin(Zk) * d_east, solved per pair (Cramer)
+        d_north = np.clip((b_i * np.sin(z_j) - b_j * np.sin(z_i)) / det, -600.0, 600.0)
+        d_east = np.clip((b_j * np.cos(z_i) - b_i * np.cos(z_j)) / det, -600.0, 600.0)
+        lons = (lons + d_east / (60.0 * np.cos(np.deg2rad(lats))) + 180.0) % 360.0 - 180.0
+        lats = np.clip(lats + d_north / 60.0, -89.999, 89.999)
+    if not np.any(usable):
+        return None
+
+    hc, _ = fast_altaz(ghas[None, :], apparent_decs[None, :], lats[:, None], lons[:, None], refraction_ab)
+    residuals_nm = np.abs(ho_deg[None, :] - hc) * 60.0
+    inliers = residuals_nm < threshold_nm
+    truncated = np.minimum(residuals_nm, threshold_nm) ** 2
+    score = inliers.sum(axis=1) - truncated.sum(axis=1) / (threshold_nm ** 2 * len(ho_deg) + 1.0)
+    score = np.where(usable, score, -np.inf)
+    best = int(np.argmax(score))
+    return inliers[best], float(lats[best]), float(lons[best])
+
+def error_ellipse(covariance_nm2):
+    """
+    1-sigma error ellipse of a north/east covariance in NM^2.
+    Returns {"semi_major_nm", "semi_minor_nm", "orientation_deg"} (azimuth of the major
+    axis, 0-180) or None when no covariance is available.
+    """
+    if covariance_nm2 is None:
+        return None
+    values, vectors = np.linalg.eigh(np.asarray(covariance_nm2))
+    values = np.maximum(values, 0.0)
+    major = vectors[:, 1]
+    return {"semi_major_nm": float(np.sqrt(values[1])),
+            "semi_minor_nm": float(np.sqrt(values[0])),
+            "orientation_deg": float(np.rad2deg(np.arctan2(major[1], major[0])) % 180.0)}
+
+# --- Monte-Carlo Uncertainty ---
+#
+# The covariance from least_squares_fix only reflects the scatter of the residuals.
+# Errors common to all sights of a fix (a calibration bias of the altitude sensor, a
+# clock offset) leave no residual but still move the fix. monte_carlo_fix perturbs the
+# inputs by all modelled error sources and re-solves every sample at once with a
+# vectorized Gauss-Newton around the nominal fix; no per-sample astropy calls.
+
+MONTE_CARLO_SAMPLES = 2000
+ALTITUDE_SIGMA_NM = 1.0          # per-sight altitude noise (sensor)
+ALTITUDE_BIAS_SIGMA_NM = 1.0     # altitude bias common to all sights (calibration)
+CLOCK_SIGMA_S = 0.5              # clock offset common to all sights
+RADEC_SIGMA_ARCSEC = 20.0        # per-sight image solve error (RMSE)
+EARTH_ROTATION_DEG_PER_S = 360.98564736629 / 86400.0
+
+def monte_carlo_fix(ghas, apparent_decs, ho_deg, lat, lon, refraction_ab=(0.0, 0.0), weights=None,
+                    samples=MONTE_CARLO_SAMPLES, altitude_sigma_nm=ALTITUDE_SIGMA_NM,
+                    altitude_bias_sigma_nm=ALTITUDE_BIAS_SIGMA_NM, clock_sigma_s=CLOCK_SIGMA_S,
+                    radec_sigma_arcsec=RADEC_SIGMA_ARCSEC, iterations=3, seed=None):
+    """
+    Monte-Carlo error of the fix at (lat, lon) from the given observation errors.
+
+    Returns a dict with: samples, bias_nm ([north, east] mean offset of the perturbed
+    fixes), covariance_nm2 and error_ellipse (see error_ellipse) of the perturbed fixes
+    about the nominal one, radius_50_nm and radius_95_nm (radii around the nominal fix
+    containing 50% and 95% of the samples).
+    """
+    rng = np.random.default_rng(seed)
+    ho_deg = np.asarray(ho_deg, dtype=float)
+    n = len(ho_deg)
+    w = np.ones(n) if weights is None else np.asarray(weights, dtype=float)
+
+    # Perturbed inputs, shape (samples, n)
+    ho = (ho_deg[None, :] + (rng.normal(0.0, altitude_sigma_nm, (samples, n))
+                             + rng.normal(0.0, altitude_bias_sigma_nm, (samples, 1))) / 60.0)
+    dec = apparent_decs[None, :] + rng.normal(0.0, radec_sigma_arcsec / 3600.0, (samples, n))
+    gha = (ghas[None, :]
+           + rng.normal(0.0, radec_sigma_arcsec / 3600.0, (samples, n)) / np.cos(np.deg2rad(apparent_decs))
+           + rng.normal(0.0, clock_sigma_s, (samples, 1)) * EARTH_ROTATION_DEG_PER_S)
+
+    lats = np.full(samples, float(lat))
+    lons = np.full(samples, float(lon))
+    for _ in range(iterations):
+        hc, az = fast_altaz(gha, dec, lats[:, None], lons[:, None], refraction_ab)
+        r = (ho - hc) * 60.0
+        a, b = np.cos(np.deg2rad(az)), np.sin(np.deg2rad(az))
+        # Weighted normal equations per sample, solved for (d_north, d_east) in NM
+        saa, sab, sbb = (w * a * a).sum(axis=1), (w * a * b).sum(axis=1), (w * b * b).sum(axis=1)
+        sar, sbr = (w * a * r).sum(axis=1), (w * b * r).sum(axis=1)
+        det = saa * sbb - sab * sab
+        det = np.where(np.abs(det) > 1e-12, det, np.nan)
+        d_north = (sbb * sar - sab * sbr) / det
+        d_east = (saa * sbr - sab * sar) / det
+        # Both steps belong to the linearization point, so convert at its latitude.
+        lons = lons + d_east / (60.0 * np.cos(np.deg2rad(lats)))
+        lats = lats + d_north / 60.0
+
+    offsets = np.column_stack(((lats - lat) * 60.0,
+                               ((lons - lon + 180.0) % 360.0 - 180.0) * 60.0 * math.cos(math.radians(lat))))
+    offsets = offsets[np.all(np.isfinite(offsets), axis=1)]
+    covariance_nm2 = (offsets.T @ offsets / len(offsets)).tolist()
+    radii = np.hypot(offsets[:, 0], offsets[:, 1])
+    return {"samples": int(len(offsets)),
+            "bias_nm": offsets.mean(axis=0).tolist(),
+            "covariance_nm2": covariance_nm2,
+            "error_ellipse": error_ellipse(covariance_nm2),
+            "radius_50_nm": float(np.percentile(radii, 50)),
+            "radius_95_nm": float(np.percentile(radii, 95))}
+
+def _solve_iterative(obs_list_json, estimated_lat=None, estimated_lon=None, height_m=0.0, pressure_hpa=1013.25,
+                     temperature_c=15.0, global_init=None, validate=False, reject_outliers=True,
+                     outlier_threshold_nm=OUTLIER_THRESHOLD_NM, uncertainty_samples=MONTE_CARLO_SAMPLES,
+                     refraction_model=None):
     """
     Iterative least-squares position solver.
 
     obs_list_json: JSON string of list of dicts:
        [{'ra':, 'dec':, 'alt':, 'time_iso':}, ...]
-    estimated_lat: The user provided estimated latitude (float)
-    estimated_lon: The user provided estimated longitude (float)
+       An optional 'weight' (relative inverse variance, default 1) per observation.
+    estimated_lat: The user provided estimated latitude (float), or None if unknown
+    estimated_lon: The user provided estimated longitude (float), or None if unknown
     height_m: Observer height above sea level in meters
     pressure_hpa: Atmospheric pressure in hPa for refraction correction
     temperature_c: Air temperature in Celsius for refraction correction
-
-    Returns JSON with: fixed_latitude, fixed_longitude, iterations, final_shift_nm
-    On error: returns JSON with 'error' key.
+    global_init: Seed the solver with global_seed instead of the estimated position.
+        Defaults to None: automatic, used when no estimated position is given or it is
+        exactly (0, 0), which the app sends when the user entered none.
+    validate: Cross-check the final fix against the full astropy transform.
+    reject_outliers: With 4 or more observations, find the largest consistent set with
+        consensus_inliers and solve on it; sights off by more than outlier_threshold_nm
+        are discarded.
+    uncertainty_samples: Sample count for monte_carlo_fix over the inliers (0 to skip),
+        with the module's default error model.
+    refraction_model: See refraction_for; defaults to REFRACTION_MODEL.
+
+    Each observation is resolved once to an Earth-fixed apparent place
+    (earth_fixed_places); iterations only evaluate fast_altaz.
+
+    The fix is refined with least_squares_fix (Levenberg-Marquardt over lat/lon).
+
+    Returns a dict (JSON from solve_iterative) with: fixed_latitude, fixed_longitude,
+    iterations, final_shift_nm (last accepted step), residual_rms_nm, covariance_nm2 and error_ellipse (see
+    error_ellipse; None with fewer than 3 observations), ephemeris ("almanac" or
+    "astropy"), model_check_arcsec (largest altitude difference to astropy at the fix,
+    None unless validate), residuals_nm (every observation, discarded ones included)
+    and discarded_observations (indices into obs_list), uncertainty (monte_carlo_fix
+    result, or None).
+    On error: a dict with 'error' key.
     """
     try:
         obs_list = json.loads(obs_list_json)
 
         if len(obs_list) < 2:
-            return json.dumps({"error": "Need at least 3 observations for iterative solve"})
+            return {"error": "Need at least 3 observations for iterative solve"}
+        untimed = [i for i, obs in enumerate(obs_list) if not obs.get('time_iso')]
+        if untimed:
+            return {"error": f"Observations {untimed} have no time_iso (capture time)"}
+
+        # 1. Parse Times and observation arrays once
+        utc_us = np.array([almanac.utc_microseconds(obs['time_iso']) for obs in obs_list], dtype=np.int64)
+        ras = np.array([obs['ra'] for obs in obs_list], dtype=float)
+        decs = np.array([obs['dec'] for obs in obs_list], dtype=float)
+        alts = np.array([obs['alt'] for obs in obs_list], dtype=float)
+        weights = np.array([obs.get('weight', 1.0) for obs in obs_list], dtype=float)
+        ghas, apparent_decs, ephemeris = earth_fixed_places(ras, decs, utc_us)
+        refraction_ab = refraction_for(pressure_hpa, temperature_c, refraction_model)
+
+        # Start at the user-provided Estimated Position, or search the globe for one
+        if global_init is None:
+            global_init = (estimated_lat is None or estimated_lon is None
+                           or (float(estimated_lat) == 0.0 and float(estimated_lon) == 0.0))
+        if global_init:
+            current_lat, current_lon = global_seed(ghas, apparent_decs, alts, refraction_ab, weights)
+            print(f"Python: Global search seed at {current_lat:.4f}, {current_lon:.4f}")
+        else:
+            current_lat = float(estimated_lat)
+            current_lon = float(estimated_lon)
 
-        # 1. Parse Times
-        times = []
-        for obs in obs_list:
-            t = Time(obs['time_iso'])
-            times.append(t)
+        print(f"Python: Seeding iterative solver at {current_lat:.4f}, {current_lon:.4f}")
+        seed_lat, seed_lon = current_lat, current_lon
+
+        # 2. Outlier rejection over all pairs of sights
+        inliers = np.ones(len(alts), dtype=bool)
+        if reject_outliers and len(alts) >= 4:
+            consensus = consensus_inliers(ghas, apparent_decs, alts, current_lat, current_lon,
+                                          refraction_ab, outlier_threshold_nm)
+            if consensus is not None and np.count_nonzero(consensus[0]) >= 3:
+                inliers, current_lat, current_lon = consensus
+
+        # 3. Damped Gauss-Newton refinement with analytic partials, on the inliers. The
+        # inlier set is re-checked once at the refined fix.
+        for _ in range(2):
+            fix = least_squares_fix(
+                lambda lat, lon: fast_altaz(ghas[inliers], apparent_decs[inliers], lat, lon, refraction_ab),
+                alts[inliers], current_lat, current_lon, weights=weights[inliers])
+            current_lat, current_lon = fix["lat"], fix["lon"]
+            hc_all, _ = fast_altaz(ghas, apparent_decs, current_lat, current_lon, refraction_ab)
+            residuals_nm = (alts - hc_all) * 60.0
+            if np.all(inliers):
+                break
+            refined = np.abs(residuals_nm) < outlier_threshold_nm
+            if np.array_equal(refined, inliers) or np.count_nonzero(refined) < 3:
+                break
+            inliers = refined
+        discarded = np.flatnonzero(~inliers).tolist()
+        if discarded:
+            print(f"Python: Discarded observations {discarded} as outliers")
+        if not fix["converged"]:
+            print(f"Python: WARNING - No convergence after {fix['iterations']} iterations. "
+                  f"Last step: {fix['last_step_nm']:.4f} NM")
+        ellipse = error_ellipse(fix["covariance_nm2"])
+        uncertainty = None
+        if uncertainty_samples:
+            uncertainty = monte_carlo_fix(ghas[inliers], apparent_decs[inliers], alts[inliers], current_lat,
+                                          current_lon, refraction_ab, weights[inliers], uncertainty_samples)
+            print(f"Python: Monte-Carlo 95% radius: {uncertainty['radius_95_nm']:.2f} NM")
+
+        model_check_arcsec = None
+        if validate:
+            model_check_arcsec = check_fast_altaz_against_astropy(
+                ras, decs, unix_us_to_time(utc_us), current_lat, current_lon, height_m,
+                pressure_hpa, temperature_c, earth_fixed=(ghas, apparent_decs))
+            print(f"Python: Altitude model ({ephemeris}) vs astropy at fix: {model_check_arcsec:.4f} arcsec")
+
+        return {
+            "fixed_latitude": float(current_lat),
+            "fixed_longitude": float(current_lon),
+            "iterations": fix["iterations"],
+            "final_shift_nm": fix["last_step_nm"],
+            "residual_rms_nm": fix["residual_rms_nm"],
+            "covariance_nm2": fix["covariance_nm2"],
+            "error_ellipse": ellipse,
+            "ephemeris": ephemeris,
+            "model_check_arcsec": model_check_arcsec,
+            "residuals_nm": residuals_nm.tolist(),
+            "discarded_observations": discarded,
+            "uncertainty": uncertainty,
+            "seed_latitude": seed_lat,
+            "seed_longitude": seed_lon
+        }
 
-        # Start at the user-provided Estimated Position
-        current_lat = float(estimated_lat)
-        current_lon = float(estimated_lon)
+    except Exception as e:
+        error_msg = f"Error in solve_iterative: {e}"
+        print(f"Python: {error_msg}\n{traceback.format_exc()}")
+        return {"error": error_msg}
 
-        print(f"Python: Seeding iterative solver at {current_lat:.4f}, {current_lon:.4f}")
+def solve_iterative(obs_list_json, estimated_lat=None, estimated_lon=None, height_m=0.0, pressure_hpa=1013.25,
+                    temperature_c=15.0, global_init=None, validate=False, reject_outliers=True,
+                    outlier_threshold_nm=OUTLIER_THRESHOLD_NM, uncertainty_samples=MONTE_CARLO_SAMPLES,
+                    refraction_model=None):
+    """_solve_iterative's result as a JSON string (see solve_iterative_binary for arrays)."""
+    return json.dumps(_solve_iterative(obs_list_json, estimated_lat, estimated_lon, height_m, pressure_hpa,
+                                       temperature_c, global_init, validate, reject_outliers,
+                                       outlier_threshold_nm, uncertainty_samples, refraction_model))
 
-        # 2. Iterate with convergence and divergence checks
-        MAX_ITERATIONS = 20
-        CONVERGENCE_THRESHOLD = 0.01  # NM
-        MAX_DIVERGENCE_STREAK = 3
-
-        prev_shift = float('inf')
-        divergence_count = 0
-        final_shift = 0.0
-        iterations_done = 0
-
-        for i in range(MAX_ITERATIONS):
-            intercepts = []
-            azimuths = []
-
-            for j, obs in enumerate(obs_list):
-                ic, az = core_compute_intercept(
-                    obs['ra'], obs['dec'], times[j],
-                    current_lat, current_lon, obs['alt'],
-                    height_m=height_m, pressure_hpa=pressure_hpa, temperature_c=temperature_c
-                )
-                intercepts.append(ic)
-                azimuths.append(az)
-
-            # Solve Linear Shift
-            A = np.array([[np.sin(np.deg2rad(az)), np.cos(np.deg2rad(az))] for az in azimuths])
-            b = np.array(intercepts)
-
-            correction, _, _, _ = np.linalg.lstsq(A, b, rcond=None)
-            d_east, d_north = correction[0], correction[1]
-
-            shift_mag = np.sqrt(d_east**2 + d_north**2)
-            final_shift = float(shift_mag)
-            iterations_done = i + 1
-
-            # Apply shift
-            lat_rad = np.deg2rad(current_lat)
-            current_lat += d_north / 60.0
-            current_lon += d_east / (60.0 * np.cos(lat_rad))
-
-            print(f"Python: Iteration {i+1}: Shift {shift_mag:.4f} NM. Pos: {current_lat:.4f}, {current_lon:.4f}")
-
-            # Check convergence
-            if shift_mag < CONVERGENCE_THRESHOLD:
-                print(f"Python: Converged after {i+1} iterations (shift {shift_mag:.4f} < {CONVERGENCE_THRESHOLD} NM)")
-                break
 
-            # Check divergence (shift increasing for too many consecutive iterations)
-            if shift_mag >= prev_shift:
-                divergence_count += 1
-                if divergence_count >= MAX_DIVERGENCE_STREAK:
-                    print(f"Python: WARNING - Divergence detected after {i+1} iterations (shift increasing {divergence_count}x)")
-                    break
-            else:
-                divergence_count = 0
+# --- Running Fix ---
+#
+# Underway, sights are taken one at a time while the vessel moves. RunningFix keeps
+# the position estimate and its north/east covariance (NM^2) at the time of the last
+# sight. Each new sight first advances the state by dead reckoning (course and speed,
+# with process noise for current and steering error), then applies an iterated
+# extended Kalman update with the same altitude model and partials as
+# least_squares_fix. Every sight costs O(1), independent of how many came before.
+
+class RunningFix:
+    """
+    Streaming position estimate from sights taken while under way.
+    The state round-trips through to_dict/from_dict so it can live on the app side
+    between running_fix_update calls.
+    """
 
-            prev_shift = shift_mag
+    OBSERVATION_SIGMA_NM = 1.0
+    PROCESS_NOISE_NM2_PER_H = 1.0
+    UPDATE_ITERATIONS = 3
+
+    def __init__(self, lat, lon, utc_us, sigma_nm=60.0, course_deg=0.0, speed_kn=0.0,
+                 process_noise_nm2_per_h=PROCESS_NOISE_NM2_PER_H):
+        self.lat = float(lat)
+        self.lon = float(lon)
+        self.utc_us = int(utc_us)
+        self.covariance_nm2 = np.eye(2) * float(sigma_nm) ** 2
+        self.course_deg = float(course_deg)
+        self.speed_kn = float(speed_kn)
+        self.process_noise_nm2_per_h = float(process_noise_nm2_per_h)
+        self.sight_count = 0
+
+    @classmethod
+    def from_dict(cls, state):
+        fix = cls(state["lat"], state["lon"], state["utc_us"], course_deg=state.get("course_deg", 0.0),
+                  speed_kn=state.get("speed_kn", 0.0),
+                  process_noise_nm2_per_h=state.get("process_noise_nm2_per_h", cls.PROCESS_NOISE_NM2_PER_H))
+        fix.covariance_nm2 = np.asarray(state["covariance_nm2"], dtype=float)
+        fix.sight_count = int(state.get("sight_count", 0))
+        return fix
+
+    def to_dict(self):
+        return {"lat": self.lat, "lon": self.lon, "utc_us": self.utc_us,
+                "covariance_nm2": self.covariance_nm2.tolist(), "course_deg": self.course_deg,
+                "speed_kn": self.speed_kn, "process_noise_nm2_per_h": self.process_noise_nm2_per_h,
+                "sight_count": self.sight_count, "error_ellipse": error_ellipse(self.covariance_nm2)}
+
+    def set_motion(self, course_deg, speed_kn, utc_us=None):
+        """Changes course and speed, effective from utc_us (default: the state time)."""
+        if utc_us is not None:
+            self.advance(utc_us)
+        self.course_deg = float(course_deg)
+        self.speed_kn = float(speed_kn)
+
+    def advance(self, utc_us):
+        """Dead-reckons the state to utc_us (rhumb line; also works backwards in time)."""
+        hours = (int(utc_us) - self.utc_us) / 3.6e9
+        distance_nm = self.speed_kn * hours
+        course = math.radians(self.course_deg)
+        self.lat = float(np.clip(self.lat + distance_nm * math.cos(course) / 60.0, -89.999, 89.999))
+        self.lon = (self.lon + distance_nm * math.sin(course) / (60.0 * math.cos(math.radians(self.lat)))
+                    + 180.0) % 360.0 - 180.0
+        self.covariance_nm2 = self.covariance_nm2 + np.eye(2) * self.process_noise_nm2_per_h * abs(hours)
+        self.utc_us = int(utc_us)
+
+    def update(self, gha_deg, dec_deg, ho_deg, utc_us, refraction_ab=(0.0, 0.0), sigma_nm=None):
+        """
+        Advances to the sight time and applies one altitude sight of a star at the
+        Earth-fixed place (gha_deg, dec_deg). Returns the innovation (intercept) in NM
+        at the dead-reckoned position.
+        """
+        self.advance(utc_us)
+        variance = (self.OBSERVATION_SIGMA_NM if sigma_nm is None else float(sigma_nm)) ** 2
+
+        def position(offset):
+            # North/east offset in NM from the dead-reckoned position -> (lat, lon), with
+            # the east offset taken along the parallel of the offset latitude.
+            lat = float(np.clip(self.lat + offset[0] / 60.0, -89.999, 89.999))
+            lon = (self.lon + offset[1] / (60.0 * math.cos(math.radians(lat))) + 180.0) % 360.0 - 180.0
+            return lat, lon
+
+        # Iterated EKF: relinearize around the updated estimate, keeping the prior fixed
+        offset = np.zeros(2)
+        innovation_nm = None
+        for _ in range(self.UPDATE_ITERATIONS):
+            lat, lon = position(offset)
+            hc, zn = fast_altaz(gha_deg, dec_deg, lat, lon, refraction_ab)
+            intercept_nm = (float(ho_deg) - float(hc)) * 60.0
+            if innovation_nm is None:
+                innovation_nm = intercept_nm
+            zn = math.radians(float(zn))
+            h = np.array([math.cos(zn), math.sin(zn)])
+            gain = self.covariance_nm2 @ h / (float(h @ self.covariance_nm2 @ h) + variance)
+            offset = gain * (intercept_nm + float(h @ offset))
+        self.covariance_nm2 = (np.eye(2) - np.outer(gain, h)) @ self.covariance_nm2
+        self.lat, self.lon = position(offset)
+        self.sight_count += 1
+        return innovation_nm
+
+def running_fix_update(state_json, obs_json, course_deg=None, speed_kn=None, pressure_hpa=1013.25,
+                       temperature_c=15.0):
+    """
+    Updates a running fix with one new sight.
+
+    state_json: JSON state from the previous call, or an initial state
+       {'lat':, 'lon':, 'time_iso':, optional 'sigma_nm' (default 60)} when starting.
+    obs_json: JSON dict {'ra':, 'dec':, 'alt':, 'time_iso':}, with an optional 'sigma_nm'
+       (altitude error in NM, default RunningFix.OBSERVATION_SIGMA_NM).
+    course_deg / speed_kn: Vessel course and speed over ground from the previous
+       state time, or None to keep the state's.
+
+    Returns JSON with the new state (pass back unchanged on the next call; includes
+    lat, lon, covariance_nm2, error_ellipse, sight_count) plus intercept_nm, the sight's
+    intercept from the dead-reckoned position.
+    On error: returns JSON with 'error' key.
+    """
+    try:
+        state = json.loads(state_json)
+        obs = json.loads(obs_json)
+        if "utc_us" in state:
+            fix = RunningFix.from_dict(state)
         else:
-            print(f"Python: WARNING - Max iterations ({MAX_ITERATIONS}) reached without convergence. Final shift: {final_shift:.4f} NM")
-
-        return json.dumps({
-            "fixed_latitude": float(current_lat),
-            "fixed_longitude": float(current_lon),
-            "iterations": iterations_done,
-            "final_shift_nm": final_shift
-        })
+            fix = RunningFix(state["lat"], state["lon"], almanac.utc_microseconds(state["time_iso"]),
+                             sigma_nm=state.get("sigma_nm", 60.0))
+        if course_deg is not None and speed_kn is not None:
+            fix.set_motion(course_deg, speed_kn)
+
+        utc_us = almanac.utc_microseconds(obs["time_iso"])
+        gha, dec_app, _ = earth_fixed_places([float(obs["ra"])], [float(obs["dec"])], [utc_us])
+        intercept_nm = fix.update(gha[0], dec_app[0], obs["alt"], utc_us,
+                                  refraction_for(pressure_hpa, temperature_c), obs.get("sigma_nm"))
+
+        result = fix.to_dict()
+        result["intercept_nm"] = intercept_nm
+        print(f"Python: Running fix after {fix.sight_count} sights: {fix.lat:.4f}, {fix.lon:.4f}")
+        return json.dumps(result)
 
     except Exception as e:
-        error_msg = f"Error in solve_iterative: {e}"
+        error_msg = f"Error in running_fix_update: {e}"
         print(f"Python: {error_msg}\n{traceback.format_exc()}")
         return json.dumps({"error": error_msg})
+
+# --- Binary Result Channel ---
+#
+# The *_binary entry points return the results of their JSON counterparts as a
+# BinaryResult: the scalars in one float64 array with a fixed field order (NaN when
+# absent) and variable-length data as flat float64 arrays, which Chaquopy hands to
+# Kotlin as primitive arrays without a JSON round-trip, e.g.
+#   result.get("scalars").toJava(DoubleArray::class.java)
+# Everything else (stages, ellipses, uncertainty) stays available through to_json().
+
+IMAGE_RESULT_FIELDS = ("solved", "ra_deg", "dec_deg", "roll_deg", "fov_deg", "boresight_altitude_deg",
+                       "capture_utc_ms")
+# centroids: y0, x0, y1, x1, ...; star_observations: STAR_OBSERVATION_COLUMNS per star, all
+# taken at capture_utc_ms (ms since 1970-01-01 UTC)
+IMAGE_RESULT_ARRAYS = ("centroids", "star_observations")
+STAR_OBSERVATION_COLUMNS = ("ra", "dec", "alt", "weight")
+LOP_RESULT_FIELDS = ("intercept_nm", "azimuth_deg", "observed_altitude_deg", "computed_altitude_deg")
+# covariance_nm2: north/east 2x2, row-major
+FIX_RESULT_FIELDS = ("fixed_latitude", "fixed_longitude", "error_estimate_nm")
+FIX_RESULT_ARRAYS = ("covariance_nm2",)
+SOLVE_RESULT_FIELDS = ("fixed_latitude", "fixed_longitude", "iterations", "final_shift_nm",
+                       "residual_rms_nm", "model_check_arcsec", "seed_latitude", "seed_longitude")
+SOLVE_RESULT_ARRAYS = ("covariance_nm2", "residuals_nm", "discarded_observations")
+
+
+class BinaryResult:
+    """
+    Flat numeric form of a result dict. fields names the entries of scalars; arrays maps
+    names to flattened float64 arrays (empty when absent); error is the error message,
+    or None on success.
+    """
+
+    def __init__(self, result, fields, arrays=()):
+        self.fields = tuple(fields)
+        self.scalars = np.array([np.nan if result.get(name) is None else float(result[name])
+                                 for name in self.fields], dtype=np.float64)
+        self.arrays = {name: np.asarray(result.get(name) or [], dtype=np.float64).ravel()
+                       for name in arrays}
+        self.error = result.get("error") or result.get("error_message")
+        self._result = result
+
+    def scalar(self, name):
+        """The value of scalar field name (NaN when absent)."""
+        return float(self.scalars[self.fields.index(name)])
+
+    def to_json(self):
+        """The complete result as the JSON entry point returns it."""
+        return json.dumps(self._result)
+
+
+def image_processor_binary(image_name, image_path, pitch_deg=None, roll_deg=0.0, gravity=None, time_iso=None):
+    """image_processor as a BinaryResult (IMAGE_RESULT_FIELDS / IMAGE_RESULT_ARRAYS)."""
+    result = _image_processor(image_name, image_path, pitch_deg, roll_deg, gravity, time_iso)
+    binary = BinaryResult(result, IMAGE_RESULT_FIELDS, IMAGE_RESULT_ARRAYS[:1])
+    binary.arrays["star_observations"] = np.array(
+        [[obs[column] for column in STAR_OBSERVATION_COLUMNS] for obs in result.get("star_observations", [])],
+        dtype=np.float64).ravel()
+    return binary
+
+def lop_compute_binary(ra_from_image, dec_from_image, estimated_latitude, estimated_longitude, height_of_eye_m,
+                       pressure_hpa, temperature_celsius, sextant_altitude_deg, local_date_str, local_time_str,
+                       timezone_str, refraction_model=None):
+    """lop_compute as a BinaryResult (LOP_RESULT_FIELDS)."""
+    return BinaryResult(_lop_compute(ra_from_image, dec_from_image, estimated_latitude, estimated_longitude,
+                                     height_of_eye_m, pressure_hpa, temperature_celsius, sextant_altitude_deg,
+                                     local_date_str, local_time_str, timezone_str, refraction_model),
+                        LOP_RESULT_FIELDS)
+
+def lop_center_compute_binary(lop_1_json, lop_2_json, lop_3_json, estimated_latitude, estimated_longitude):
+    """lop_center_compute as a BinaryResult (FIX_RESULT_FIELDS / FIX_RESULT_ARRAYS)."""
+    return BinaryResult(_lop_center_compute(lop_1_json, lop_2_json, lop_3_json,
+                                            estimated_latitude, estimated_longitude),
+                        FIX_RESULT_FIELDS, FIX_RESULT_ARRAYS)
+
+def solve_iterative_binary(obs_list_json, estimated_lat=None, estimated_lon=None, height_m=0.0,
+                           pressure_hpa=1013.25, temperature_c=15.0, global_init=None, validate=False,
+                           reject_outliers=True, outlier_threshold_nm=OUTLIER_THRESHOLD_NM,
+                           uncertainty_samples=MONTE_CARLO_SAMPLES, refraction_model=None):
+    """solve_iterative as a BinaryResult (SOLVE_RESULT_FIELDS / SOLVE_RESULT_ARRAYS)."""
+    return BinaryResult(_solve_iterative(obs_list_json, estimated_lat, estimated_lon, height_m, pressure_hpa,
+                                         temperature_c, global_init, validate, reject_outliers,
+                                         outlier_threshold_nm, uncertainty_samples, refraction_model),
+                        SOLVE_RESULT_FIELDS, SOLVE_RESULT_ARRAYS)
+
+# --- asyncio API ---
+#
+# Coroutine forms of detection, image solving and the position fix, for callers that
+# drive many images from one event loop (batch tooling, an asyncio-based bridge).
+# detect_async runs cedar_cli as an asyncio subprocess, so no thread waits on it; the
+# CPU-bound stages run in an executor (the loop's default unless one is given).
+# Cancelling the awaiting task kills a running cedar_cli and stops the Tetra3 search
+# (SolveContext, cancel_image_processor).
+
+async def detect_async(image_path, sigma=6.0, detect_hot_pixels=True):
+    """detect_centroids_cli as a coroutine; same result dict."""
+    try:
+        argv, output_path = _cedar_cli_invocation(image_path, sigma, detect_hot_pixels)
+    except Exception as e:
+        return {"error": str(e)}
+    try:
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *argv, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+        except Exception as e:
+            return {"error": str(e)}
+        try:
+            output, _ = await asyncio.wait_for(process.communicate(), CEDAR_CLI_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return {"error": f"Cedar CLI timed out after {CEDAR_CLI_TIMEOUT_S}s"}
+        except asyncio.CancelledError:
+            process.kill()
+            await process.wait()
+            raise
+        if process.returncode != 0:
+            return {"error": f"Command '{argv}' returned non-zero exit status {process.returncode}.",
+                    "output": output.decode("utf-8")}
+        try:
+            return _read_cedar_output(output_path)
+        except Exception as e:
+            return {"error": str(e)}
+    finally:
+        _remove_cedar_output(output_path)
+
+async def solve_centroids_async(centroids, size, executor=None, **kwargs):
+    """
+    Tetra3 solve of (y, x) centroids for an image of size (height, width) as a coroutine.
+    Keyword arguments go to solve_from_centroids; fov_estimate defaults to CAMERA_FOV_DEG.
+    """
+    kwargs.setdefault("fov_estimate", CAMERA_FOV_DEG)
+    return await T3_INSTANCE.solve_from_centroids_async(centroids, size, executor, **kwargs)
+
+async def solve_async(image_name, image_path, pitch_deg=None, roll_deg=0.0, gravity=None, time_iso=None,
+                      executor=None):
+    """
+    image_processor as a coroutine, returning the result dict: Cedar Detect runs through
+    detect_async, masking, ranking and solving in the executor.
+    """
+    loop = asyncio.get_running_loop()
+    call = _new_solve_call()
+    steps = _image_processor_steps(image_name, image_path, pitch_deg, roll_deg, gravity, time_iso, call)
+    cedar_result = None
+    while True:
+        step = loop.run_in_executor(executor, _advance_image_processor, steps, cedar_result)
+        try:
+            # Shielded so that on cancel the step can be waited out before closing steps.
+            request, result = await asyncio.shield(step)
+        except asyncio.CancelledError:
+            # Only this call: others for the same image name keep running.
+            _cancel_solve_call(call)
+            step.add_done_callback(lambda _: steps.close())
+            raise
+        if request is None:
+            return result
+        sigma, detect_hot_pixels = request
+        try:
+            cedar_result = await detect_async(image_path, sigma=sigma, detect_hot_pixels=detect_hot_pixels)
+        except asyncio.CancelledError:
+            steps.close()
+            raise
+
+async def fix_async(observations, executor=None, **kwargs):
+    """
+    solve_iterative as a coroutine, returning the result dict. observations is the list
+    of observation dicts (or its JSON); keyword arguments are those of solve_iterative.
+    """
+    if not isinstance(observations, str):
+        observations = json.dumps(observations)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(_solve_iterative, observations, **kwargs))
@@ -0,0 +1,133 @@
+# corrections.py
+#
+# Closed-form altitude corrections for sight reduction, as numpy array operations:
+# refraction, dip of the horizon and parallax.
+#
+# Refraction models are registered in REFRACTION_MODELS by name. Each takes the
+# true (unrefracted) altitude in degrees plus pressure and temperature and returns
+# the refraction in degrees, to be added to get the observed altitude:
+# - "saemundsson": Saemundsson (1986), the standard nautical almanac formula,
+#   usable down to the horizon.
+# - "erfa": A tan z + B tan^3 z with ERFA's constants (erfa.refco), the model of
+#   astropy's AltAz frame; poor below about 10 degrees.
+# Bennett's formula, which works the other way (observed -> refraction), is
+# available as refraction_bennett_deg for correcting observed altitudes.
+# Saemundsson's and Bennett's formulas turn back (and later diverge) a little below
+# the horizon, so like ERFA, which holds its refraction constant beyond a zenith
+# distance of 87 degrees, they hold theirs constant below MIN_REFRACTION_ALTITUDE_DEG.
+#
+# compare_with_astropy reports each model's difference to astropy across the
+# altitude range.
+
+import numpy as np
+
+STANDARD_PRESSURE_HPA = 1010.0
+STANDARD_TEMPERATURE_C = 10.0
+# Lowest altitude the closed-form formulas are evaluated at (their maximum lies
+# near -1.7 to -1.9 degrees).
+MIN_REFRACTION_ALTITUDE_DEG = -1.0
+
+
+def _pressure_temperature_factor(pressure_hpa, temperature_c):
+    """Scaling of the standard-atmosphere refraction formulas (Meeus, Astronomical Algorithms)."""
+    return (np.asarray(pressure_hpa, dtype=float) / STANDARD_PRESSURE_HPA) * (
+        283.0 / (273.0 + np.asarray(temperature_c, dtype=float)))
+
+
+def refraction_saemundsson_deg(true_alt_deg, pressure_hpa=STANDARD_PRESSURE_HPA,
+                               temperature_c=STANDARD_TEMPERATURE_C):
+    """Refraction (degrees) for a true altitude, Saemundsson's formula."""
+    h = np.maximum(np.asarray(true_alt_deg, dtype=float), MIN_REFRACTION_ALTITUDE_DEG)
+    r_arcmin = 1.02 / np.tan(np.deg2rad(h + 10.3 / (h + 5.11)))
+    return np.maximum(r_arcmin, 0.0) / 60.0 * _pressure_temperature_factor(pressure_hpa, temperature_c)
+
+
+def refraction_bennett_deg(observed_alt_deg, pressure_hpa=STANDARD_PRESSURE_HPA,
+                           temperature_c=STANDARD_TEMPERATURE_C):
+    """Refraction (degrees) for an observed (apparent) altitude, Bennett's formula."""
+    h = np.maximum(np.asarray(observed_alt_deg, dtype=float), MIN_REFRACTION_ALTITUDE_DEG)
+    r_arcmin = 1.0 / np.tan(np.deg2rad(h + 7.31 / (h + 4.4)))
+    return np.maximum(r_arcmin, 0.0) / 60.0 * _pressure_temperature_factor(pressure_hpa, temperature_c)
+
+
+def refraction_erfa_deg(true_alt_deg, pressure_hpa=STANDARD_PRESSURE_HPA,
+                        temperature_c=STANDARD_TEMPERATURE_C):
+    """
+    Refraction (degrees) for a true altitude with ERFA's A tan z + B tan^3 z model,
+    where z is the observed zenith distance (found by fixed-point iteration).
+    """
+    import erfa
+    a, b = erfa.refco(float(pressure_hpa), float(temperature_c), 0.0, 1.0)
+    z_true = np.deg2rad(90.0 - np.minimum(np.asarray(true_alt_deg, dtype=float), 90.0))
+    r = np.zeros_like(z_true)
+    for _ in range(3):
+        tan_z = np.tan(np.minimum(z_true - r, np.deg2rad(87.0)))
+        r = a * tan_z + b * tan_z ** 3
+    return np.rad2deg(r)
+
+
+REFRACTION_MODELS = {
+    "saemundsson": refraction_saemundsson_deg,
+    "erfa": refraction_erfa_deg,
+}
+
+
+def refraction_model(name, pressure_hpa=STANDARD_PRESSURE_HPA, temperature_c=STANDARD_TEMPERATURE_C):
+    """Refraction function true_alt_deg -> degrees for the named model and conditions."""
+    model = REFRACTION_MODELS[name]
+    return lambda true_alt_deg: model(true_alt_deg, pressure_hpa, temperature_c)
+
+
+def dip_deg(height_of_eye_m):
+    """Dip of the sea horizon (degrees) for a height of eye in meters: 1.758' sqrt(h)."""
+    h = np.maximum(np.asarray(height_of_eye_m, dtype=float), 0.0)
+    return 1.758 * np.sqrt(h) / 60.0
+
+
+def parallax_in_altitude_deg(alt_deg, horizontal_parallax_deg):
+    """Parallax in altitude (degrees): HP cos(alt). Zero for stars; for Moon, Sun and planets."""
+    return np.asarray(horizontal_parallax_deg, dtype=float) * np.cos(np.deg2rad(alt_deg))
+
+
+def observed_to_true_altitude(observed_alt_deg, pressure_hpa=STANDARD_PRESSURE_HPA,
+                              temperature_c=STANDARD_TEMPERATURE_C, height_of_eye_m=0.0,
+                              horizontal_parallax_deg=0.0):
+    """
+    Full reduction of an observed altitude to a true (geocentric) altitude: dip (for a
+    sea-horizon sight), refraction (Bennett) and parallax.
+    """
+    h = np.asarray(observed_alt_deg, dtype=float) - dip_deg(height_of_eye_m)
+    h = h - refraction_bennett_deg(h, pressure_hpa, temperature_c)
+    return h + parallax_in_altitude_deg(h, horizontal_parallax_deg)
+
+
+def compare_with_astropy(pressure_hpa=1013.25, temperature_c=15.0, min_alt_deg=5.0, step_deg=1.0):
+    """
+    Compares the refraction models with astropy's AltAz refraction for true altitudes
+    from min_alt_deg to 89 degrees. Returns {model name: largest difference in arcsec},
+    including "bennett" (evaluated at astropy's observed altitudes).
+    """
+    import astropy.units as u
+    from astropy.time import Time
+    from astropy.coordinates import SkyCoord, EarthLocation, AltAz
+
+    true_alt = np.arange(min_alt_deg, 89.0 + 1e-9, step_deg)
+    time = Time("2025-01-01T00:00:00")
+    location = EarthLocation(lat=0.0 * u.deg, lon=0.0 * u.deg)
+    vacuum = AltAz(obstime=time, location=location)
+    air = AltAz(obstime=time, location=location, pressure=pressure_hpa * u.hPa,
+                temperature=temperature_c * u.deg_C, relative_humidity=0.0, obswl=1.0 * u.micron)
+    stars = SkyCoord(alt=true_alt * u.deg, az=np.full(len(true_alt), 180.0) * u.deg, frame=vacuum)
+    observed_alt = stars.transform_to(air).alt.deg
+    reference = observed_alt - true_alt
+
+    result = {name: float(np.max(np.abs(model(true_alt, pressure_hpa, temperature_c) - reference)) * 3600.0)
+              for name, model in REFRACTION_MODELS.items()}
+    bennett = refraction_bennett_deg(observed_alt, pressure_hpa, temperature_c)
+    result["bennett"] = float(np.max(np.abs(bennett - reference)) * 3600.0)
+    return result
+
+
+if __name__ == "__main__":
+    for name, error in compare_with_astropy().items():
+        print(f"{name}: {error:.2f} arcsec")
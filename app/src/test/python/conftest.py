@@ -0,0 +1,62 @@
+# Tests for the Chaquopy backend in app/src/main/python, run on the desktop:
+#     python -m pytest app/src/test/python
+import os
+import sys
+
+import numpy as np
+
+_PYTHON_DIR = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "main", "python")
+sys.path[:0] = [os.path.abspath(_PYTHON_DIR), os.path.abspath(os.path.join(_PYTHON_DIR, "cedar-solve"))]
+
+SIGHT_UTC_US = 1710968400 * 1000000
+SIGHT_TIME_ISO = "2024-03-20T21:00:00Z"
+
+
+def _chosen_stars(lat, lon, count, seed, min_alt_deg):
+    """ICRS (ra, dec) and Earth-fixed places (gha, dec) of the synthetic_sights stars."""
+    import celestial_navigator as cn
+    rng = np.random.default_rng(seed)
+    ra = rng.uniform(0.0, 360.0, 4000)
+    dec = np.rad2deg(np.arcsin(rng.uniform(-1.0, 1.0, 4000)))
+    gha, app_dec, _ = cn.earth_fixed_places(ra, dec, np.full(len(ra), SIGHT_UTC_US))
+    alt, az = cn.fast_altaz(gha, app_dec, lat, lon)
+    chosen = []
+    for sector in range(count):
+        low, high = 360.0 * sector / count, 360.0 * (sector + 1) / count
+        candidates = np.flatnonzero((alt > min_alt_deg) & (alt < 75.0) & (az >= low) & (az < high))
+        chosen.append(candidates[0])
+    return ra[chosen], dec[chosen], gha[chosen], app_dec[chosen]
+
+
+def synthetic_sights(lat, lon, count=6, seed=0, min_alt_deg=20.0):
+    """
+    Earth-fixed places (gha_deg, dec_deg) of `count` stars seen from (lat, lon) at
+    SIGHT_UTC_US, spread in azimuth and above min_alt_deg, with their exact observed
+    altitudes (no refraction) from fast_altaz.
+    """
+    import celestial_navigator as cn
+    _, _, gha, app_dec = _chosen_stars(lat, lon, count, seed, min_alt_deg)
+    return gha, app_dec, cn.fast_altaz(gha, app_dec, lat, lon)[0]
+
+
+def synthetic_observations(lat, lon, count=6, seed=0, min_alt_deg=20.0, refraction_ab=(0.0, 0.0)):
+    """
+    The synthetic_sights stars as solve_iterative observations (ra, dec, alt, time_iso),
+    with altitudes observed through refraction_ab (see celestial_navigator.refraction_for).
+    """
+    import celestial_navigator as cn
+    ra, dec, gha, app_dec = _chosen_stars(lat, lon, count, seed, min_alt_deg)
+    alt, _ = cn.fast_altaz(gha, app_dec, lat, lon, refraction_ab)
+    return [{"ra": float(r), "dec": float(d), "alt": float(h), "time_iso": SIGHT_TIME_ISO}
+            for r, d, h in zip(ra, dec, alt)]
+
+
+def write_sky_image(path, size=(300, 400), stars=20, seed=2):
+    """Writes a grayscale PNG of `stars` 3x3 pixel stars on a noisy background to path."""
+    from PIL import Image
+    rng = np.random.default_rng(seed)
+    image = rng.normal(30.0, 4.0, size)
+    for y, x in rng.uniform(10, np.array(size) - 10, (stars, 2)):
+        image[int(y) - 1:int(y) + 2, int(x) - 1:int(x) + 2] += rng.uniform(50, 200)
+    Image.fromarray(np.clip(image, 0, 255).astype(np.uint8)).save(path)
+    return str(path)
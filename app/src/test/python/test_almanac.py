@@ -0,0 +1,92 @@
+import threading
+
+import numpy as np
+import pytest
+
+import almanac
+
+pytestmark = pytest.mark.skipif(almanac.Almanac.default() is None, reason="almanac.npz missing")
+
+UTC_US = almanac.utc_microseconds("2025-03-01T12:00:00Z")
+RA = np.array([10.0, 101.287, 200.0, 279.2])
+DEC = np.array([20.0, -16.716, -40.0, 38.8])
+
+
+@pytest.fixture
+def ephemeris():
+    """A private instance, so set_eop does not leak into other tests."""
+    return almanac.Almanac()
+
+
+def _utc_mjd_us(eop):
+    mjd = eop.mjd0 + np.arange(len(eop.ut1_minus_tai_s))
+    return almanac.J2000_UNIX_US + np.round((mjd - 51544.5) * almanac.US_PER_DAY).astype(np.int64)
+
+
+def _ut1_minus_utc(ephemeris):
+    eop = ephemeris.eop
+    return eop.ut1_minus_tai_s + ephemeris.tai_minus_utc_s(_utc_mjd_us(eop))
+
+
+def test_utc_microseconds():
+    assert almanac.utc_microseconds("1970-01-01T00:00:01Z") == 1000000
+    assert almanac.utc_microseconds("2024-05-01T23:30:15.250+02:00") == \
+        almanac.utc_microseconds("2024-05-01T21:30:15.250")
+    assert almanac.utc_microseconds(12345) == 12345
+
+
+def test_matches_astropy(ephemeris):
+    pytest.importorskip("astropy")
+    assert almanac.validate_against_astropy(ephemeris, samples=50) < 0.05
+
+
+def test_covers_window(ephemeris):
+    assert ephemeris.covers(UTC_US)
+    assert not ephemeris.covers(almanac.utc_microseconds("1990-01-01T00:00:00Z"))
+    with pytest.raises(ValueError):
+        ephemeris.earth_fixed(RA, DEC, almanac.utc_microseconds("1990-01-01T00:00:00Z"))
+
+
+def test_set_eop_same_table_is_identity(ephemeris):
+    gha, dec = ephemeris.earth_fixed(RA, DEC, UTC_US)
+    aries = ephemeris.gha_aries(UTC_US)
+    eop = ephemeris.eop
+    ephemeris.set_eop(eop.mjd0, _ut1_minus_utc(ephemeris), eop.polar_motion_arcsec)
+    np.testing.assert_allclose(ephemeris.earth_fixed(RA, DEC, UTC_US), (gha, dec), atol=1e-9)
+    np.testing.assert_allclose(ephemeris.gha_aries(UTC_US), aries, atol=1e-9)
+
+
+def test_set_eop_shifts_earth_rotation(ephemeris):
+    gha, dec = ephemeris.earth_fixed(RA, DEC, UTC_US)
+    eop = ephemeris.eop
+    ephemeris.set_eop(eop.mjd0, _ut1_minus_utc(ephemeris) + 1.0, eop.polar_motion_arcsec)
+    new_gha, new_dec = ephemeris.earth_fixed(RA, DEC, UTC_US)
+    # One second of UT1 turns the Earth by 15.04 arcseconds (GHA grows westward).
+    np.testing.assert_allclose((new_gha - gha) * 3600.0, 15.041, atol=0.01)
+    np.testing.assert_allclose(new_dec, dec, atol=1e-9)
+
+
+def test_set_eop_is_atomic_for_readers(ephemeris):
+    eop = ephemeris.eop
+    tables = [(eop.mjd0, _ut1_minus_utc(ephemeris) + offset, eop.polar_motion_arcsec + offset)
+              for offset in (0.0, 0.5)]
+    expected = []
+    for table in tables:
+        ephemeris.set_eop(*table)
+        expected.append(ephemeris.earth_fixed(RA, DEC, UTC_US)[0])
+    stop = threading.Event()
+
+    def writer():
+        while not stop.is_set():
+            for table in tables:
+                ephemeris.set_eop(*table)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(300):
+            gha = ephemeris.earth_fixed(RA, DEC, UTC_US)[0]
+            assert any(np.allclose(gha, candidate, atol=1e-12) for candidate in expected)
+    finally:
+        stop.set()
+        thread.join()
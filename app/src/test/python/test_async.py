@@ -0,0 +1,111 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+import celestial_navigator as cn
+import tetra3
+from conftest import write_sky_image
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="scripted cedar_cli needs a POSIX shell")
+
+
+class _BlockingSolver:
+    """Stands in for T3_INSTANCE: every solve waits for release or for its cancel (10 s at most)."""
+    database_fingerprint = "test"
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.waiting = 0
+        self.statuses = []
+
+    def solve_from_centroids(self, centroids, size, context=None, **kwargs):
+        self.waiting += 1
+        deadline = time.monotonic() + 10.0
+        while not self.release.is_set() and not context.cancelled and time.monotonic() < deadline:
+            time.sleep(0.005)
+        if context.cancelled:
+            status = {"status": tetra3.CANCELLED, "T_solve": 1.0, "RA": None}
+        else:
+            status = {"status": tetra3.MATCH_FOUND, "T_solve": 1.0, "RA": 10.0, "Dec": 20.0,
+                      "Roll": 0.0, "FOV": 50.0}
+        self.statuses.append(status["status"])
+        return status
+
+
+@pytest.fixture
+def app_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(cn, "_app_files_dir", lambda: str(tmp_path))
+    monkeypatch.setattr(cn, "_app_cache_dir", lambda: str(tmp_path))
+    monkeypatch.setattr(cn.SolveCache, "MAX_ENTRIES", 0)
+    return tmp_path
+
+
+async def _until(condition, timeout_s=10.0):
+    deadline = time.monotonic() + timeout_s
+    while not condition():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_cancel_one_of_two_solves_of_the_same_image(app_dirs, monkeypatch):
+    solver = _BlockingSolver()
+    monkeypatch.setattr(cn, "T3_INSTANCE", solver)
+    monkeypatch.delenv("CEDAR_CLI", raising=False)
+    image_path = write_sky_image(app_dirs / "sky.png")
+
+    async def scenario():
+        first = asyncio.create_task(cn.solve_async("sky", image_path))
+        second = asyncio.create_task(cn.solve_async("sky", image_path))
+        await _until(lambda: solver.waiting == 2)
+        assert len(cn._RUNNING_SOLVES["sky"]) == 2
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        await _until(lambda: solver.statuses == [tetra3.CANCELLED])
+        solver.release.set()
+        result = await second
+        await _until(lambda: "sky" not in cn._RUNNING_SOLVES)
+        return result
+
+    result = asyncio.run(scenario())
+    assert result["solved"] == 1
+    assert solver.statuses == [tetra3.CANCELLED, tetra3.MATCH_FOUND]
+
+
+def test_cancel_image_processor_stops_every_call_of_the_name(app_dirs, monkeypatch):
+    solver = _BlockingSolver()
+    monkeypatch.setattr(cn, "T3_INSTANCE", solver)
+    monkeypatch.setattr(cn, "SOLVE_STAGES", cn.SOLVE_STAGES[:1])
+    monkeypatch.delenv("CEDAR_CLI", raising=False)
+    image_path = write_sky_image(app_dirs / "sky.png")
+
+    async def scenario():
+        calls = [asyncio.create_task(cn.solve_async("sky", image_path)) for _ in range(2)]
+        await _until(lambda: solver.waiting == 2)
+        assert cn.cancel_image_processor("sky")
+        return await asyncio.gather(*calls)
+
+    assert [result["solved"] for result in asyncio.run(scenario())] == [0, 0]
+    assert not cn.cancel_image_processor("sky")
+
+
+def test_concurrent_detections_keep_their_own_output(app_dirs, monkeypatch):
+    cedar = app_dirs / "cedar_cli"
+    # argv: --input path --output path --sigma s --hot-pixels b; reports the sigma back
+    cedar.write_text('#!/bin/sh\nsleep 0.2\necho "{\\"stars\\": [{\\"x\\": 1.0, \\"y\\": 2.0, '
+                     '\\"brightness\\": $6}]}" > "$4"\n')
+    cedar.chmod(0o755)
+    monkeypatch.setenv("CEDAR_CLI", str(cedar))
+    image_path = write_sky_image(app_dirs / "sky.png")
+
+    async def scenario():
+        return await asyncio.gather(*(cn.detect_async(image_path, sigma=sigma)
+                                      for sigma in (4.0, 5.0, 6.0)))
+
+    results = asyncio.run(scenario())
+    assert [result["stars"][0]["brightness"] for result in results] == [4.0, 5.0, 6.0]
+    assert cn.detect_centroids_cli(image_path, sigma=3.0)["stars"][0]["brightness"] == 3.0
+    assert not [name for name in os.listdir(app_dirs) if name.startswith("cedar_out_")]
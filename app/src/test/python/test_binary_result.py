@@ -0,0 +1,76 @@
+import json
+
+import numpy as np
+import pytest
+
+import celestial_navigator as cn
+import tetra3
+from conftest import SIGHT_TIME_ISO, synthetic_observations, write_sky_image
+
+
+def _scalar_values(result, fields):
+    return [np.nan if result.get(name) is None else float(result[name]) for name in fields]
+
+
+def test_solve_layout_matches_json():
+    observations = json.dumps(synthetic_observations(40.0, -30.0, refraction_ab=cn.refraction_for()))
+    args = (observations, 41.0, -31.0)
+    binary = cn.solve_iterative_binary(*args, validate=False, uncertainty_samples=0)
+    result = json.loads(cn.solve_iterative(*args, validate=False, uncertainty_samples=0))
+
+    assert binary.error is None
+    assert binary.scalars.dtype == np.float64 and binary.scalars.shape == (len(cn.SOLVE_RESULT_FIELDS),)
+    np.testing.assert_array_equal(binary.scalars, _scalar_values(result, cn.SOLVE_RESULT_FIELDS))
+    assert np.isnan(binary.scalar("model_check_arcsec"))  # None without validate
+    assert binary.scalar("fixed_latitude") == result["fixed_latitude"]
+
+    assert set(binary.arrays) == set(cn.SOLVE_RESULT_ARRAYS)
+    assert all(array.dtype == np.float64 and array.ndim == 1 for array in binary.arrays.values())
+    np.testing.assert_array_equal(binary.arrays["covariance_nm2"],
+                                  np.ravel(result["covariance_nm2"]))
+    np.testing.assert_array_equal(binary.arrays["residuals_nm"], result["residuals_nm"])
+    assert len(binary.arrays["discarded_observations"]) == 0
+    assert json.loads(binary.to_json()) == result
+
+
+def test_error_result_is_all_nan():
+    binary = cn.solve_iterative_binary("[]")
+    assert binary.error == json.loads(cn.solve_iterative("[]"))["error"]
+    assert np.isnan(binary.scalars).all()
+    assert all(len(array) == 0 for array in binary.arrays.values())
+
+
+class _MatchingSolver:
+    """Stands in for T3_INSTANCE: solves every request, matching the first three centroids."""
+    database_fingerprint = "test"
+
+    def solve_from_centroids(self, centroids, size, **kwargs):
+        return {"status": tetra3.MATCH_FOUND, "T_solve": 1.0, "RA": 10.0, "Dec": 20.0,
+                "Roll": 0.0, "FOV": 50.0, "distortion": 0.0, "matched_centroids": centroids[:3],
+                "matched_stars": [[10.0, 20.0, 1.0], [11.0, 21.0, 2.0], [12.0, 22.0, 3.0]]}
+
+
+def test_image_layout_matches_json(tmp_path, monkeypatch):
+    monkeypatch.setattr(cn, "_app_files_dir", lambda: str(tmp_path))
+    monkeypatch.setattr(cn, "_app_cache_dir", lambda: str(tmp_path))
+    monkeypatch.setattr(cn.SolveCache, "MAX_ENTRIES", 0)
+    monkeypatch.setattr(cn, "T3_INSTANCE", _MatchingSolver())
+    monkeypatch.delenv("CEDAR_CLI", raising=False)
+    image_path = write_sky_image(tmp_path / "sky.png")
+    args = ("sky", image_path, None, 0.0, [0.0, 9.81, 0.0], SIGHT_TIME_ISO)
+
+    binary = cn.image_processor_binary(*args)
+    result = json.loads(cn.image_processor(*args))
+    assert result["solved"] == 1 and binary.error is None
+    np.testing.assert_array_equal(binary.scalars, _scalar_values(result, cn.IMAGE_RESULT_FIELDS))
+    assert binary.scalar("capture_utc_ms") == pytest.approx(1710968400 * 1000.0)
+    np.testing.assert_array_equal(binary.arrays["centroids"], np.ravel(result["centroids"]))
+
+    observations = binary.arrays["star_observations"]
+    assert observations.dtype == np.float64
+    assert observations.shape == (3 * len(cn.STAR_OBSERVATION_COLUMNS),)
+    np.testing.assert_array_equal(
+        observations.reshape(-1, len(cn.STAR_OBSERVATION_COLUMNS)),
+        [[obs[column] for column in cn.STAR_OBSERVATION_COLUMNS] for obs in result["star_observations"]])
+    assert observations.reshape(3, -1)[:, 0].tolist() == [10.0, 11.0, 12.0]
+    assert json.loads(binary.to_json()) == result
@@ -0,0 +1,72 @@
+import json
+import math
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import celestial_navigator as cn
+from conftest import write_sky_image
+
+WIDTH = 1000
+
+
+def _rotation(deg):
+    a = math.radians(deg)
+    return np.array([[math.cos(a), -math.sin(a)], [math.sin(a), math.cos(a)]])
+
+
+@pytest.mark.parametrize("roll_deg, shift", [(0.0, (12.0, -7.0)), (0.6, (-20.5, 3.25)),
+                                             (-1.0, (0.0, 0.0))])
+def test_frame_transform_recovers_shift_and_roll(roll_deg, shift):
+    rng = np.random.default_rng(7)
+    ref = rng.uniform([0.0, 0.0], [750.0, WIDTH], (30, 2))
+    R, t = _rotation(roll_deg), np.array(shift)
+    # The frame saw the reference stars through the inverse motion, a few of them missed
+    # and a few new ones added, with sub-pixel centroid noise.
+    frame = (ref - t) @ R + rng.normal(0.0, 0.05, ref.shape)
+    frame = np.vstack([frame[3:], rng.uniform([0.0, 0.0], [750.0, WIDTH], (3, 2))])
+
+    fit = cn._estimate_frame_transform(ref, frame, WIDTH)
+    assert fit is not None
+    R_fit, t_fit, num_matches = fit
+    assert num_matches == 22  # Shared by the BURST_ALIGN_STARS brightest of both lists
+    assert math.degrees(math.atan2(R_fit[1, 0], R_fit[0, 0])) == pytest.approx(roll_deg, abs=0.01)
+    np.testing.assert_allclose(frame[:5] @ R_fit.T + t_fit, ref[3:8], atol=0.2)
+
+
+def test_unrelated_frames_do_not_register():
+    rng = np.random.default_rng(8)
+    assert cn._estimate_frame_transform(rng.uniform(0, 750, (2, 2)), rng.uniform(0, 750, (9, 2)),
+                                        WIDTH) is None
+
+
+def test_burst_passes_gravity_time_and_orientation_on(tmp_path, monkeypatch):
+    monkeypatch.setattr(cn, "_app_cache_dir", lambda: str(tmp_path))
+    paths = []
+    for i in range(2):
+        path = write_sky_image(tmp_path / f"frame{i}.png")
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        with Image.open(path) as img:
+            img.load()
+        img.save(path, exif=exif)
+        paths.append(path)
+    calls = []
+
+    def fake_image_processor(image_name, image_path, pitch_deg, roll_deg, gravity, time_iso):
+        calls.append((image_path, pitch_deg, roll_deg, gravity, time_iso,
+                      cn._image_orientation(image_path)))
+        return {"solved": 0}
+    monkeypatch.setattr(cn, "_image_processor", fake_image_processor)
+    monkeypatch.setattr(cn, "_capture_time_iso",
+                        lambda path: "2024-03-20T21:00:00Z" if path == paths[0] else None)
+
+    gravity = [0.0, 9.81, 0.0]
+    result = json.loads(cn.burst_processor("burst", json.dumps(paths), gravity=gravity))
+    assert result["burst"]["stacked"] == 2
+    result = json.loads(cn.burst_processor("burst", json.dumps(paths), 10.0, 5.0, gravity,
+                                           "2024-03-20T22:00:00+01:00"))
+    assert [call[1:] for call in calls] == [
+        (None, 0.0, gravity, "2024-03-20T21:00:00Z", 6),
+        (10.0, 5.0, gravity, "2024-03-20T22:00:00+01:00", 6)]
@@ -0,0 +1,54 @@
+import numpy as np
+
+import celestial_navigator as cn
+
+SIZE = (300, 300)
+
+
+def test_rank_orders_by_brightness_and_drops_duplicates():
+    yx = np.array([[10.0, 10.0], [50.0, 50.0], [11.0, 11.0], [100.0, 100.0], [50.5, 49.0]])
+    brightness = np.array([5.0, 3.0, 9.0, 1.0, 4.0])
+    ranked_yx, ranked_brightness = cn._rank_centroids(yx, brightness)
+    # (10, 10) duplicates the brighter (11, 11); (50, 50) the brighter (50.5, 49)
+    assert ranked_yx.tolist() == [[11.0, 11.0], [50.5, 49.0], [100.0, 100.0]]
+    assert ranked_brightness.tolist() == [9.0, 4.0, 1.0]
+
+
+def test_rank_keeps_equal_brightness_in_input_order():
+    yx = np.array([[10.0, 10.0], [20.0, 20.0], [30.0, 30.0]])
+    ranked_yx, _ = cn._rank_centroids(yx, np.ones(3))
+    assert ranked_yx.tolist() == yx.tolist()
+    ranked_yx, _ = cn._rank_centroids(np.empty((0, 2)), np.empty(0))
+    assert len(ranked_yx) == 0
+
+
+def _cluster_field():
+    """Brightest first: a bright cluster in the top-left ninth, then one star per other ninth."""
+    cluster = np.column_stack((np.linspace(10.0, 90.0, 10), np.linspace(10.0, 90.0, 10)))
+    others = np.array([[50.0, 150.0], [50.0, 250.0], [150.0, 50.0], [150.0, 150.0],
+                       [150.0, 250.0], [250.0, 50.0], [250.0, 150.0], [250.0, 250.0]])
+    return np.vstack([cluster, others])
+
+
+def test_select_without_grid_takes_the_brightest():
+    yx = _cluster_field()
+    assert cn._select_centroids(yx, SIZE, 5).tolist() == yx[:5].tolist()
+    assert cn._select_centroids(yx, SIZE, 100).tolist() == yx.tolist()
+
+
+def test_select_with_grid_balances_the_frame():
+    yx = _cluster_field()
+    selected = cn._select_centroids(yx, SIZE, 12, balance_grid=3)
+    assert len(selected) == 12
+    # The brightest star of every ninth first (in brightness order), then the cluster.
+    assert selected[:9].tolist() == [yx[0].tolist()] + yx[10:].tolist()
+    assert selected[9:].tolist() == yx[1:4].tolist()
+    cells = (selected[:9] // 100).astype(int)
+    assert len({tuple(cell) for cell in cells}) == 9
+
+
+def test_select_with_grid_respects_max_count():
+    yx = _cluster_field()
+    assert cn._select_centroids(yx, SIZE, 4, balance_grid=3).tolist() == \
+        [yx[0].tolist()] + yx[10:13].tolist()
+    assert cn._select_centroids(yx, SIZE, 100, balance_grid=3).tolist() == yx.tolist()
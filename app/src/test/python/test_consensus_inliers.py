@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+import celestial_navigator as cn
+from conftest import synthetic_sights
+
+TRUE_LAT, TRUE_LON = -33.0, 151.0
+
+
+def test_flags_gross_outliers():
+    gha, dec, ho = synthetic_sights(TRUE_LAT, TRUE_LON, count=8, seed=2)
+    ho = ho + np.random.default_rng(1).normal(0.0, 0.5, len(ho)) / 60.0
+    ho[[2, 5]] += np.array([25.0, -40.0]) / 60.0
+    inliers, lat, lon = cn.consensus_inliers(gha, dec, ho, TRUE_LAT + 0.3, TRUE_LON - 0.3)
+    expected = np.ones(len(ho), dtype=bool)
+    expected[[2, 5]] = False
+    np.testing.assert_array_equal(inliers, expected)
+    assert lat == pytest.approx(TRUE_LAT, abs=5.0 / 60.0)
+    assert lon == pytest.approx(TRUE_LON, abs=5.0 / 60.0)
+
+
+def test_all_consistent_sights_are_inliers():
+    gha, dec, ho = synthetic_sights(TRUE_LAT, TRUE_LON, count=5, seed=3)
+    inliers, lat, lon = cn.consensus_inliers(gha, dec, ho, TRUE_LAT, TRUE_LON)
+    assert inliers.all()
+    assert lat == pytest.approx(TRUE_LAT, abs=1e-3)
+    assert lon == pytest.approx(TRUE_LON, abs=1e-3)
+
+
+def test_no_usable_pair():
+    gha, dec, ho = synthetic_sights(TRUE_LAT, TRUE_LON, count=1)
+    # The same star twice: every pair has zero azimuth separation.
+    assert cn.consensus_inliers(np.repeat(gha, 3), np.repeat(dec, 3), np.repeat(ho, 3),
+                                TRUE_LAT, TRUE_LON) is None
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+import corrections
+
+CONDITIONS = [(1010.0, 10.0), (1030.0, -10.0), (980.0, 30.0)]
+
+
+@pytest.mark.parametrize("pressure_hpa, temperature_c", CONDITIONS)
+def test_saemundsson_matches_erfa(pressure_hpa, temperature_c):
+    alt = np.arange(5.0, 90.01, 0.5)
+    erfa_deg = corrections.refraction_erfa_deg(alt, pressure_hpa, temperature_c)
+    saemundsson_deg = corrections.refraction_saemundsson_deg(alt, pressure_hpa, temperature_c)
+    # ERFA's two-term model is itself off by tens of arcseconds near 5 degrees
+    assert np.max(np.abs(saemundsson_deg - erfa_deg)) * 3600.0 < 45.0
+    assert np.max(np.abs(saemundsson_deg - erfa_deg)[alt >= 10.0]) * 3600.0 < 15.0
+
+
+@pytest.mark.parametrize("pressure_hpa, temperature_c", CONDITIONS)
+def test_bennett_matches_erfa(pressure_hpa, temperature_c):
+    alt = np.arange(5.0, 90.01, 0.5)
+    erfa_deg = corrections.refraction_erfa_deg(alt, pressure_hpa, temperature_c)
+    bennett_deg = corrections.refraction_bennett_deg(alt + erfa_deg, pressure_hpa, temperature_c)
+    assert np.max(np.abs(bennett_deg - erfa_deg)) * 3600.0 < 45.0
+    assert np.max(np.abs(bennett_deg - erfa_deg)[alt >= 10.0]) * 3600.0 < 15.0
+
+
+@pytest.mark.parametrize("pressure_hpa, temperature_c", CONDITIONS)
+def test_models_match_astropy(pressure_hpa, temperature_c):
+    errors = corrections.compare_with_astropy(pressure_hpa, temperature_c)
+    assert set(errors) == {"saemundsson", "erfa", "bennett"}
+    assert errors["erfa"] < 1.0
+    assert errors["saemundsson"] < 45.0 and errors["bennett"] < 45.0
+    errors = corrections.compare_with_astropy(pressure_hpa, temperature_c, min_alt_deg=10.0)
+    assert errors["saemundsson"] < 15.0 and errors["bennett"] < 15.0
+
+
+@pytest.mark.parametrize("model", [corrections.refraction_saemundsson_deg,
+                                   corrections.refraction_bennett_deg])
+def test_refraction_held_below_horizon(model):
+    alt = np.arange(-10.0, 2.01, 0.25)
+    refraction = model(alt)
+    assert np.all(np.isfinite(refraction))
+    assert np.all(refraction <= model(corrections.MIN_REFRACTION_ALTITUDE_DEG) + 1e-12)
+    assert np.all(np.diff(refraction) <= 1e-12)
+    assert model(-2.0) == pytest.approx(model(corrections.MIN_REFRACTION_ALTITUDE_DEG))
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+import celestial_navigator as cn
+from conftest import SIGHT_UTC_US
+
+
+def _stars_above_horizon(utc_us, lat, lon, rng):
+    """ICRS (ra, dec) of stars within about 50 deg of the zenith at each instant."""
+    jd = utc_us / 86400e6 + 2440587.5
+    gmst = 280.46061837 + 360.98564736629 * (jd - 2451545.0)
+    ra = (gmst + lon + rng.uniform(-40.0, 40.0, len(utc_us))) % 360.0
+    dec = np.clip(lat + rng.uniform(-40.0, 40.0, len(utc_us)), -89.0, 89.0)
+    return ra, dec
+
+
+@pytest.mark.parametrize("lat, lon", [(0.0, 0.0), (38.5, -122.0), (-45.0, 170.0), (70.0, 25.0)])
+def test_fast_path_matches_astropy(lat, lon):
+    rng = np.random.default_rng(int(lat * 10 + 1000))
+    # Four stars at each of four instants spread over hours to months.
+    utc_us = SIGHT_UTC_US + np.repeat([0, 3600, 2 * 86400, 90 * 86400], 4) * 10**6
+    ra, dec = _stars_above_horizon(utc_us, lat, lon, rng)
+    times = cn.unix_us_to_time(utc_us)
+    gha, dec_app = cn.precompute_earth_fixed(ra, dec, times)
+    hc, _ = cn.fast_altaz(gha, dec_app, lat, lon)
+    assert hc.min() > 5.0
+
+    assert cn.check_fast_altaz_against_astropy(ra, dec, times, lat, lon) < 1.0
+    assert cn.check_fast_altaz_against_astropy(ra, dec, times, lat, lon, height_m=500.0,
+                                               pressure_hpa=950.0, temperature_c=-5.0) < 1.0
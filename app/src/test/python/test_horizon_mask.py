@@ -0,0 +1,43 @@
+import math
+
+import numpy as np
+import pytest
+
+import celestial_navigator as cn
+
+SIZE = (300, 400)  # (height, width)
+FOV_DEG = 40.0
+MIN_ALT = cn.HORIZON_MASK_MIN_ALTITUDE_DEG
+
+
+def _centre_column_altitudes(pitch_deg):
+    """Altitudes of the pixel rows along the vertical centre line, for roll 0."""
+    f = (SIZE[1] / 2.0) / math.tan(math.radians(FOV_DEG) / 2.0)
+    rows = np.arange(SIZE[0]) + 0.5
+    return pitch_deg + np.rad2deg(np.arctan((SIZE[0] / 2.0 - rows) / f))
+
+
+@pytest.mark.parametrize("pitch_deg", [-5.0, 0.0, 10.0])
+def test_rows_below_horizon_are_masked(pitch_deg):
+    mask = cn.horizon_mask(SIZE, pitch_deg, 0.0, fov_deg=FOV_DEG)
+    assert mask.shape == SIZE
+    expected = _centre_column_altitudes(pitch_deg) >= MIN_ALT
+    np.testing.assert_array_equal(mask[:, SIZE[1] // 2], expected)
+    # Sky above, ground below: every column switches from True to False once.
+    assert np.all(np.diff(mask.astype(int), axis=0) <= 0)
+    assert mask[0].all() and not mask[-1].any()
+
+
+def test_roll_turns_the_horizon():
+    # The zenith 90 degrees clockwise from image up: sky to the right.
+    mask = cn.horizon_mask(SIZE, 0.0, 90.0, fov_deg=FOV_DEG)
+    f = (SIZE[1] / 2.0) / math.tan(math.radians(FOV_DEG) / 2.0)
+    columns = np.arange(SIZE[1]) + 0.5
+    expected = np.rad2deg(np.arctan((columns - SIZE[1] / 2.0) / f)) >= MIN_ALT
+    np.testing.assert_array_equal(mask[SIZE[0] // 2], expected)
+    assert not mask[:, 0].any() and mask[:, -1].all()
+
+
+def test_steep_pointing_keeps_or_masks_everything():
+    assert cn.horizon_mask(SIZE, 80.0, 30.0, fov_deg=FOV_DEG).all()
+    assert not cn.horizon_mask(SIZE, -40.0, 0.0, fov_deg=FOV_DEG).any()
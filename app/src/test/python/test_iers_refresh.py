@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import almanac
+import celestial_navigator as cn
+
+pytestmark = pytest.mark.skipif(almanac.Almanac.default() is None, reason="almanac.npz missing")
+
+
+@pytest.fixture
+def finals_text():
+    from astropy.utils import iers
+    with open(iers.IERS_A_FILE) as f:
+        return f.read()
+
+
+@pytest.fixture
+def app_files(tmp_path, monkeypatch):
+    """App files in tmp_path and a private almanac, restoring astropy's EOP table after."""
+    from astropy.utils import iers
+    monkeypatch.setattr(cn, "_app_files_dir", lambda: str(tmp_path))
+    monkeypatch.setattr(cn, "_EPHEMERIS", almanac.Almanac())
+    with iers.earth_orientation_table.set(iers.earth_orientation_table.get()):
+        yield tmp_path
+
+
+def test_refresh_from_local_table(app_files, finals_text, monkeypatch):
+    samples = cn.refresh_iers(fetch=lambda: finals_text)
+    assert samples > 100
+    assert os.listdir(app_files) == [cn.EOP_SNAPSHOT_FILE]
+
+    from astropy.utils import iers
+    table = iers.earth_orientation_table.get()
+    with np.load(app_files / cn.EOP_SNAPSHOT_FILE) as snapshot:
+        mjd0 = int(snapshot["mjd0"])
+        ut1_minus_utc = snapshot["ut1_minus_utc_s"]
+        assert len(ut1_minus_utc) == samples
+    row = int(np.flatnonzero(table["MJD"].to_value("d") == mjd0)[0])
+    assert ut1_minus_utc[0] == pytest.approx(table["UT1_UTC"][row].to_value("s"))
+    assert cn._ephemeris().eop.mjd0 == mjd0
+
+    # A later run starts from the snapshot.
+    refreshed = cn._EPHEMERIS.eop
+    restarted = almanac.Almanac()
+    monkeypatch.setattr(almanac.Almanac, "default", classmethod(lambda cls: restarted))
+    monkeypatch.setattr(cn, "_EPHEMERIS", None)
+    assert cn._ephemeris() is restarted
+    assert restarted.eop.mjd0 == mjd0
+    np.testing.assert_allclose(restarted.eop.ut1_minus_tai_s, refreshed.ut1_minus_tai_s)
+
+def test_failed_refresh_keeps_snapshot(app_files):
+    def offline():
+        raise OSError("offline")
+    results = []
+    cn.refresh_iers_async(offline, results.append).join(10)
+    assert len(results) == 1 and isinstance(results[0], OSError)
+    assert os.listdir(app_files) == []
+
+
+def test_import_does_not_load_astropy():
+    code = "import sys, celestial_navigator; assert 'astropy' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True, capture_output=True,
+                   env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)))
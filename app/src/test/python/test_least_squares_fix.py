@@ -0,0 +1,73 @@
+import json
+
+import numpy as np
+import pytest
+
+import celestial_navigator as cn
+from conftest import synthetic_observations, synthetic_sights
+
+TRUE_LAT, TRUE_LON = 40.0, -30.0
+
+
+def _model(gha, dec):
+    return lambda lat, lon: cn.fast_altaz(gha, dec, lat, lon)
+
+
+def test_converges_to_exact_fix():
+    gha, dec, ho = synthetic_sights(TRUE_LAT, TRUE_LON)
+    fix = cn.least_squares_fix(_model(gha, dec), ho, TRUE_LAT + 0.5, TRUE_LON - 0.7)
+    assert fix["converged"]
+    assert fix["lat"] == pytest.approx(TRUE_LAT, abs=1e-5)
+    assert fix["lon"] == pytest.approx(TRUE_LON, abs=1e-5)
+    assert fix["residual_rms_nm"] < 1e-3
+
+
+def test_covariance_reflects_residual_scatter():
+    gha, dec, ho = synthetic_sights(TRUE_LAT, TRUE_LON, count=8)
+    noise_nm = np.random.default_rng(4).normal(0.0, 1.0, len(ho))
+    fix = cn.least_squares_fix(_model(gha, dec), ho + noise_nm / 60.0, TRUE_LAT, TRUE_LON)
+    assert fix["converged"]
+    covariance = np.asarray(fix["covariance_nm2"])
+    assert covariance.shape == (2, 2)
+    np.testing.assert_allclose(covariance, covariance.T)
+    assert np.all(np.linalg.eigvalsh(covariance) > 0.0)
+    # The fix moves by no more than a few sigma from the truth.
+    offset_nm = np.array([(fix["lat"] - TRUE_LAT) * 60.0,
+                          (fix["lon"] - TRUE_LON) * 60.0 * np.cos(np.deg2rad(TRUE_LAT))])
+    assert offset_nm @ np.linalg.solve(covariance, offset_nm) < 16.0
+    np.testing.assert_allclose(fix["residuals_nm"], (ho + noise_nm / 60.0 - _model(gha, dec)(
+        fix["lat"], fix["lon"])[0]) * 60.0, atol=1e-9)
+
+
+def test_weights_pull_towards_trusted_sights():
+    gha, dec, ho = synthetic_sights(TRUE_LAT, TRUE_LON)
+    ho = ho.copy()
+    ho[0] += 5.0 / 60.0
+    weights = np.ones(len(ho))
+    equal = cn.least_squares_fix(_model(gha, dec), ho, TRUE_LAT, TRUE_LON)
+    weights[0] = 1e-6
+    weighted = cn.least_squares_fix(_model(gha, dec), ho, TRUE_LAT, TRUE_LON, weights=weights)
+    assert abs(weighted["residuals_nm"][0]) > abs(equal["residuals_nm"][0])
+    assert weighted["lat"] == pytest.approx(TRUE_LAT, abs=1e-3)
+
+
+def test_two_sights_have_no_covariance():
+    gha, dec, ho = synthetic_sights(TRUE_LAT, TRUE_LON, count=2)
+    fix = cn.least_squares_fix(_model(gha, dec), ho, TRUE_LAT + 0.2, TRUE_LON + 0.2)
+    assert fix["covariance_nm2"] is None
+    assert fix["lat"] == pytest.approx(TRUE_LAT, abs=1e-4)
+
+
+@pytest.mark.parametrize("true_lat, true_lon", [(40.0, -30.0), (-52.0, 141.0), (65.0, 178.0)])
+@pytest.mark.parametrize("estimate", [None, (0.0, 0.0)])
+def test_unknown_position_is_seeded_globally(true_lat, true_lon, estimate):
+    observations = synthetic_observations(true_lat, true_lon, refraction_ab=cn.refraction_for())
+    lat, lon = estimate if estimate is not None else (None, None)
+    result = cn._solve_iterative(json.dumps(observations), lat, lon, uncertainty_samples=0)
+    assert "error" not in result
+    # The seed comes from the global grid search, not from the (0, 0) placeholder.
+    assert abs(result["seed_latitude"] - true_lat) < 1.0
+    assert abs((result["seed_longitude"] - true_lon + 180.0) % 360.0 - 180.0) < 1.0
+    assert result["fixed_latitude"] == pytest.approx(true_lat, abs=1e-5)
+    assert (result["fixed_longitude"] - true_lon + 180.0) % 360.0 - 180.0 == pytest.approx(0.0, abs=1e-5)
+    assert result["discarded_observations"] == []
@@ -0,0 +1,48 @@
+import json
+
+import numpy as np
+import pytest
+
+import celestial_navigator as cn
+
+# 2024-03-20T21:00:00Z and a few minutes apart
+EPOCH_MS = np.array([1710968400000, 1710968520500, 1710968700250])
+RA = np.array([101.287, 279.235, 213.915])
+DEC = np.array([-16.716, 38.784, 19.182])
+ALT = np.array([35.2, 12.7, 40.1])
+LAT, LON, HEIGHT_M, PRESSURE_HPA, TEMPERATURE_C = 48.0, -4.5, 3.0, 1005.0, 12.0
+
+
+def _batch(**overrides):
+    args = dict(ra_deg=RA, dec_deg=DEC, sextant_altitude_deg=ALT, epoch_ms=EPOCH_MS,
+                estimated_latitude=LAT, estimated_longitude=LON, height_of_eye_m=HEIGHT_M,
+                pressure_hpa=PRESSURE_HPA, temperature_celsius=TEMPERATURE_C)
+    args.update(overrides)
+    return json.loads(cn.lop_compute_batch(**args))
+
+
+@pytest.mark.parametrize("refraction_model", [None, "saemundsson"])
+def test_matches_lop_compute(refraction_model):
+    batch = _batch(refraction_model=refraction_model)
+    assert batch["error"] is None
+    for i in range(len(RA)):
+        seconds, ms = divmod(int(EPOCH_MS[i]), 1000)
+        hms = seconds % 86400
+        single = json.loads(cn.lop_compute(
+            RA[i], DEC[i], LAT, LON, HEIGHT_M, PRESSURE_HPA, TEMPERATURE_C, ALT[i], "2024-03-20",
+            "%02d:%02d:%02d.%03d" % (hms // 3600, hms // 60 % 60, hms % 60, ms), "UTC",
+            refraction_model))
+        assert single["error"] is None
+        for key in ("intercept_nm", "azimuth_deg", "observed_altitude_deg", "computed_altitude_deg"):
+            assert batch[key][i] == pytest.approx(single[key], abs=1e-9)
+
+
+def test_intercept_is_observed_minus_computed():
+    batch = _batch()
+    np.testing.assert_allclose(batch["intercept_nm"],
+                               (np.asarray(batch["observed_altitude_deg"])
+                                - batch["computed_altitude_deg"]) * 60.0, atol=1e-9)
+
+
+def test_mismatched_lengths():
+    assert "same length" in _batch(epoch_ms=EPOCH_MS[:2])["error"]
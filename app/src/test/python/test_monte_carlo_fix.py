@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+import celestial_navigator as cn
+from conftest import synthetic_sights
+
+TRUE_LAT, TRUE_LON = 10.0, 60.0
+
+
+@pytest.fixture(scope="module")
+def sights():
+    return synthetic_sights(TRUE_LAT, TRUE_LON, count=6, seed=5)
+
+
+def _only_altitude_noise(sights, sigma_nm, samples=2000):
+    gha, dec, ho = sights
+    return cn.monte_carlo_fix(gha, dec, ho, TRUE_LAT, TRUE_LON, samples=samples,
+                              altitude_sigma_nm=sigma_nm, altitude_bias_sigma_nm=0.0,
+                              clock_sigma_s=0.0, radec_sigma_arcsec=0.0, seed=7)
+
+
+def test_result_fields(sights):
+    gha, dec, ho = sights
+    result = cn.monte_carlo_fix(gha, dec, ho, TRUE_LAT, TRUE_LON, samples=500, seed=1)
+    assert result["samples"] == 500
+    assert 0.0 < result["radius_50_nm"] < result["radius_95_nm"]
+    assert result["error_ellipse"]["semi_major_nm"] >= result["error_ellipse"]["semi_minor_nm"]
+    assert np.hypot(*result["bias_nm"]) < 0.2 * result["radius_50_nm"]
+
+
+def test_spread_scales_with_altitude_noise(sights):
+    one = _only_altitude_noise(sights, 1.0)
+    two = _only_altitude_noise(sights, 2.0)
+    assert two["radius_50_nm"] == pytest.approx(2.0 * one["radius_50_nm"], rel=0.01)
+    np.testing.assert_allclose(two["covariance_nm2"], 4.0 * np.asarray(one["covariance_nm2"]),
+                               rtol=0.02, atol=1e-6)
+
+
+def test_matches_least_squares_covariance(sights):
+    # With independent altitude noise only, the sample covariance approaches the
+    # linearized covariance (J^T J)^-1 sigma^2 of the fix.
+    gha, dec, _ = sights
+    _, az = cn.fast_altaz(gha, dec, TRUE_LAT, TRUE_LON)
+    az = np.deg2rad(az)
+    design = np.column_stack((np.cos(az), np.sin(az)))
+    expected = np.linalg.inv(design.T @ design)
+    result = _only_altitude_noise(sights, 1.0, samples=20000)
+    np.testing.assert_allclose(result["covariance_nm2"], expected, rtol=0.05, atol=0.01)
+
+
+def test_no_error_sources_no_spread(sights):
+    result = _only_altitude_noise(sights, 0.0, samples=50)
+    assert result["radius_95_nm"] < 1e-6
+
+
+def test_step_is_taken_at_the_linearization_point():
+    # A common altitude bias is the only error: one Gauss-Newton step from the nominal
+    # fix is linear in it, so at any latitude all samples lie on one line.
+    gha, dec, ho = synthetic_sights(70.0, TRUE_LON, count=6, seed=5)
+    result = cn.monte_carlo_fix(gha, dec, ho, 70.0, TRUE_LON, samples=200, iterations=1,
+                                altitude_sigma_nm=0.0, altitude_bias_sigma_nm=60.0,
+                                clock_sigma_s=0.0, radec_sigma_arcsec=0.0, seed=7)
+    assert result["error_ellipse"]["semi_major_nm"] > 5.0
+    assert result["error_ellipse"]["semi_minor_nm"] < 1e-6
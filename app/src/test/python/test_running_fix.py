@@ -0,0 +1,79 @@
+import json
+import math
+
+import numpy as np
+import pytest
+
+import celestial_navigator as cn
+from conftest import SIGHT_UTC_US, synthetic_sights
+
+TRUE_LAT, TRUE_LON = 45.0, -5.0
+MINUTE_US = 60 * 1000000
+
+
+def _offset_nm(lat, lon, true_lat, true_lon):
+    return math.hypot((lat - true_lat) * 60.0,
+                      (lon - true_lon) * 60.0 * math.cos(math.radians(true_lat)))
+
+
+def test_stationary_sights_converge():
+    gha, dec, ho = synthetic_sights(TRUE_LAT, TRUE_LON, count=6, seed=1)
+    fix = cn.RunningFix(TRUE_LAT + 8.0 / 60.0, TRUE_LON - 8.0 / 60.0, SIGHT_UTC_US, sigma_nm=20.0)
+    start_error = _offset_nm(fix.lat, fix.lon, TRUE_LAT, TRUE_LON)
+    for i in range(2 * len(ho)):
+        k = i % len(ho)
+        fix.update(gha[k], dec[k], ho[k], SIGHT_UTC_US + i * MINUTE_US)
+    assert _offset_nm(fix.lat, fix.lon, TRUE_LAT, TRUE_LON) < 0.05 * start_error
+    assert np.all(np.linalg.eigvalsh(fix.covariance_nm2) < 1.0)
+
+
+def test_tracks_a_moving_vessel():
+    course_deg, speed_kn = 90.0, 12.0
+    gha0, dec0, _ = synthetic_sights(TRUE_LAT, TRUE_LON, count=6, seed=1)
+    fix = cn.RunningFix(TRUE_LAT, TRUE_LON + 0.1, SIGHT_UTC_US, sigma_nm=10.0,
+                        course_deg=course_deg, speed_kn=speed_kn)
+    for i in range(18):
+        utc_us = SIGHT_UTC_US + i * 10 * MINUTE_US
+        hours = (utc_us - SIGHT_UTC_US) / 3.6e9
+        true_lon = TRUE_LON + speed_kn * hours / (60.0 * math.cos(math.radians(TRUE_LAT)))
+        k = i % len(gha0)
+        # The star's Earth-fixed place at the sight time (the sky turns at the sidereal rate)
+        gha = gha0[k] + 360.98564736629 * (utc_us - SIGHT_UTC_US) / 86400e6
+        ho, _ = cn.fast_altaz(gha, dec0[k], TRUE_LAT, true_lon)
+        fix.update(gha, dec0[k], float(ho), utc_us)
+    assert fix.sight_count == 18
+    assert _offset_nm(fix.lat, fix.lon, TRUE_LAT, true_lon) < 0.5
+
+
+def test_dead_reckoning():
+    fix = cn.RunningFix(TRUE_LAT, TRUE_LON, SIGHT_UTC_US, sigma_nm=1.0, course_deg=0.0, speed_kn=6.0,
+                        process_noise_nm2_per_h=2.0)
+    fix.advance(SIGHT_UTC_US + 30 * MINUTE_US)
+    assert fix.lat == pytest.approx(TRUE_LAT + 3.0 / 60.0)
+    assert fix.lon == pytest.approx(TRUE_LON)
+    np.testing.assert_allclose(fix.covariance_nm2, np.eye(2) * 2.0)
+    fix.set_motion(270.0, 6.0)
+    fix.advance(SIGHT_UTC_US + 60 * MINUTE_US)
+    assert fix.lon == pytest.approx(TRUE_LON - 3.0 / (60.0 * math.cos(math.radians(fix.lat))))
+
+
+def test_state_round_trip():
+    gha, dec, ho = synthetic_sights(TRUE_LAT, TRUE_LON, count=2, seed=1)
+    fix = cn.RunningFix(TRUE_LAT, TRUE_LON, SIGHT_UTC_US, course_deg=30.0, speed_kn=5.0)
+    fix.update(gha[0], dec[0], ho[0], SIGHT_UTC_US + MINUTE_US)
+    state = json.loads(json.dumps(fix.to_dict()))
+    copy = cn.RunningFix.from_dict(state)
+    assert copy.to_dict() == fix.to_dict()
+    assert fix.update(gha[1], dec[1], ho[1], SIGHT_UTC_US + 2 * MINUTE_US) == \
+        copy.update(gha[1], dec[1], ho[1], SIGHT_UTC_US + 2 * MINUTE_US)
+
+
+def test_running_fix_update_json():
+    obs = {"ra": 101.287, "dec": -16.716, "alt": 30.0, "time_iso": "2024-03-20T21:00:00Z"}
+    state = json.loads(cn.running_fix_update(
+        json.dumps({"lat": TRUE_LAT, "lon": TRUE_LON, "time_iso": "2024-03-20T20:50:00Z"}),
+        json.dumps(obs)))
+    assert "error" not in state
+    assert state["sight_count"] == 1
+    again = json.loads(cn.running_fix_update(json.dumps(state), json.dumps(obs), 0.0, 5.0))
+    assert again["sight_count"] == 2
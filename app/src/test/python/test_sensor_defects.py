@@ -0,0 +1,135 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pytest
+
+import celestial_navigator as cn
+import tetra3
+from conftest import write_sky_image
+
+SIZE = (400, 600)
+HOT_PIXEL = (101.0, 202.0)  # (y, x), cell (25, 50)
+
+
+def _record(defects, pointings, centroids=(HOT_PIXEL,)):
+    for (ra, dec) in pointings:
+        defects.record(np.array(centroids), ra, dec)
+
+
+def test_hot_pixel_becomes_defect_over_distinct_pointings():
+    defects = cn.SensorDefectMap(SIZE)
+    _record(defects, [(10.0, 20.0), (10.5, 20.0), (11.0, 20.0)])  # One sky, within 2 deg
+    assert len(defects.defect_cells) == 0
+    _record(defects, [(30.0, 20.0), (60.0, -10.0)])
+    assert len(defects.defect_cells) == 1
+    assert defects.is_defect(np.array([HOT_PIXEL, (102.5, 203.5), (300.0, 50.0)])).tolist() \
+        == [True, True, False]
+    assert not defects.is_mature
+
+
+def test_mask_excludes_defect_and_neighbours_at_any_scale():
+    defects = cn.SensorDefectMap(SIZE)
+    _record(defects, [(0.0, 0.0), (90.0, 0.0), (180.0, 0.0)])
+    full = defects.mask(SIZE)
+    assert full.shape == SIZE
+    assert not full[int(HOT_PIXEL[0]), int(HOT_PIXEL[1])]
+    assert not full[96, 196] and not full[107, 207]  # Neighbouring cells
+    assert full[92, 192] and full[112, 212]
+    assert full.sum() == full.size - 12 * 12
+
+    half = defects.mask((200, 300))
+    assert not half[50, 101]
+    assert half[80, 150]
+
+
+def test_saved_map_reloads_for_same_sensor_only(tmp_path):
+    path = str(tmp_path / "defects.npz")
+    defects = cn.SensorDefectMap(SIZE, path)
+    _record(defects, [(ra, 45.0) for ra in range(0, 100, 10)], [HOT_PIXEL, (5.0, 5.0)])
+    assert defects.is_mature
+    defects.save()
+
+    reloaded = cn.SensorDefectMap(SIZE, path)
+    assert reloaded.num_images == 10 and reloaded.is_mature
+    assert np.array_equal(reloaded.defect_cells, defects.defect_cells)
+
+    other = cn.SensorDefectMap((SIZE[1], SIZE[0]), path)
+    assert other.num_images == 0 and len(other.defect_cells) == 0
+
+
+def test_chance_coincidence_fades_with_further_pointings():
+    defects = cn.SensorDefectMap(SIZE)
+    _record(defects, [(0.0, 0.0), (30.0, 0.0), (60.0, 0.0)])
+    assert len(defects.defect_cells) == 1
+    _record(defects, [(90.0, 0.0), (120.0, 0.0)], centroids=np.empty((0, 2)))
+    assert len(defects.defect_cells) == 1  # 3 hits in 5 pointings
+    _record(defects, [(120.5, 0.0), (121.0, 0.0)], centroids=np.empty((0, 2)))  # Same sky
+    assert len(defects.defect_cells) == 1
+    _record(defects, [(150.0, 0.0), (180.0, 0.0)], centroids=np.empty((0, 2)))
+    assert len(defects.defect_cells) == 0  # 3 hits in 7 pointings
+    _record(defects, [(210.0, 0.0), (240.0, 0.0)])
+    assert len(defects.defect_cells) == 1
+
+
+def test_old_map_without_chances_loads(tmp_path):
+    path = str(tmp_path / "defects.npz")
+    cell = (HOT_PIXEL[0] // 4) * (SIZE[1] // 4) + HOT_PIXEL[1] // 4
+    np.savez(path, size=np.array(SIZE), num_images=3, cells=np.array([cell], dtype=np.int64),
+             counts=np.array([3], dtype=np.int32), vectors=np.array([[1.0, 0.0, 0.0]], dtype=np.float32))
+    assert cn.SensorDefectMap(SIZE, path).is_defect(np.array([HOT_PIXEL])).tolist() == [True]
+
+
+def test_concurrent_updates_keep_every_image(tmp_path, monkeypatch):
+    monkeypatch.setattr(cn, "_app_files_dir", lambda: str(tmp_path))
+    threads = [threading.Thread(target=cn.SensorDefectMap.update_for_sensor,
+                                args=(SIZE, np.array([HOT_PIXEL]), 20.0 * i, 0.0))
+               for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    defects = cn.SensorDefectMap.for_sensor(SIZE)
+    assert defects.num_images == 8
+    assert len(defects.defect_cells) == 1
+    assert os.listdir(tmp_path) == ["sensor_defects_400x600.npz"]
+
+
+def test_unmatched_centroids():
+    yx = np.array([[10.0, 10.0], [50.0, 60.0], [100.0, 100.0]])
+    assert cn._unmatched_centroids(yx, [[50.5, 60.5], [10.0, 10.0]]).tolist() == [[100.0, 100.0]]
+    assert cn._unmatched_centroids(yx, []).tolist() == yx.tolist()
+
+
+class _MatchingSolver:
+    """Stands in for T3_INSTANCE: solves every request, matching the first two centroids."""
+    database_fingerprint = "test"
+
+    def solve_from_centroids(self, centroids, size, return_matches=False, **kwargs):
+        assert return_matches
+        return {"status": tetra3.MATCH_FOUND, "T_solve": 1.0, "RA": 10.0, "Dec": 20.0,
+                "Roll": 0.0, "FOV": 50.0, "matched_centroids": centroids[:2],
+                "matched_stars": [[10.0, 20.0, 1.0]] * 2}
+
+
+@pytest.mark.skipif(os.name != "posix", reason="scripted cedar_cli needs a POSIX shell")
+def test_solve_records_only_unmatched_detections(tmp_path, monkeypatch):
+    monkeypatch.setattr(cn, "_app_files_dir", lambda: str(tmp_path))
+    monkeypatch.setattr(cn, "_app_cache_dir", lambda: str(tmp_path))
+    monkeypatch.setattr(cn.SolveCache, "MAX_ENTRIES", 0)
+    monkeypatch.setattr(cn, "T3_INSTANCE", _MatchingSolver())
+    cedar = tmp_path / "cedar_cli"
+    # argv: --input path --output path ...; three stars, brightest first
+    cedar.write_text("#!/bin/sh\necho '{\"stars\": ["
+                     "{\"x\": 20.0, \"y\": 10.0, \"brightness\": 3.0}, "
+                     "{\"x\": 120.0, \"y\": 110.0, \"brightness\": 2.0}, "
+                     "{\"x\": 220.0, \"y\": 210.0, \"brightness\": 1.0}]}' > \"$4\"\n")
+    cedar.chmod(0o755)
+    monkeypatch.setenv("CEDAR_CLI", str(cedar))
+    image_path = write_sky_image(tmp_path / "sky.png")
+
+    assert json.loads(cn.image_processor("sky", image_path))["solved"] == 1
+    defects = cn.SensorDefectMap.for_sensor((300, 400))
+    assert defects.num_images == 1
+    assert defects._cells.tolist() == defects._cell_ids([[210.0, 220.0]]).tolist()
@@ -0,0 +1,104 @@
+import os
+import time
+
+import pytest
+
+import celestial_navigator as cn
+from conftest import write_sky_image
+
+
+def test_put_get_clear(tmp_path):
+    cache = cn.SolveCache(str(tmp_path))
+    key = cn.SolveCache.key("digest", 6.0, None, [1, 2])
+    assert key == cn.SolveCache.key("digest", 6.0, None, [1, 2])
+    assert key != cn.SolveCache.key("digest", 4.0, None, [1, 2])
+    assert cache.get("result", key) is None
+    cache.put("result", key, {"solved": 1, "ra_deg": 10.5})
+    assert cache.get("result", key) == {"solved": 1, "ra_deg": 10.5}
+    assert cache.get("detection", key) is None
+    cache.clear()
+    assert cache.get("result", key) is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = cn.SolveCache(str(tmp_path), max_entries=3)
+    for i in range(3):
+        cache.put("result", str(i), {"i": i})
+        time.sleep(0.02)
+    assert cache.get("result", "0") == {"i": 0}  # refreshes entry 0
+    time.sleep(0.02)
+    cache.put("result", "3", {"i": 3})
+    assert len(os.listdir(tmp_path)) == 3
+    assert cache.get("result", "1") is None
+    assert cache.get("result", "0") == {"i": 0}
+
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    cache = cn.SolveCache(str(tmp_path), max_entries=0)
+    cache.put("result", "key", {"solved": 1})
+    assert cache.get("result", "key") is None
+
+
+class _FakeSolver:
+    """Stands in for T3_INSTANCE: never solves, records the centroid counts it got."""
+    database_fingerprint = "test"
+
+    def __init__(self):
+        self.centroid_counts = []
+
+    def solve_from_centroids(self, centroids, size, **kwargs):
+        self.centroid_counts.append(len(centroids))
+        return {"status": cn.tetra3.NO_MATCH, "T_solve": 1.0, "RA": None}
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    """image_processor with a fake solver, a private cache and a scripted cedar_cli."""
+    monkeypatch.setattr(cn, "_app_files_dir", lambda: str(tmp_path))
+    monkeypatch.setattr(cn, "_app_cache_dir", lambda: str(tmp_path))
+    monkeypatch.setattr(cn, "T3_INSTANCE", _FakeSolver())
+    monkeypatch.setattr(cn, "SOLVE_STAGES", cn.SOLVE_STAGES[:1])
+    cache = cn.SolveCache(str(tmp_path / "solve_cache"))
+    monkeypatch.setattr(cn.SolveCache, "_default", cache)
+
+    image_path = write_sky_image(tmp_path / "sky.png")
+
+    cedar_log = tmp_path / "cedar.log"
+    cedar = tmp_path / "cedar_cli"
+    # argv: --input path --output path --sigma s --hot-pixels b
+    cedar.write_text('#!/bin/sh\necho run >> "%s"\necho \'{"stars": [{"x": 10.0, "y": 20.0, '
+                     '"brightness": 5.0}, {"x": 200.0, "y": 280.0, "brightness": 9.0}, '
+                     '{"x": 300.0, "y": 100.0, "brightness": 7.0}]}\' > "$4"\n' % cedar_log)
+    cedar.chmod(0o755)
+    return image_path, cache, str(cedar), cedar_log
+
+
+def _detections(cache):
+    return [name for name in os.listdir(cache.path) if name.startswith("detection_")]
+
+
+@pytest.mark.skipif(os.name != "posix", reason="scripted cedar_cli needs a POSIX shell")
+def test_fallback_detection_is_not_cached(pipeline, monkeypatch):
+    image_path, cache, _, _ = pipeline
+    monkeypatch.delenv("CEDAR_CLI", raising=False)
+    result = cn._image_processor("sky", image_path)
+    assert result["stages"][0]["centroids"] > 0
+    assert _detections(cache) == []
+
+
+@pytest.mark.skipif(os.name != "posix", reason="scripted cedar_cli needs a POSIX shell")
+def test_cedar_stars_cached_before_masking(pipeline, monkeypatch):
+    image_path, cache, cedar, cedar_log = pipeline
+    monkeypatch.setenv("CEDAR_CLI", cedar)
+    unmasked = cn._image_processor("sky", image_path)
+    assert unmasked["stages"][0]["centroids"] == 3
+    assert len(_detections(cache)) == 1
+
+    # A horizon mask on the same image reuses Cedar's stars and masks them anew.
+    masked = cn._image_processor("sky", image_path, pitch_deg=10.0)
+    assert masked["stages"][0]["centroids"] < 3
+    assert len(cedar_log.read_text().splitlines()) == 1
+
+    # Unsolved images are not in the result cache; solving again still skips Cedar.
+    cn._image_processor("sky", image_path)
+    assert len(cedar_log.read_text().splitlines()) == 1
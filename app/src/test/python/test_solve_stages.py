@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+import celestial_navigator as cn
+import tetra3
+from conftest import write_sky_image
+
+
+class _ScriptedSolver:
+    """Stands in for T3_INSTANCE: answers the solves with the given statuses in turn."""
+    database_fingerprint = "test"
+
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.calls = []
+
+    def solve_from_centroids(self, centroids, size, **kwargs):
+        self.calls.append(dict(kwargs, centroids=len(centroids)))
+        status = self.statuses.pop(0)
+        if status != tetra3.MATCH_FOUND:
+            return {"status": status, "T_solve": 1.0, "RA": None}
+        return {"status": status, "T_solve": 1.0, "RA": 10.0, "Dec": 20.0, "Roll": 0.0,
+                "FOV": 50.0, "matched_centroids": centroids[:3], "matched_stars": [[0.0, 0.0, 1.0]] * 3}
+
+
+def _stars(count):
+    """Cedar Detect result with `count` well separated stars, brightest first."""
+    yx = np.stack(np.meshgrid(np.arange(10, 300, 20), np.arange(10, 400, 20), indexing='ij'),
+                  axis=-1).reshape(-1, 2)[:count]
+    return {"stars": [{"y": float(y), "x": float(x), "brightness": float(count - i)}
+                      for i, (y, x) in enumerate(yx)]}
+
+
+@pytest.fixture
+def run(tmp_path, monkeypatch):
+    """Runs image_processor on a scripted solver; Cedar finds stars_by_sigma[sigma] stars."""
+    monkeypatch.setattr(cn, "_app_files_dir", lambda: str(tmp_path))
+    monkeypatch.setattr(cn, "_app_cache_dir", lambda: str(tmp_path))
+    monkeypatch.setattr(cn.SolveCache, "MAX_ENTRIES", 0)
+    image_path = write_sky_image(tmp_path / "sky.png")
+
+    def run(statuses, stars_by_sigma):
+        solver = _ScriptedSolver(statuses)
+        monkeypatch.setattr(cn, "T3_INSTANCE", solver)
+        steps = cn._image_processor_steps("sky", image_path, None, 0.0, None, None)
+        requests = []
+        request, result = cn._advance_image_processor(steps)
+        while request is not None:
+            requests.append(request[0])
+            request, result = cn._advance_image_processor(steps, _stars(stars_by_sigma[request[0]]))
+        assert not solver.statuses
+        return result, requests, solver.calls
+    return run
+
+
+def test_escalates_through_every_stage_on_no_match(run):
+    result, requests, calls = run([tetra3.NO_MATCH, tetra3.TIMEOUT, tetra3.MATCH_FOUND],
+                                  {6.0: 60, 4.0: 80})
+    assert result["solved"] == 1
+    # The standard stage reuses the sigma 6 detection of the quick one.
+    assert requests == [6.0, 4.0]
+    assert [stage["stage"] for stage in result["stages"]] == ["quick", "standard", "deep"]
+    assert [call["centroids"] for call in calls] == [12, 30, 50]
+    assert [call["fov_max_error"] for call in calls] == [3.0, 8.0, None]
+    assert [call["solve_timeout"] for call in calls] == [1000, 3000, 6000]
+
+
+def test_stops_at_the_first_solution(run):
+    result, requests, calls = run([tetra3.MATCH_FOUND], {6.0: 60})
+    assert result["solved"] == 1
+    assert requests == [6.0]
+    assert [stage["stage"] for stage in result["stages"]] == ["quick"]
+
+
+def test_too_few_stars_skip_to_a_more_sensitive_detection(run):
+    result, requests, calls = run([tetra3.TOO_FEW, tetra3.MATCH_FOUND], {6.0: 8, 4.0: 20})
+    assert result["solved"] == 1
+    # The standard stage would retry the same 8 stars, so only deep runs.
+    assert [stage["stage"] for stage in result["stages"]] == ["quick", "deep"]
+    assert [call["centroids"] for call in calls] == [8, 20]
+
+
+def test_cancel_does_not_escalate(run):
+    result, requests, calls = run([tetra3.CANCELLED], {6.0: 60})
+    assert result["solved"] == 0
+    assert [stage["status"] for stage in result["stages"]] == [tetra3.CANCELLED]
+    assert len(calls) == 1
@@ -0,0 +1,62 @@
+import math
+
+import numpy as np
+import pytest
+
+import celestial_navigator as cn
+
+SIZE = (300, 400)  # (height, width) of the stored image
+FOV_DEG = 40.0
+HALF_FOV_DEG = FOV_DEG / 2.0
+G = 9.81
+
+
+def _edge_altitude_deg(offset_px):
+    f = (SIZE[1] / 2.0) / math.tan(math.radians(HALF_FOV_DEG))
+    return math.degrees(math.atan2(offset_px, f))
+
+
+def test_boresight_at_zenith():
+    # Lying screen down, the back camera looks straight up.
+    up = cn.camera_up_vector([0.0, 0.0, -G])
+    np.testing.assert_allclose(up, [0.0, 0.0, 1.0])
+    centre = (SIZE[0] / 2.0, SIZE[1] / 2.0)
+    corners = [(0.0, 0.0), (0.0, SIZE[1]), (SIZE[0], 0.0), (SIZE[0], SIZE[1])]
+    alts = cn.star_altitudes_deg([centre, (centre[0], 0.0)] + corners, SIZE, FOV_DEG, None, up)
+    assert alts[0] == pytest.approx(90.0)
+    assert alts[1] == pytest.approx(90.0 - HALF_FOV_DEG)
+    np.testing.assert_allclose(alts[2:], alts[2])  # Symmetric around the zenith
+    assert cn.up_vector_pitch_roll(up)[0] == pytest.approx(90.0)
+
+
+def test_horizontal_upright_camera():
+    up = cn.camera_up_vector([0.0, G, 0.0])
+    np.testing.assert_allclose(up, [0.0, -1.0, 0.0], atol=1e-12)
+    alts = cn.star_altitudes_deg([(150.0, 200.0), (0.0, 200.0), (300.0, 200.0), (150.0, 0.0)],
+                                 SIZE, FOV_DEG, None, up)
+    np.testing.assert_allclose(alts, [0.0, _edge_altitude_deg(150.0), -_edge_altitude_deg(150.0), 0.0],
+                               atol=1e-9)
+    assert cn.up_vector_pitch_roll(up) == pytest.approx((0.0, 0.0))
+
+
+def test_pitched_camera():
+    pitch = 30.0
+    up = cn.camera_up_vector([0.0, G * math.cos(math.radians(pitch)), -G * math.sin(math.radians(pitch))])
+    assert cn.star_altitudes_deg([(150.0, 200.0)], SIZE, FOV_DEG, None, up)[0] == pytest.approx(pitch)
+    assert cn.up_vector_pitch_roll(up) == pytest.approx((pitch, 0.0))
+
+
+# EXIF orientation -> (y, x) of the middle of the stored image edge that is up in the scene
+UP_EDGES = {1: (0.0, 200.0), 3: (300.0, 200.0), 6: (150.0, 0.0), 8: (150.0, 400.0)}
+
+
+@pytest.mark.parametrize("orientation", sorted(UP_EDGES))
+def test_exif_rotations(orientation):
+    # Device upright, camera at the horizon: the scene's up edge sees above the horizon.
+    up = cn.camera_up_vector([0.0, G, 0.0], orientation)
+    up_edge = np.array(UP_EDGES[orientation])
+    down_edge = np.array(SIZE) - up_edge
+    alts = cn.star_altitudes_deg([up_edge, down_edge, (150.0, 200.0)], SIZE, FOV_DEG, None, up)
+    offset = abs(up_edge - np.array(SIZE) / 2.0).max()
+    np.testing.assert_allclose(alts, [_edge_altitude_deg(offset), -_edge_altitude_deg(offset), 0.0],
+                               atol=1e-9)